@@ -0,0 +1,128 @@
+import base64
+import heapq
+import json
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+from reviews.exports import visible_feedback
+from reviews.models import Comment, Review
+
+
+# Порядок типов при одинаковой дате публикации.
+KINDS = ('comment', 'review')
+SOURCES = {
+    'review': (Review, ('id', 'pub_date', 'text', 'author__username',
+                        'title_id', 'score')),
+    'comment': (Comment, ('id', 'pub_date', 'text', 'author__username',
+                          'review_id', 'review__title_id')),
+}
+
+_datetime_field = serializers.DateTimeField()
+
+
+def sort_key(item):
+    return item['pub_date'], KINDS.index(item['type']), item['id']
+
+
+def encode_cursor(item):
+    """Курсор записи ленты: дата публикации, тип и id."""
+    data = json.dumps([item['pub_date'].isoformat(), item['type'],
+                       item['id']])
+    return base64.urlsafe_b64encode(data.encode()).decode()
+
+
+def decode_cursor(cursor, name):
+    try:
+        pub_date, kind, pk = json.loads(base64.urlsafe_b64decode(
+            cursor.encode()).decode())
+        pub_date = parse_datetime(pub_date)
+        if pub_date is None or kind not in KINDS or not isinstance(pk, int):
+            raise ValueError
+    except (ValueError, TypeError):
+        raise ValidationError({name: ['Некорректный курсор.']})
+    return pub_date, KINDS.index(kind), pk
+
+
+def keyset(kind, cursor, newer):
+    """
+    Условие записей типа kind строго новее или старше курсора в порядке
+    (pub_date, тип, id). Диапазон по pub_date выбирается по индексу,
+    остальные записи с той же датой отсекает дополнительное условие.
+    """
+    pub_date, cursor_rank, pk = cursor
+    rank = KINDS.index(kind)
+    if newer:
+        bound, strict, tie = 'gte', 'gt', 'gt'
+        tie_allowed = rank > cursor_rank
+    else:
+        bound, strict, tie = 'lte', 'lt', 'lt'
+        tie_allowed = rank < cursor_rank
+    condition = Q(**{f'pub_date__{bound}': pub_date})
+    if tie_allowed:
+        return condition
+    if rank == cursor_rank:
+        return condition & (Q(**{f'pub_date__{strict}': pub_date})
+                            | Q(**{f'id__{tie}': pk}))
+    return Q(**{f'pub_date__{strict}': pub_date})
+
+
+def activity_queryset(kind, limit, cursor, newer):
+    """
+    Записи типа kind после курсора. id выбираются подзапросом по одной
+    таблице, чтобы планировщик не начинал соединение с таблицы
+    пользователей и не сортировал все записи.
+    """
+    model, values = SOURCES[kind]
+    queryset = visible_feedback(model)
+    if cursor is not None:
+        queryset = queryset.filter(keyset(kind, cursor, newer))
+    ordering = ('pub_date', 'id') if newer else ('-pub_date', '-id')
+    ids = queryset.order_by(*ordering).values('id')[:limit]
+    return model.objects.filter(id__in=ids).order_by(
+        *ordering).values(*values)
+
+
+def fetch(kind, limit, cursor, newer):
+    return [{'type': kind, **row}
+            for row in activity_queryset(kind, limit, cursor, newer)]
+
+
+def represent(item):
+    data = {
+        'type': item['type'],
+        'id': item['id'],
+        'title_id': item.get('title_id', item.get('review__title_id')),
+        'author': item['author__username'],
+        'text': item['text'],
+        'pub_date': _datetime_field.to_representation(item['pub_date']),
+    }
+    if item['type'] == 'review':
+        data['score'] = item['score']
+    else:
+        data['review_id'] = item['review_id']
+    return data
+
+
+def recent_activity(limit, before=None, since=None):
+    """
+    Последние отзывы и комментарии по всем произведениям, от новых
+    к старым. С курсором before отдает записи старше него, с since —
+    до limit ближайших записей новее него. Из каждой таблицы выбирается
+    не больше limit + 1 строк по индексу (pub_date, id), поэтому
+    стоимость не зависит от размера таблиц.
+    Возвращает записи и признак того, что за ними есть еще записи.
+    """
+    newer = since is not None
+    cursor = since if newer else before
+    items = heapq.merge(
+        *(fetch(kind, limit + 1, cursor, newer) for kind in KINDS),
+        key=sort_key, reverse=not newer
+    )
+    items = list(items)
+    page, more = items[:limit], len(items) > limit
+    if newer:
+        page.reverse()
+    return page, more
@@ -5,3 +5,7 @@ class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
     verbose_name = 'Конфигурация API'
+
+    def ready(self):
+        from . import (events, facets, slug_cache,  # noqa: F401
+                       title_documents)
@@ -0,0 +1,109 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+
+
+API_PREFIX = '/api/'
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BATCH_REQUEST_WORKERS,
+            thread_name_prefix='batch')
+    return _executor
+
+
+def error(status, detail):
+    return {'status': status, 'body': {'detail': detail}}
+
+
+def sub_request(request, method, path, query, body):
+    """
+    Запрос операции пакета. Пользователь и токен внешнего запроса
+    передаются через принудительную аутентификацию DRF, поэтому
+    JWT проверяется один раз на весь пакет. Анонимные операции
+    аутентифицируются как обычно, чтобы получить ответ 401.
+    """
+    content = json.dumps(body).encode() if body is not None else b''
+    sub = HttpRequest()
+    sub.method = method
+    sub.path = sub.path_info = path
+    sub.META = {
+        **request.META,
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(content)),
+    }
+    sub.GET = QueryDict(query)
+    sub.COOKIES = request.COOKIES
+    sub._stream = io.BytesIO(content)
+    sub._read_started = False
+    sub.user = request.user
+    if request.user.is_authenticated:
+        sub._force_auth_user = request.user
+        sub._force_auth_token = request.auth
+    return sub
+
+
+def perform(request, operation):
+    """
+    Выполняет операцию пакета представлением из URL-резолвера, минуя
+    middleware. Возвращает статус и тело ответа.
+    """
+    url = urlsplit(operation['path'])
+    if not url.path.startswith(API_PREFIX):
+        return error(404, 'Не найдено.')
+    try:
+        match = resolve(url.path)
+    except Resolver404:
+        return error(404, 'Не найдено.')
+    if match.func is request.resolver_match.func:
+        return error(400, 'Вложенные пакеты не поддерживаются.')
+    sub = sub_request(request, operation['method'], url.path, url.query,
+                      operation.get('body'))
+    sub.resolver_match = match
+    response = match.func(sub, *match.args, **match.kwargs)
+    if response.streaming:
+        response.close()
+        return error(400, 'Потоковые ответы в пакете не поддерживаются.')
+    if hasattr(response, 'render'):
+        response.render()
+    content = response.content.decode()
+    if content and response.get('Content-Type', '').startswith(
+            'application/json'):
+        content = json.loads(content)
+    return {'status': response.status_code, 'body': content or None}
+
+
+def perform_in_thread(request, operation):
+    try:
+        return perform(request, operation)
+    finally:
+        close_old_connections()
+
+
+def run_batch(request, operations, parallel):
+    """
+    Выполняет операции пакета по порядку. Если все операции только
+    читают данные и запрошено parallel, они выполняются параллельно
+    в пуле из BATCH_REQUEST_WORKERS потоков.
+    """
+    if (parallel and settings.BATCH_REQUEST_WORKERS > 1
+            and all(operation['method'] == 'GET'
+                    for operation in operations)):
+        return list(get_executor().map(
+            lambda operation: perform_in_thread(request, operation),
+            operations
+        ))
+    return [perform(request, operation) for operation in operations]
@@ -0,0 +1,254 @@
+import asyncio
+import json
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Max
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from reviews.models import Comment, Review, Title
+from .serializers import CommentSerializer, ReviewSerializer
+
+
+EVENTS_PATH = re.compile(r'^/api/v1/titles/(?P<title_id>\d+)/events/$')
+KINDS = ('review', 'comment')
+HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    (b'x-accel-buffering', b'no'),
+]
+
+
+class EventHub:
+    """
+    Раздает события произведений подписчикам в цикле событий
+    ASGI-сервера. Подписчик — очередь одного соединения, поэтому
+    ожидающее соединение не занимает ни потока, ни запроса к базе.
+    publish можно вызывать из любого потока. Очередь подписчика,
+    который не успевает читать, закрывается.
+    """
+
+    def __init__(self):
+        self.loop = None
+        self.subscribers = {}
+
+    def subscribe(self, title_id):
+        self.loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=settings.EVENT_STREAM['QUEUE_SIZE'])
+        self.subscribers.setdefault(title_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, title_id, queue):
+        queues = self.subscribers.get(title_id, set())
+        queues.discard(queue)
+        if not queues:
+            self.subscribers.pop(title_id, None)
+
+    def has_subscribers(self, title_id):
+        return title_id in self.subscribers
+
+    def publish(self, title_id, event):
+        if self.loop is not None and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.deliver, title_id, event)
+
+    def deliver(self, title_id, event):
+        for queue in list(self.subscribers.get(title_id, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.unsubscribe(title_id, queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+hub = EventHub()
+
+
+def render_event(kind, instance):
+    """Событие (вид, id, JSON) отзыва или комментария."""
+    if kind == 'review':
+        data = ReviewSerializer(instance).data
+    else:
+        data = {**CommentSerializer(instance).data,
+                'review': instance.review_id}
+    return kind, instance.pk, json.dumps(data, ensure_ascii=False)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+def publish_feedback(sender, instance, created, **kwargs):
+    if not created:
+        return
+    kind = 'review' if sender is Review else 'comment'
+    title_id = (instance.title_id if kind == 'review'
+                else instance.review.title_id)
+    if hub.has_subscribers(title_id):
+        event = render_event(kind, instance)
+        transaction.on_commit(lambda: hub.publish(title_id, event))
+
+
+def run_query(func, *args):
+    """Выполняет запросы к базе вне цикла событий, как обработчик Django."""
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+def title_exists(title_id):
+    return Title.objects.filter(pk=title_id,
+                                deleted_at__isnull=True).exists()
+
+
+def latest_ids():
+    """Последние id отзывов и комментариев: точка отсчета нового потока."""
+    return [model.objects.aggregate(last=Max('id'))['last'] or 0
+            for model in (Review, Comment)]
+
+
+def backlog(title_id, review_id, comment_id):
+    """
+    Отзывы и комментарии произведения новее переданных id, не больше
+    EVENT_STREAM['BACKLOG'] каждого вида. Возвращает события по дате
+    публикации и признак, что выбраны не все.
+    """
+    limit = settings.EVENT_STREAM['BACKLOG']
+    reviews = Review.objects.filter(
+        title_id=title_id, id__gt=review_id, author__deleted_at__isnull=True
+    ).select_related('author').order_by('id')[:limit]
+    comments = Comment.objects.filter(
+        review__title_id=title_id, id__gt=comment_id,
+        author__deleted_at__isnull=True,
+        review__author__deleted_at__isnull=True
+    ).select_related('author').order_by('id')[:limit]
+    items = ([('review', review) for review in reviews]
+             + [('comment', comment) for comment in comments])
+    items.sort(key=lambda item: (item[1].pub_date, item[0], item[1].pk))
+    more = len(reviews) == limit or len(comments) == limit
+    return [render_event(kind, item) for kind, item in items], more
+
+
+def parse_last_event_id(value):
+    """Id отзыва и комментария из заголовка Last-Event-ID или None."""
+    try:
+        review_id, comment_id = (int(part) for part in value.split('.'))
+    except ValueError:
+        return None
+    return [review_id, comment_id]
+
+
+async def send_event(send, event, marks):
+    """
+    Отправляет событие. Id события — последние отправленные id отзыва
+    и комментария через точку, по нему поток продолжается после
+    переподключения.
+    """
+    kind, pk, data = event
+    index = KINDS.index(kind)
+    marks[index] = max(marks[index], pk)
+    message = (f'id: {marks[0]}.{marks[1]}\n'
+               f'event: {kind}\ndata: {data}\n\n')
+    await send({'type': 'http.response.body',
+                'body': message.encode(), 'more_body': True})
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def replay(send, title_id, marks):
+    """Отправляет пропущенные события, возвращает их вид и id."""
+    sent = set()
+    more = True
+    while more:
+        events, more = await sync_to_async(run_query)(
+            backlog, title_id, *marks)
+        for event in events:
+            await send_event(send, event, marks)
+            sent.add(event[:2])
+    return sent
+
+
+async def relay(receive, send, queue, marks, sent):
+    """
+    Пересылает события из очереди до отключения клиента, в паузах
+    отправляет комментарий-пульс. Возвращает True, если клиент
+    отключился.
+    """
+    disconnect = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        while True:
+            get = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {get, disconnect}, return_when=asyncio.FIRST_COMPLETED,
+                timeout=settings.EVENT_STREAM['HEARTBEAT'])
+            if get not in done:
+                get.cancel()
+                if disconnect in done:
+                    return True
+                await send({'type': 'http.response.body',
+                            'body': b': ping\n\n', 'more_body': True})
+                continue
+            event = get.result()
+            if event is None:
+                return False
+            if event[:2] not in sent:
+                await send_event(send, event, marks)
+    finally:
+        disconnect.cancel()
+
+
+async def stream_events(scope, receive, send, title_id):
+    """
+    Поток server-sent events о новых отзывах и комментариях
+    произведения. С заголовком Last-Event-ID сначала отправляются
+    пропущенные события из базы.
+    """
+    if not await sync_to_async(run_query)(title_exists, title_id):
+        await send({'type': 'http.response.start', 'status': 404,
+                    'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': b'Not Found'})
+        return
+    headers = dict(scope['headers'])
+    marks = parse_last_event_id(
+        headers.get(b'last-event-id', b'').decode('latin-1'))
+    queue = hub.subscribe(title_id)
+    try:
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': HEADERS})
+        if marks is None:
+            marks = await sync_to_async(run_query)(latest_ids)
+            sent = set()
+        else:
+            sent = await replay(send, title_id, marks)
+        if await relay(receive, send, queue, marks, sent):
+            return
+    finally:
+        hub.unsubscribe(title_id, queue)
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+class EventStreamMiddleware:
+    """
+    ASGI-приложение, которое отдает потоки событий произведений
+    GET /api/v1/titles/{id}/events/, остальные запросы передает
+    приложению Django.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        match = (EVENTS_PATH.match(scope['path'])
+                 if scope['type'] == 'http' and scope['method'] == 'GET'
+                 else None)
+        if match is None:
+            return await self.application(scope, receive, send)
+        await stream_events(scope, receive, send,
+                            int(match.group('title_id')))
@@ -0,0 +1,137 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import CharField, Count, F, IntegerField, Value
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.http import urlencode
+from django_filters.utils import translate_validation
+
+from reviews.models import CacheVersion, Category, Genre, Title
+from .filters import TitleFilter
+
+
+VERSION_NAME = 'title-facets'
+
+
+def get_cache():
+    return caches[settings.TITLE_FACETS['CACHE']]
+
+
+def invalidate_facets():
+    """
+    Сбрасывает кэш фасетов после фиксации транзакции: меняется общая
+    для процессов версия в таблице CacheVersion, входящая в ключи кэша.
+    """
+    CacheVersion.bump_on_commit(VERSION_NAME)
+
+
+NO_TEXT = Value(None, output_field=CharField())
+NO_YEAR = Value(None, output_field=IntegerField())
+
+
+def facet_rows(queryset, facet, count, slug=F('slug'), name=F('name'),
+               year=NO_YEAR):
+    """
+    Счетчики одного фасета в общем для UNION ALL виде: фасет, slug,
+    название, год и количество. Порядок задается после объединения.
+    """
+    return queryset.order_by().values(
+        facet_slug=slug, facet_name=name, facet_year=year
+    ).annotate(
+        facet=Value(facet, output_field=CharField()), count=Count(count)
+    ).values_list('facet', 'facet_slug', 'facet_name', 'facet_year',
+                  'count')
+
+
+def genre_counts(queryset):
+    return facet_rows(Genre.objects.filter(title__in=queryset.values('id')),
+                      'genre', 'title')
+
+
+def category_counts(queryset):
+    return facet_rows(
+        Category.objects.filter(titles__in=queryset.values('id')),
+        'category', 'titles')
+
+
+def year_counts(queryset):
+    return facet_rows(queryset, 'year', 'id', slug=NO_TEXT, name=NO_TEXT,
+                      year=F('year'))
+
+
+def by_count(item):
+    return -item['count'], item['slug']
+
+
+def by_year(item):
+    return -item['year']
+
+
+FACETS = {
+    'genre': (genre_counts, by_count),
+    'category': (category_counts, by_count),
+    'year': (year_counts, by_year),
+}
+
+
+def filtered_titles(params):
+    filterset = TitleFilter(
+        params, queryset=Title.objects.filter(deleted_at__isnull=True))
+    if not filterset.is_valid():
+        raise translate_validation(filterset.errors)
+    return filterset.qs
+
+
+def compute_facets(params, facets):
+    """
+    Считает фасеты произведений для фильтров params одним запросом
+    UNION ALL. Счетчики фасета учитывают все фильтры, кроме фильтра
+    по самому фасету, чтобы были видны соседние значения.
+    """
+    filtered_titles(params)
+    parts = [
+        FACETS[facet][0](filtered_titles(
+            {key: value for key, value in params.items() if key != facet}))
+        for facet in facets
+    ]
+    result = {facet: [] for facet in facets}
+    if not parts:
+        return result
+    for facet, slug, name, year, count in parts[0].union(*parts[1:],
+                                                         all=True):
+        result[facet].append(
+            {'year': year, 'count': count} if facet == 'year'
+            else {'slug': slug, 'name': name, 'count': count})
+    for facet, items in result.items():
+        items.sort(key=FACETS[facet][1])
+    return result
+
+
+def get_facets(params, facets):
+    """Возвращает фасеты из кэша или считает и кэширует их."""
+    cache = get_cache()
+    query = urlencode(sorted(params.items()) + [('facets', ','.join(facets))])
+    key = 'title-facets:{}:{}'.format(CacheVersion.current(VERSION_NAME),
+                                      hashlib.md5(query.encode()).hexdigest())
+    result = cache.get(key)
+    if result is None:
+        result = compute_facets(params, facets)
+        cache.set(key, result, settings.TITLE_FACETS['TIMEOUT'])
+    return result
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def reset_facets(sender, **kwargs):
+    """
+    Сбрасывает кэш фасетов при изменении произведений, категорий и жанров.
+    Жанры произведений меняются после его сохранения, поэтому
+    TitleViewSet сбрасывает кэш еще раз после записи жанров.
+    """
+    invalidate_facets()
@@ -1,6 +1,7 @@
 from django_filters import rest_framework as filters
 
 from reviews.models import Title
+from constants import MAX_UNICODE_CHAR
 
 
 class TitleFilter(filters.FilterSet):
@@ -8,7 +9,16 @@ class TitleFilter(filters.FilterSet):
 
     category = filters.CharFilter(field_name='category__slug')
     genre = filters.CharFilter(field_name='genre__slug')
+    name_prefix = filters.CharFilter(method='filter_name_prefix')
 
     class Meta:
         model = Title
         fields = ('name', 'category', 'genre', 'year')
+
+    def filter_name_prefix(self, queryset, name, value):
+        """
+        Отбирает произведения, название которых начинается с value.
+        Диапазон вместо LIKE позволяет использовать индекс по name.
+        """
+        return queryset.filter(name__gte=value,
+                               name__lt=value + MAX_UNICODE_CHAR)
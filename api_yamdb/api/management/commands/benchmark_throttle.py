@@ -0,0 +1,67 @@
+import os
+import tempfile
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.throttling import (LocalMemoryBucketStore, SQLiteBucketStore,
+                            TokenBucketThrottle)
+
+
+class Command(BaseCommand):
+    help = ('Измеряет накладные расходы ограничителя запросов '
+            'TokenBucketThrottle на один запрос для каждого хранилища')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-n',
+            '--requests',
+            type=int,
+            default=10000,
+            help='Количество проверок на хранилище'
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=1000,
+            help='Количество различных username/email в запросах'
+        )
+
+    def measure(self, store, requests):
+        throttle = TokenBucketThrottle()
+        started = time.perf_counter()
+        for request in requests:
+            keys = throttle.get_keys(request, 'benchmark')
+            store.consume(keys, 1000000, 1000000.0)
+        return (time.perf_counter() - started) / len(requests) * 1e6
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        requests = []
+        for index in range(options['requests']):
+            user = index % options['users']
+            request = Request(
+                factory.post(
+                    '/api/v1/auth/signup/',
+                    {'username': f'user{user}',
+                     'email': f'user{user}@yamdb.fake'},
+                    format='json',
+                    REMOTE_ADDR=f'10.0.{user // 256 % 256}.{user % 256}'
+                ),
+                parsers=[JSONParser()]
+            )
+            request.data  # разбор тела не входит в замер
+            requests.append(request)
+
+        with tempfile.TemporaryDirectory() as directory:
+            stores = {
+                'LocalMemoryBucketStore': LocalMemoryBucketStore(),
+                'SQLiteBucketStore': SQLiteBucketStore(
+                    os.path.join(directory, 'throttle.sqlite3')),
+            }
+            for name, store in stores.items():
+                cost = self.measure(store, requests)
+                self.stdout.write(f'{name}: {cost:.1f} мкс на запрос')
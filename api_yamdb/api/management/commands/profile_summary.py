@@ -0,0 +1,67 @@
+import glob
+import json
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+def percentile(values, percent):
+    """Возвращает перцентиль отсортированного списка значений."""
+    return values[max(0, math.ceil(percent / 100 * len(values)) - 1)]
+
+
+def read_entries(path):
+    """Читает записи профилирования из лога и его ротированных копий."""
+    for name in sorted(glob.glob(f'{path}*')):
+        with open(name, encoding='utf-8') as log_file:
+            for line in log_file:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class Command(BaseCommand):
+    help = ('Сводка по логу профилирования запросов: '
+            'p50, p95 и p99 времени ответа по маршрутам')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-f',
+            '--file',
+            default=str(settings.REQUEST_PROFILING['LOG_FILE']),
+            help='Путь к JSONL-логу профилирования'
+        )
+        parser.add_argument(
+            '--field',
+            default='wall_ms',
+            choices=('wall_ms', 'sql_ms', 'serializer_ms', 'queries', 'size'),
+            help='Показатель для расчета перцентилей'
+        )
+
+    def handle(self, *args, **options):
+        groups = defaultdict(list)
+        queries = defaultdict(int)
+        counts = defaultdict(int)
+        for entry in read_entries(options['file']):
+            key = (entry['route'], entry['method'])
+            if entry.get(options['field']) is not None:
+                groups[key].append(entry[options['field']])
+            queries[key] += entry['queries']
+            counts[key] += 1
+        if not groups:
+            self.stdout.write(self.style.NOTICE('Лог профилирования пуст.'))
+            return
+        self.stdout.write(
+            f'{"route":<32} {"method":<7} {"count":>7} {"p50":>10} '
+            f'{"p95":>10} {"p99":>10} {"queries":>8}'
+        )
+        for (route, method), values in sorted(groups.items()):
+            values.sort()
+            self.stdout.write(
+                f'{route:<32} {method:<7} {len(values):>7} '
+                f'{percentile(values, 50):>10.2f} '
+                f'{percentile(values, 95):>10.2f} '
+                f'{percentile(values, 99):>10.2f} '
+                f'{queries[route, method] / counts[route, method]:>8.1f}'
+            )
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from api.title_documents import build_documents
+from reviews.models import Title, TitleDocument
+from constants import TITLE_DOCUMENTS_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = ('Пересобирает готовые JSON всех произведений, которые отдают '
+            'список и карточка произведения')
+
+    def handle(self, *args, **options):
+        TitleDocument.objects.filter(
+            title__deleted_at__isnull=False).delete()
+        title_ids = list(Title.objects.filter(
+            deleted_at__isnull=True).order_by('id').values_list(
+            'id', flat=True))
+        count = 0
+        for start in range(0, len(title_ids), TITLE_DOCUMENTS_BATCH_SIZE):
+            count += len(build_documents(
+                title_ids[start:start + TITLE_DOCUMENTS_BATCH_SIZE]))
+        self.stdout.write(self.style.SUCCESS(
+            f'Документы пересобраны для {count} произведений.'))
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from api.slow_queries import get_slow_query_store
+
+ORDERS = {
+    'total': 'total_ms',
+    'count': 'count',
+    'max': 'max_ms',
+}
+
+
+class Command(BaseCommand):
+    help = 'Выводит самые затратные запросы из журнала медленных запросов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-n',
+            '--limit',
+            type=int,
+            default=20,
+            help='Количество выводимых запросов'
+        )
+        parser.add_argument(
+            '-o',
+            '--order',
+            choices=ORDERS,
+            default='total',
+            help='Сортировка: суммарное время, количество или максимум'
+        )
+        parser.add_argument(
+            '--plan',
+            action='store_true',
+            help='Выводить план выполнения запроса'
+        )
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Очищает журнал медленных запросов'
+        )
+
+    def handle(self, *args, **options):
+        store = get_slow_query_store()
+        if options['clear']:
+            store.clear()
+            self.stdout.write(
+                self.style.SUCCESS('Журнал медленных запросов очищен.'))
+            return
+        rows = store.top(ORDERS[options['order']], options['limit'])
+        if not rows:
+            self.stdout.write(
+                self.style.NOTICE('Журнал медленных запросов пуст.'))
+            return
+        for (fingerprint, route, normalized, plan, count, total_ms,
+             max_ms) in rows:
+            self.stdout.write(self.style.SQL_KEYWORD(
+                f'[{fingerprint}] {route}: {count} раз, всего '
+                f'{total_ms:.1f} мс, среднее {total_ms / count:.1f} мс, '
+                f'максимум {max_ms:.1f} мс'
+            ))
+            self.stdout.write(f'  {normalized}')
+            if options['plan'] and plan:
+                for line in plan.splitlines():
+                    self.stdout.write(f'    {line}')
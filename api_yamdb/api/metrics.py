@@ -0,0 +1,346 @@
+import bisect
+import fcntl
+import glob
+import hmac
+import mmap
+import os
+import re
+import resource
+import struct
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+
+from constants import LATENCY_BUCKETS, METRICS_FILE_SIZE
+
+
+METRICS = {
+    'api_requests_total': (
+        'counter', 'Количество запросов по представлениям.'),
+    'api_request_duration_seconds': (
+        'histogram', 'Время ответа по представлениям.'),
+    'api_db_queries_total': (
+        'counter', 'Количество SQL-запросов по представлениям.'),
+    'api_db_query_duration_seconds_total': (
+        'counter', 'Суммарное время SQL-запросов по представлениям.'),
+    'api_signups_total': (
+        'counter', 'Количество регистраций через /auth/signup/.'),
+    'api_tokens_issued_total': (
+        'counter', 'Количество токенов, выданных через /auth/token/.'),
+    'api_emails_sent_total': (
+        'counter', 'Количество отправленных писем.'),
+}
+PID_FILE = re.compile(r'^metrics_(\d+)\.db$')
+ARCHIVE_FILE = 'metrics_archive.db'
+LOCK_FILE = 'metrics.lock'
+HEADER = struct.Struct('q')
+KEY_LENGTH = struct.Struct('i')
+VALUE = struct.Struct('d')
+
+
+class MmapValues:
+    """
+    Файл значений метрик одного процесса, отображенный в память.
+    Записи идут подряд: длина ключа, ключ, выравнивание до 8 байт,
+    значение double. В заголовке хранится занятый объем файла.
+    """
+
+    def __init__(self, path, size=METRICS_FILE_SIZE):
+        self.path = path
+        self.file = open(path, 'a+b')
+        if os.fstat(self.file.fileno()).st_size < size:
+            self.file.truncate(size)
+        self.capacity = os.fstat(self.file.fileno()).st_size
+        self.mmap = mmap.mmap(self.file.fileno(), self.capacity)
+        self.used = HEADER.unpack_from(self.mmap, 0)[0] or HEADER.size
+        self.positions = {
+            key: position for key, position, _ in
+            iterate_entries(self.mmap, self.used)
+        }
+        self.lock = threading.Lock()
+
+    def allocate(self, key):
+        encoded = key.encode()
+        value_position = self.used + KEY_LENGTH.size + len(encoded)
+        value_position += -value_position % VALUE.size
+        end = value_position + VALUE.size
+        if end > self.capacity:
+            self.capacity = max(self.capacity * 2, end)
+            self.file.truncate(self.capacity)
+            self.mmap.close()
+            self.mmap = mmap.mmap(self.file.fileno(), self.capacity)
+        VALUE.pack_into(self.mmap, value_position, 0.0)
+        self.mmap[self.used + KEY_LENGTH.size:
+                  self.used + KEY_LENGTH.size + len(encoded)] = encoded
+        KEY_LENGTH.pack_into(self.mmap, self.used, len(encoded))
+        self.used = end
+        HEADER.pack_into(self.mmap, 0, self.used)
+        self.positions[key] = value_position
+        return value_position
+
+    def add(self, key, amount=1.0):
+        self.add_many([(key, amount)])
+
+    def add_many(self, items):
+        """Прибавляет значения к отсчетам items под одной блокировкой."""
+        with self.lock:
+            for key, amount in items:
+                position = self.positions.get(key)
+                if position is None:
+                    position = self.allocate(key)
+                value = VALUE.unpack_from(self.mmap, position)[0]
+                VALUE.pack_into(self.mmap, position, value + amount)
+
+    def close(self):
+        self.mmap.close()
+        self.file.close()
+
+
+def iterate_entries(buffer, used):
+    """Перебирает записи файла значений: ключ, позиция, значение."""
+    position = HEADER.size
+    while position < used:
+        length = KEY_LENGTH.unpack_from(buffer, position)[0]
+        key = bytes(
+            buffer[position + KEY_LENGTH.size:
+                   position + KEY_LENGTH.size + length]
+        ).decode()
+        value_position = position + KEY_LENGTH.size + length
+        value_position += -value_position % VALUE.size
+        yield key, value_position, VALUE.unpack_from(buffer, value_position)[0]
+        position = value_position + VALUE.size
+
+
+def read_values(path):
+    """Читает отсчеты файла значений: список пар ключ, значение."""
+    with open(path, 'rb') as metrics_file:
+        buffer = metrics_file.read()
+    if len(buffer) < HEADER.size:
+        return []
+    used = HEADER.unpack_from(buffer, 0)[0]
+    return [(key, value) for key, _, value in iterate_entries(buffer, used)]
+
+
+def from_dead_process(path):
+    """Проверяет, что файл значений принадлежит завершенному процессу."""
+    match = PID_FILE.match(os.path.basename(path))
+    if match is None:
+        return False
+    try:
+        os.kill(int(match.group(1)), 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+@contextmanager
+def directory_lock(shared=False):
+    """
+    Блокировка каталога метрик между процессами: перенос файлов берет ее
+    монопольно, чтение метрик — совместно.
+    """
+    path = os.path.join(settings.METRICS_DIR, LOCK_FILE)
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+
+
+def merge_dead_files():
+    """
+    Переносит значения завершившихся процессов в общий файл
+    ARCHIVE_FILE и удаляет их файлы, чтобы перезапуски процессов
+    не оставляли в каталоге файлы по мегабайту.
+    """
+    with directory_lock():
+        dead = [
+            path for path in
+            glob.glob(os.path.join(settings.METRICS_DIR, 'metrics_*.db'))
+            if from_dead_process(path)
+        ]
+        if not dead:
+            return
+        archive = MmapValues(
+            os.path.join(settings.METRICS_DIR, ARCHIVE_FILE))
+        try:
+            for path in dead:
+                archive.add_many(read_values(path))
+                os.remove(path)
+        finally:
+            archive.close()
+
+
+_values = None
+_values_pid = None
+_request_keys = {}
+
+
+def get_values():
+    """
+    Возвращает файл значений текущего процесса. При создании файла
+    переносятся значения завершившихся процессов.
+    """
+    global _values, _values_pid
+    if _values_pid != os.getpid():
+        os.makedirs(settings.METRICS_DIR, exist_ok=True)
+        merge_dead_files()
+        _values = MmapValues(
+            os.path.join(settings.METRICS_DIR, f'metrics_{os.getpid()}.db'))
+        _values_pid = os.getpid()
+    return _values
+
+
+@receiver(setting_changed)
+def reset_values(setting, **kwargs):
+    global _values, _values_pid
+    if setting == 'METRICS_DIR':
+        _values = _values_pid = None
+
+
+def sample(name, **labels):
+    """Формирует имя отсчета в формате Prometheus."""
+    if not labels:
+        return name
+    pairs = ','.join(f'{label}="{value}"' for label, value in labels.items())
+    return f'{name}{{{pairs}}}'
+
+
+def increment(name, amount=1.0, **labels):
+    get_values().add(sample(name, **labels), amount)
+
+
+def request_keys(view, method, status):
+    """
+    Имена отсчетов запроса: счетчик запросов, корзины гистограммы от
+    меньшей к +Inf, сумма и количество, SQL-запросы и их время. Имена
+    формируются один раз для представления, метода и статуса.
+    """
+    keys = _request_keys.get((view, method, status))
+    if keys is None:
+        labels = {'view': view, 'method': method}
+        keys = _request_keys[view, method, status] = (
+            sample('api_requests_total', status=status, **labels),
+            [sample('api_request_duration_seconds_bucket', le=bucket,
+                    **labels) for bucket in LATENCY_BUCKETS + ('+Inf',)],
+            sample('api_request_duration_seconds_sum', **labels),
+            sample('api_request_duration_seconds_count', **labels),
+            sample('api_db_queries_total', **labels),
+            sample('api_db_query_duration_seconds_total', **labels),
+        )
+    return keys
+
+
+def observe_request(view, method, status, duration, queries, sql_time):
+    """Учитывает запрос в счетчиках и гистограмме времени ответа."""
+    total, buckets, duration_sum, count, queries_total, sql_total = (
+        request_keys(view, method, status))
+    first = bisect.bisect_left(LATENCY_BUCKETS, duration)
+    get_values().add_many([
+        (total, 1.0),
+        *((bucket, 1.0) for bucket in buckets[first:]),
+        (duration_sum, duration),
+        (count, 1.0),
+        (queries_total, queries),
+        (sql_total, sql_time),
+    ])
+
+
+def view_name(request):
+    """Возвращает имя класса представления, обработавшего запрос."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    view = getattr(match.func, 'cls', None) or getattr(
+        match.func, 'view_class', None)
+    return view.__name__ if view else match.func.__name__
+
+
+def collect():
+    """Суммирует значения метрик из файлов всех процессов."""
+    totals = defaultdict(float)
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    with directory_lock(shared=True):
+        for path in glob.glob(
+                os.path.join(settings.METRICS_DIR, 'metrics_*.db')):
+            for key, value in read_values(path):
+                totals[key] += value
+    return totals
+
+
+def resident_memory():
+    """Возвращает текущий RSS процесса в байтах."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def histogram_keys(name, totals):
+    """
+    Отсчеты гистограммы name по наборам меток: корзины от меньшей
+    к +Inf, как в request_keys, затем сумма и количество. Корзины без
+    отсчетов выводятся с нулем.
+    """
+    for key in sorted(totals):
+        if key.split('{')[0] != f'{name}_count':
+            continue
+        labels = key[len(f'{name}_count'):]
+        for bucket in LATENCY_BUCKETS + ('+Inf',):
+            pairs = ','.join(filter(None, (f'le="{bucket}"', labels[1:-1])))
+            yield f'{name}_bucket{{{pairs}}}'
+        yield f'{name}_sum{labels}'
+        yield key
+
+
+def render():
+    """Возвращает все метрики в текстовом формате Prometheus."""
+    totals = collect()
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        if kind == 'histogram':
+            keys = list(histogram_keys(name, totals))
+        else:
+            keys = [key for key in sorted(totals)
+                    if key.split('{')[0] == name]
+        lines.extend(f'{key} {totals[key]!r}' for key in keys)
+    lines.append('# HELP process_resident_memory_bytes '
+                 'Резидентная память процесса, отдающего метрики.')
+    lines.append('# TYPE process_resident_memory_bytes gauge')
+    lines.append(f'process_resident_memory_bytes {resident_memory()}')
+    lines.append('# HELP process_max_resident_memory_bytes '
+                 'Пиковая резидентная память процесса.')
+    lines.append('# TYPE process_max_resident_memory_bytes gauge')
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    lines.append(f'process_max_resident_memory_bytes {max_rss}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_allowed(request):
+    """
+    Метрики доступны с адресов METRICS_ACCESS['ALLOWED_IPS'] или
+    с заголовком Authorization: Bearer <METRICS_ACCESS['TOKEN']>.
+    """
+    access = settings.METRICS_ACCESS
+    if access['TOKEN'] and hmac.compare_digest(
+            request.headers.get('Authorization', ''),
+            f'Bearer {access["TOKEN"]}'):
+        return True
+    return request.META.get('REMOTE_ADDR') in access['ALLOWED_IPS']
+
+
+def metrics_view(request):
+    """Отдает метрики всех процессов сервера для Prometheus."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render(),
+                        content_type='text/plain; version=0.0.4; '
+                                     'charset=utf-8')
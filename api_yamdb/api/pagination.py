@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+
+class FeedCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация лент пользователя: следующая страница выбирается
+    условием pub_date < курсора по индексу (author_id, pub_date), без
+    OFFSET и без подсчета записей.
+    """
+
+    ordering = '-pub_date'
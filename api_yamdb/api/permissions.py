@@ -17,6 +17,13 @@ class IsRoleAdminOnly(permissions.BasePermission):
         return request.user.is_admin
 
 
+class IsRoleModeratorOrAdmin(permissions.BasePermission):
+    message = 'Нет прав доступа.'
+
+    def has_permission(self, request, view):
+        return request.user.is_moderator or request.user.is_admin
+
+
 class IsOwnerAdminModeratorOrReadOnly(permissions.IsAuthenticatedOrReadOnly):
     message = 'Изменить контент может только автор, админ или модератор.'
 
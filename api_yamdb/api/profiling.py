@@ -0,0 +1,260 @@
+import cProfile
+import json
+import logging
+import os
+import pstats
+import random
+import time
+import uuid
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.serializers import BaseSerializer
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .metrics import observe_request, view_name
+from .permissions import IsRoleAdminOnly
+from constants import PROFILE_TOP_FUNCTIONS
+
+
+logger = logging.getLogger('api.profiling')
+current_stats = ContextVar('current_stats', default=None)
+
+
+class RequestStats:
+    """Счетчики стоимости одного запроса."""
+
+    __slots__ = ('queries', 'sql_time', 'serializer_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0.0
+        self.serializer_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обертка connection.execute_wrapper для учета SQL-запросов."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.sql_time += time.perf_counter() - started
+
+
+def route_name(request):
+    """
+    Возвращает имя маршрута запроса, например titles-list,
+    или шаблон пути для маршрутов без имени.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.url_name or match.route
+
+
+def instrument_serializers():
+    """Добавляет учет времени в BaseSerializer.data."""
+    original = BaseSerializer.data
+    if getattr(original.fget, 'instrumented', False):
+        return
+
+    def data(self):
+        stats = current_stats.get()
+        if stats is None:
+            return original.fget(self)
+        started = time.perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            stats.serializer_time += time.perf_counter() - started
+
+    data.instrumented = True
+    BaseSerializer.data = property(data)
+
+
+def server_timing(wall_time, stats):
+    return (f'app;dur={wall_time * 1000:.2f}, '
+            f'db;dur={stats.sql_time * 1000:.2f};'
+            f'desc="{stats.queries} queries", '
+            f'serializer;dur={stats.serializer_time * 1000:.2f}')
+
+
+class RequestProfilingMiddleware:
+    """
+    Middleware учета стоимости запросов: время ответа, количество и время
+    SQL-запросов, время сериализации и размер ответа.
+    Итоги отдаются в заголовке Server-Timing и в метрики api.metrics,
+    выборка запросов с долей REQUEST_PROFILING['SAMPLE_RATE'] пишется
+    в JSONL-лог api.profiling.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        instrument_serializers()
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(stats):
+                response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        wall_time = time.perf_counter() - started
+        response['Server-Timing'] = server_timing(wall_time, stats)
+        observe_request(view_name(request), request.method,
+                        response.status_code, wall_time,
+                        stats.queries, stats.sql_time)
+        sample_rate = settings.REQUEST_PROFILING['SAMPLE_RATE']
+        if sample_rate and random.random() < sample_rate:
+            self.log(request, response, wall_time, stats)
+        return response
+
+    def log(self, request, response, wall_time, stats):
+        logger.info(json.dumps({
+            'time': time.time(),
+            'route': route_name(request),
+            'method': request.method,
+            'status': response.status_code,
+            'wall_ms': round(wall_time * 1000, 3),
+            'queries': stats.queries,
+            'sql_ms': round(stats.sql_time * 1000, 3),
+            'serializer_ms': round(stats.serializer_time * 1000, 3),
+            'size': (None if response.streaming
+                     else len(response.content)),
+        }))
+
+
+class QueryLog:
+    """Обертка connection.execute_wrapper, сохраняющая все SQL-запросы."""
+
+    def __init__(self):
+        self.entries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.entries.append(
+                (sql, params, many, time.perf_counter() - started))
+
+
+def explain(sql, params):
+    """Возвращает план выполнения SELECT-запроса."""
+    prefix = ('EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite'
+              else 'EXPLAIN ')
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            return [str(row[-1]) for row in cursor.fetchall()]
+    except DatabaseError as error:
+        return [f'EXPLAIN недоступен: {error}']
+
+
+def top_functions(profiler, limit=PROFILE_TOP_FUNCTIONS):
+    """Возвращает функции с наибольшим накопленным временем."""
+    stats = pstats.Stats(profiler).sort_stats('cumulative')
+    functions = []
+    for function in stats.fcn_list[:limit]:
+        primitive_calls, calls, own_time, cumulative_time, _ = (
+            stats.stats[function])
+        functions.append({
+            'function': pstats.func_std_string(function),
+            'calls': calls,
+            'primitive_calls': primitive_calls,
+            'tottime_ms': round(own_time * 1000, 3),
+            'cumtime_ms': round(cumulative_time * 1000, 3),
+        })
+    return functions
+
+
+def is_admin_request(request):
+    """Проверяет JWT-токен запроса и роль администратора."""
+    drf_request = Request(request, authenticators=[JWTAuthentication()])
+    try:
+        return (drf_request.user.is_authenticated
+                and IsRoleAdminOnly().has_permission(drf_request, None))
+    except APIException:
+        return False
+
+
+class OnDemandProfilingMiddleware:
+    """
+    Профилирование отдельного запроса по заголовку X-Profile или
+    параметру ?profile=1. Доступно только администраторам: запрос
+    выполняется под cProfile, отчет с самыми затратными функциями и всеми
+    SQL-запросами с планами выполнения сохраняется в
+    REQUEST_PROFILING['PROFILE_DIR'], а в ответ добавляется ссылка на него.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def wants_profile(self, request):
+        return ('HTTP_X_PROFILE' in request.META
+                or ('profile=' in request.META.get('QUERY_STRING', '')
+                    and request.GET.get('profile') in ('1', 'true')))
+
+    def __call__(self, request):
+        if not self.wants_profile(request) or not is_admin_request(request):
+            return self.get_response(request)
+        queries = QueryLog()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        with connection.execute_wrapper(queries):
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        total_time = time.perf_counter() - started
+        profile_id = uuid.uuid4().hex
+        save_report(profile_id, {
+            'id': profile_id,
+            'method': request.method,
+            'path': request.get_full_path(),
+            'route': route_name(request),
+            'status': response.status_code,
+            'total_ms': round(total_time * 1000, 3),
+            'functions': top_functions(profiler),
+            'queries': [
+                {
+                    'sql': sql,
+                    'params': [str(param) for param in params or ()]
+                    if not many else None,
+                    'time_ms': round(duration * 1000, 3),
+                    'plan': (explain(sql, params)
+                             if not many and sql.lstrip().upper()
+                             .startswith('SELECT') else None),
+                }
+                for sql, params, many, duration in queries.entries
+            ],
+        })
+        response['X-Profile-Id'] = profile_id
+        response['X-Profile-Url'] = f'/api/v1/profiles/{profile_id}/'
+        return response
+
+
+def profile_path(profile_id):
+    return os.path.join(settings.REQUEST_PROFILING['PROFILE_DIR'],
+                        f'{profile_id}.json')
+
+
+def save_report(profile_id, report):
+    os.makedirs(settings.REQUEST_PROFILING['PROFILE_DIR'], exist_ok=True)
+    with open(profile_path(profile_id), 'w', encoding='utf-8') as report_file:
+        json.dump(report, report_file, ensure_ascii=False)
+
+
+def load_report(profile_id):
+    """Возвращает сохраненный отчет профилирования или None."""
+    try:
+        with open(profile_path(profile_id), encoding='utf-8') as report_file:
+            return json.load(report_file)
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,63 @@
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+from .profiling import QueryLog
+
+
+logger = logging.getLogger('api.query_budget')
+
+
+class QueryBudgetExceeded(Exception):
+    """Запрос к API выполнил больше SQL-запросов, чем задано бюджетом."""
+
+
+def budget_report(name, budget, entries):
+    lines = [f'{name}: {len(entries)} SQL-запросов при бюджете {budget}.']
+    lines.extend(f'  {sql}' for sql, *_ in entries)
+    return '\n'.join(lines)
+
+
+class QueryBudgetMixin:
+    """
+    Миксин бюджета SQL-запросов: query_budgets задает наибольшее
+    количество запросов для действий представления, например
+    {'list': 4, 'create': 6}, у APIView ключами служат методы.
+    Бюджет учитывает запрос аутентификации по JWT. Действия без
+    бюджета не проверяются.
+
+    Настройка QUERY_BUDGET_MODE: None отключает проверку, 'log' пишет
+    превышение в лог api.query_budget, 'raise' вызывает
+    QueryBudgetExceeded.
+    """
+
+    query_budgets = {}
+
+    def get_query_budget_key(self):
+        return getattr(self, 'action', None) or self.request.method.lower()
+
+    def get_query_budget_name(self, key):
+        prefix = getattr(self, 'basename', None) or type(self).__name__
+        return f'{prefix}-{key}'
+
+    def dispatch(self, request, *args, **kwargs):
+        mode = getattr(settings, 'QUERY_BUDGET_MODE', None)
+        if not mode or not self.query_budgets:
+            return super().dispatch(request, *args, **kwargs)
+        queries = QueryLog()
+        with connection.execute_wrapper(queries):
+            response = super().dispatch(request, *args, **kwargs)
+        self.check_query_budget(queries.entries, mode)
+        return response
+
+    def check_query_budget(self, entries, mode):
+        key = self.get_query_budget_key()
+        budget = self.query_budgets.get(key)
+        if budget is None or len(entries) <= budget:
+            return
+        report = budget_report(self.get_query_budget_name(key), budget,
+                               entries)
+        if mode == 'raise':
+            raise QueryBudgetExceeded(report)
+        logger.warning(report)
@@ -0,0 +1,88 @@
+from django.db.models import Avg, Q
+from rest_framework import serializers
+
+from reviews.models import Category, Genre, Title
+
+
+TITLE_VALUES = ('id', 'name', 'year', 'rating', 'description', 'category_id')
+REVIEW_VALUES = ('id', 'text', 'author__username', 'score', 'pub_date')
+COMMENT_VALUES = ('id', 'text', 'author__username', 'pub_date')
+# Средняя оценка без отзывов удаленных пользователей: они скрыты сразу,
+# а удаляются позже задачей отложенного удаления.
+RATING = Avg('reviews__score',
+             filter=Q(reviews__author__deleted_at__isnull=True))
+
+_datetime_field = serializers.DateTimeField()
+
+
+def represent_titles(rows):
+    """
+    Собирает представления произведений из строк .values()
+    в формате TitlesReadSerializer.
+    """
+    rows = list(rows)
+    title_ids = [row['id'] for row in rows]
+    category_ids = {row['category_id'] for row in rows} - {None}
+
+    categories = {
+        pk: {'name': name, 'slug': slug}
+        for pk, name, slug in Category.objects.filter(
+            id__in=category_ids).values_list('id', 'name', 'slug')
+    } if category_ids else {}
+
+    title_genres = {pk: [] for pk in title_ids}
+    links = list(
+        Title.genre.through.objects.filter(title_id__in=title_ids)
+        .order_by('title_id', 'genre_id')
+        .values_list('title_id', 'genre_id')
+    ) if title_ids else []
+    genres = {
+        pk: {'name': name, 'slug': slug}
+        for pk, name, slug in Genre.objects.filter(
+            id__in={genre_id for _, genre_id in links}
+        ).values_list('id', 'name', 'slug')
+    } if links else {}
+    for title_id, genre_id in links:
+        title_genres[title_id].append(dict(genres[genre_id]))
+
+    return [
+        {
+            'id': row['id'],
+            'name': row['name'],
+            'year': row['year'],
+            'rating': (None if row['rating'] is None
+                       else int(row['rating'])),
+            'description': row['description'],
+            'genre': title_genres[row['id']],
+            'category': (dict(categories[row['category_id']])
+                         if row['category_id'] is not None else None),
+        }
+        for row in rows
+    ]
+
+
+def represent_reviews(rows):
+    """Собирает представления отзывов в формате ReviewSerializer."""
+    return [
+        {
+            'id': row['id'],
+            'text': row['text'],
+            'author': row['author__username'],
+            'score': row['score'],
+            'pub_date': _datetime_field.to_representation(row['pub_date']),
+        }
+        for row in rows
+    ]
+
+
+def represent_comments(rows):
+    """Собирает представления комментариев в формате CommentSerializer."""
+    return [
+        {
+            'id': row['id'],
+            'text': row['text'],
+            'author': row['author__username'],
+            'pub_date': _datetime_field.to_representation(row['pub_date']),
+        }
+        for row in rows
+    ]
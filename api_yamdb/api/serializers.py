@@ -1,13 +1,23 @@
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection, transaction
+from django.db.models import Q, prefetch_related_objects
 from django.http import Http404
 from rest_framework import serializers
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
+from rest_framework.relations import MANY_RELATION_KWARGS
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.models import (SCORES, Category, Comment, Genre, Review,
+                            Title)
+from .facets import invalidate_facets
+from .representations import RATING, TITLE_VALUES, represent_titles
+from .slug_cache import invalidate_slugs, resolve_slugs
 from .utils import get_confirmation_code
-from constants import USERNAME_MAX_LENGTH, EMAIL_MAX_LENGTH
+from constants import (USERNAME_MAX_LENGTH, EMAIL_MAX_LENGTH,
+                       SLUG_MAX_LENGTH, BULK_CREATE_MAX_ITEMS,
+                       BATCH_MAX_OPERATIONS)
 
 
 User = get_user_model()
@@ -30,7 +40,7 @@ class UserSerializerMixin(serializers.ModelSerializer, UserValideteMeMixin):
 
     def create(self, validated_data):
         user = User(**validated_data)
-        if not User.objects.filter(username=user.username).exists():
+        if not User._base_manager.filter(username=user.username).exists():
             password = get_confirmation_code(user.username)
             user.set_password(password)
             user.save()
@@ -40,17 +50,16 @@ class UserSerializerMixin(serializers.ModelSerializer, UserValideteMeMixin):
         same_username, same_email = False, False
         username, email = data.get('username'), data.get('email')
 
-        is_username = User.objects.filter(username=username).exists()
-        is_email = User.objects.filter(email=email).exists()
-        is_username_and_email = User.objects.filter(username=username,
-                                                    email=email).exists()
+        taken = set(User._base_manager.filter(
+            Q(username=username) | Q(email=email)
+        ).values_list('username', 'email'))
+        is_username = any(name == username for name, _ in taken)
+        is_email = any(address == email for _, address in taken)
+        is_username_and_email = (username, email) in taken
 
         request = self.context.get('request')
         if request.method == 'PATCH':
-            username = request.path.split('/')[-2]
-            if username == 'me':
-                username = request.user.username
-            email = get_object_or_404(User, username=username).email
+            username, email = self.instance.username, self.instance.email
             if data.get('username') and username == data.get('username'):
                 same_username = True
             if data.get('email') and email == data.get('email'):
@@ -178,37 +187,89 @@ class TitlesReadSerializer(serializers.ModelSerializer):
                   'description', 'genre', 'category')
 
 
+class TitlesHistogramSerializer(TitlesReadSerializer):
+    """Сериализатор модели Titles с распределением оценок."""
+
+    score_histogram = serializers.SerializerMethodField()
+
+    class Meta(TitlesReadSerializer.Meta):
+        fields = TitlesReadSerializer.Meta.fields + ('score_histogram',)
+
+    def get_score_histogram(self, obj):
+        try:
+            return obj.score_histogram.as_dict()
+        except ObjectDoesNotExist:
+            return dict.fromkeys(SCORES, 0)
+
+
+class ManySlugRelatedField(serializers.ManyRelatedField):
+    """ManyRelatedField, находящий все объекты по slug за один раз."""
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        return self.child_relation.resolve(data)
+
+
+class CachedSlugRelatedField(serializers.SlugRelatedField):
+    """
+    SlugRelatedField для жанров и категорий: объекты находятся по slug
+    в словаре slug_cache без запросов к базе.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(slug_field='slug', **kwargs)
+
+    def resolve(self, slugs):
+        if not all(isinstance(slug, str) for slug in slugs):
+            self.fail('invalid')
+        found = resolve_slugs(self.get_queryset().model, slugs)
+        for slug in slugs:
+            if slug not in found:
+                self.fail('does_not_exist', slug_name=self.slug_field,
+                          value=slug)
+        return [found[slug] for slug in slugs]
+
+    def to_internal_value(self, data):
+        return self.resolve([data])[0]
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return ManySlugRelatedField(**list_kwargs)
+
+
 class TitlesEditorSerializer(serializers.ModelSerializer):
     """Сериализатор модели Titles."""
 
-    genre = serializers.SlugRelatedField(
-        slug_field='slug',
+    genre = CachedSlugRelatedField(
         queryset=Genre.objects.all(),
         many=True,
     )
-    category = serializers.SlugRelatedField(
-        queryset=Category.objects.all(),
-        slug_field='slug'
-    )
+    category = CachedSlugRelatedField(queryset=Category.objects.all())
     description = serializers.CharField(default='')
     rating = serializers.IntegerField(read_only=True, default=None)
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = ('deleted_at',)
 
     def to_representation(self, data):
+        prefetch_related_objects([data], 'genre')
         representation = super().to_representation(data)
-        for key, value in representation.items():
-            if key == 'genre':
-                genre = [Genre.objects.filter(
-                    slug=slug).values('name', 'slug').first()
-                    for slug in value]
-                representation['genre'] = genre
-            if key == 'category':
-                category = Category.objects.filter(
-                    slug=value).values('name', 'slug').first()
-                representation['category'] = category
+        representation['genre'] = [
+            {'name': genre.name, 'slug': genre.slug}
+            for genre in data.genre.all()
+        ]
+        category = data.category
+        representation['category'] = (
+            {'name': category.name, 'slug': category.slug}
+            if category else None)
         return representation
 
     def validate_genre(self, genre):
@@ -217,6 +278,13 @@ class TitlesEditorSerializer(serializers.ModelSerializer):
                 'Поле genre не может быть пустым.')
         return genre
 
+    def create(self, validated_data):
+        """У нового произведения нет жанров: add без чтения текущих."""
+        genres = validated_data.pop('genre')
+        title = Title.objects.create(**validated_data)
+        title.genre.add(*genres)
+        return title
+
 
 class ReviewSerializer(serializers.ModelSerializer):
     """Сериализатор модели Review."""
@@ -225,11 +293,9 @@ class ReviewSerializer(serializers.ModelSerializer):
 
     def validate(self, data):
         request = self.context['request']
-        title_id = self.context['view'].kwargs.get('title_id')
-        title = get_object_or_404(Title, pk=title_id)
         if request.method == 'POST':
-            if Review.objects.filter(
-                    title=title, author=request.user).exists():
+            if Review.objects.filter(title=self.context['title'],
+                                     author=request.user).exists():
                 raise ValidationError('Можно оставлять только один '
                                       'отзыв на произведение.')
         return data
@@ -250,3 +316,204 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ("id", "text", "author", "pub_date")
+
+
+class TitleShortSerializer(serializers.ModelSerializer):
+    """Краткое представление произведения в лентах пользователя."""
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name')
+
+
+class UserReviewSerializer(ReviewSerializer):
+    """Отзыв в ленте пользователя вместе с произведением."""
+
+    title = TitleShortSerializer(read_only=True)
+
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('title',)
+
+
+class UserCommentSerializer(CommentSerializer):
+    """Комментарий в ленте пользователя вместе с отзывом и произведением."""
+
+    title = TitleShortSerializer(source='review.title', read_only=True)
+
+    class Meta(CommentSerializer.Meta):
+        fields = CommentSerializer.Meta.fields + ('review', 'title')
+        read_only_fields = ('review',)
+
+
+class BatchOperationSerializer(serializers.Serializer):
+    """Сериализатор операции пакетного запроса."""
+
+    method = serializers.ChoiceField(
+        choices=('GET', 'POST', 'PATCH', 'PUT', 'DELETE'))
+    path = serializers.CharField()
+    body = serializers.JSONField(required=False)
+
+
+class BatchSerializer(serializers.Serializer):
+    """Сериализатор пакетного запроса."""
+
+    operations = serializers.ListField(
+        child=BatchOperationSerializer(), allow_empty=False,
+        max_length=BATCH_MAX_OPERATIONS)
+    parallel = serializers.BooleanField(default=False)
+
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """
+    ListSerializer для массового создания объектов.
+    Ошибки собираются по каждому элементу, корректные элементы
+    сохраняются одним bulk_create в одной транзакции.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list) or not data:
+            raise ValidationError(
+                {'non_field_errors': ['Ожидается непустой список объектов.']})
+        if len(data) > BULK_CREATE_MAX_ITEMS:
+            raise ValidationError({'non_field_errors': [
+                f'Можно создать не более {BULK_CREATE_MAX_ITEMS} '
+                'объектов за один запрос.']})
+        items, self.item_errors = [], []
+        for item in data:
+            try:
+                items.append(self.child.run_validation(item))
+                self.item_errors.append(None)
+            except ValidationError as error:
+                items.append(None)
+                self.item_errors.append(error.detail)
+        self.child.validate_batch(items, self.item_errors)
+        return [item for item in items if item is not None]
+
+    def create(self, validated_data):
+        with transaction.atomic():
+            return self.child.bulk_create(validated_data)
+
+    def get_results(self):
+        """Возвращает результат создания по каждому элементу запроса."""
+        created = iter(self.child.bulk_representation(self.instance))
+        return [
+            {'status': 201, 'data': next(created)} if errors is None
+            else {'status': 400, 'errors': errors}
+            for errors in self.item_errors
+        ]
+
+
+class SlugBulkCreateSerializer(serializers.ModelSerializer):
+    """Базовый сериализатор массового создания категорий и жанров."""
+
+    slug = serializers.SlugField(max_length=SLUG_MAX_LENGTH)
+
+    class Meta:
+        abstract = True
+
+    def validate_batch(self, items, errors):
+        model = self.Meta.model
+        taken = set(model.objects.filter(
+            slug__in=[item['slug'] for item in items if item]
+        ).values_list('slug', flat=True))
+        for index, item in enumerate(items):
+            if item is None:
+                continue
+            if item['slug'] in taken:
+                errors[index] = {'slug': [f'Slug \'{item["slug"]}\' занят.']}
+                items[index] = None
+            taken.add(item['slug'])
+
+    def bulk_create(self, items):
+        model = self.Meta.model
+        invalidate_slugs(model)
+        return model.objects.bulk_create(model(**item) for item in items)
+
+    def bulk_representation(self, instances):
+        return [self.to_representation(instance) for instance in instances]
+
+
+class CategoryBulkCreateSerializer(SlugBulkCreateSerializer):
+    """Сериализатор массового создания категорий."""
+
+    class Meta:
+        model = Category
+        fields = ('name', 'slug')
+        list_serializer_class = BulkCreateListSerializer
+
+
+class GenreBulkCreateSerializer(SlugBulkCreateSerializer):
+    """Сериализатор массового создания жанров."""
+
+    class Meta:
+        model = Genre
+        fields = ('name', 'slug')
+        list_serializer_class = BulkCreateListSerializer
+
+
+class TitlesBulkCreateSerializer(serializers.ModelSerializer):
+    """Сериализатор массового создания произведений."""
+
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+    description = serializers.CharField(default='')
+
+    class Meta:
+        model = Title
+        fields = ('name', 'year', 'description', 'genre', 'category')
+        list_serializer_class = BulkCreateListSerializer
+
+    def validate_genre(self, genre):
+        if not genre:
+            raise serializers.ValidationError(
+                'Поле genre не может быть пустым.')
+        return genre
+
+    def validate_batch(self, items, errors):
+        valid = [item for item in items if item]
+        genres = {slug: genre.id for slug, genre in resolve_slugs(
+            Genre, {slug for item in valid for slug in item['genre']}
+        ).items()}
+        categories = {slug: category.id for slug, category in resolve_slugs(
+            Category, {item['category'] for item in valid}).items()}
+        for index, item in enumerate(items):
+            if item is None:
+                continue
+            item_errors = {}
+            missing = [slug for slug in item['genre'] if slug not in genres]
+            if missing:
+                item_errors['genre'] = [
+                    f'Жанр со slug={slug} не существует.' for slug in missing]
+            if item['category'] not in categories:
+                item_errors['category'] = [
+                    f'Категория со slug={item["category"]} не существует.']
+            if item_errors:
+                errors[index] = item_errors
+                items[index] = None
+                continue
+            item['genre'] = [genres[slug] for slug in item['genre']]
+            item['category_id'] = categories[item.pop('category')]
+
+    def bulk_create(self, items):
+        genres = [item.pop('genre') for item in items]
+        titles = [Title(**item) for item in items]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Title.objects.bulk_create(titles)
+        else:
+            for title in titles:
+                title.save()
+        Title.genre.through.objects.bulk_create(
+            Title.genre.through(title_id=title.pk, genre_id=genre_id)
+            for title, genre_ids in zip(titles, genres)
+            for genre_id in dict.fromkeys(genre_ids)
+        )
+        invalidate_facets()
+        return titles
+
+    def bulk_representation(self, instances):
+        rows = represent_titles(
+            Title.objects.filter(pk__in=[title.pk for title in instances])
+            .annotate(rating=RATING).values(*TITLE_VALUES)
+        )
+        by_id = {row['id']: row for row in rows}
+        return [by_id[title.pk] for title in instances]
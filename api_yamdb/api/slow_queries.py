@@ -0,0 +1,158 @@
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connection
+from django.dispatch import receiver
+
+from .profiling import explain, route_name
+
+
+NORMALIZE_PATTERNS = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def normalize(sql):
+    """Приводит SQL к виду без литералов и параметров."""
+    for pattern, replacement in NORMALIZE_PATTERNS:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def fingerprint(normalized):
+    return hashlib.sha1(normalized.encode()).hexdigest()[:16]
+
+
+class SlowQueryStore:
+    """
+    Журнал медленных запросов в файле SQLite, общий для процессов сервера.
+    Одинаковые запросы одного маршрута сводятся в одну запись со
+    счетчиками, план выполнения сохраняется при первой записи.
+    """
+
+    def __init__(self, path, timeout=5):
+        self.path = str(path)
+        self.timeout = timeout
+        self.local = threading.local()
+        self.known = set()
+
+    @property
+    def connection(self):
+        db = getattr(self.local, 'connection', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=self.timeout,
+                                 isolation_level=None)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS slow_query ('
+                'fingerprint TEXT, route TEXT, normalized TEXT, '
+                'sample TEXT, plan TEXT, count INTEGER, total_ms REAL, '
+                'max_ms REAL, first_seen REAL, last_seen REAL, '
+                'PRIMARY KEY (fingerprint, route))'
+            )
+            self.local.connection = db
+        return db
+
+    def record(self, route, sql, duration_ms, plan=None):
+        normalized = normalize(sql)
+        key = (fingerprint(normalized), route)
+        now = time.time()
+        self.connection.execute(
+            'INSERT INTO slow_query VALUES (?, ?, ?, ?, ?, 1, ?, ?, ?, ?) '
+            'ON CONFLICT (fingerprint, route) DO UPDATE SET '
+            'count = count + 1, total_ms = total_ms + excluded.total_ms, '
+            'max_ms = max(max_ms, excluded.max_ms), '
+            'last_seen = excluded.last_seen, '
+            'plan = coalesce(plan, excluded.plan)',
+            (*key, normalized, sql, plan, duration_ms, duration_ms, now, now)
+        )
+        self.known.add(key)
+
+    def is_known(self, route, sql):
+        return (fingerprint(normalize(sql)), route) in self.known
+
+    def top(self, order='total_ms', limit=20):
+        return self.connection.execute(
+            'SELECT fingerprint, route, normalized, plan, count, total_ms, '
+            f'max_ms FROM slow_query ORDER BY {order} DESC LIMIT ?',
+            (limit,)
+        ).fetchall()
+
+    def clear(self):
+        self.connection.execute('DELETE FROM slow_query')
+        self.known.clear()
+
+
+_store = None
+
+
+def get_slow_query_store():
+    global _store
+    if _store is None:
+        _store = SlowQueryStore(settings.SLOW_QUERY_LOG['PATH'])
+    return _store
+
+
+@receiver(setting_changed)
+def reset_slow_query_store(setting, **kwargs):
+    global _store
+    if setting == 'SLOW_QUERY_LOG':
+        _store = None
+
+
+class SlowQueryCollector:
+    """
+    Обертка connection.execute_wrapper: запоминает запросы дольше
+    порога threshold секунд.
+    """
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.slow = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            if duration >= self.threshold:
+                self.slow.append((sql, params, many, duration))
+
+
+class SlowQueryLogMiddleware:
+    """
+    Middleware журнала медленных запросов: SQL дольше
+    SLOW_QUERY_LOG['THRESHOLD_MS'] записывается с маршрутом API
+    и планом выполнения.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = SlowQueryCollector(
+            settings.SLOW_QUERY_LOG['THRESHOLD_MS'] / 1000)
+        with connection.execute_wrapper(collector):
+            response = self.get_response(request)
+        if collector.slow:
+            self.record(route_name(request), collector.slow)
+        return response
+
+    def record(self, route, queries):
+        store = get_slow_query_store()
+        for sql, params, many, duration in queries:
+            plan = None
+            if (not many and not store.is_known(route, sql)
+                    and sql.lstrip().upper().startswith('SELECT')):
+                plan = '\n'.join(explain(sql, params))
+            store.record(route, sql, round(duration * 1000, 3), plan)
@@ -0,0 +1,83 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+
+from reviews.models import CacheVersion, Category, Genre
+
+
+_maps = {}
+
+
+def version_name(model):
+    return f'slug-cache:{model._meta.label_lower}'
+
+
+def get_slug_map(model):
+    """
+    Возвращает словарь slug -> (id, name) модели из памяти процесса.
+    Словарь загружается заново, когда меняется общая для процессов
+    версия в таблице CacheVersion.
+    """
+    version = CacheVersion.current(version_name(model))
+    cached = _maps.get(model)
+    if cached is None or cached[0] != version:
+        cached = _maps[model] = (version, {
+            slug: (pk, name)
+            for pk, slug, name in model.objects.values_list(
+                'id', 'slug', 'name')
+        })
+    return cached[1]
+
+
+def resolve_slugs(model, slugs):
+    """
+    Возвращает словарь slug -> объект модели для найденных slug.
+    Объекты собираются из словаря в памяти, в базу запрос идет только
+    за slug, которых в словаре нет.
+    """
+    slug_map = get_slug_map(model)
+    found = {
+        slug: model.from_db(DEFAULT_DB_ALIAS, ('id', 'name', 'slug'),
+                            (slug_map[slug][0], slug_map[slug][1], slug))
+        for slug in slugs if slug in slug_map
+    }
+    missing = set(slugs) - set(found)
+    if missing:
+        found.update(
+            (instance.slug, instance)
+            for instance in model.objects.filter(slug__in=missing))
+    return found
+
+
+def invalidate_slugs(model):
+    """Меняет версию словаря модели после фиксации транзакции."""
+    CacheVersion.bump_on_commit(version_name(model))
+
+
+@contextmanager
+def checked_slugs():
+    """
+    Выполняет запись в транзакции. Жанр или категория, удаленные другим
+    процессом после проверки slug, нарушают внешний ключ при фиксации:
+    такая запись возвращает ошибку валидации, а словари перезагружаются.
+    """
+    try:
+        with transaction.atomic():
+            yield
+    except IntegrityError:
+        _maps.clear()
+        raise ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+            'Жанр или категория изменились во время запроса, '
+            'повторите его.']})
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def reset_slug_map(sender, **kwargs):
+    invalidate_slugs(sender)
@@ -0,0 +1,184 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+from constants import THROTTLE_PRUNE_EVERY, THROTTLE_LOCAL_MAX_KEYS
+
+
+def refill(tokens, updated, now, capacity, refill_rate):
+    """Возвращает количество жетонов в корзине на момент now."""
+    return min(capacity, tokens + (now - updated) * refill_rate)
+
+
+class LocalMemoryBucketStore:
+    """
+    Хранилище корзин жетонов в памяти одного процесса. Корзин не больше
+    max_keys: сверх этого удаляются давно не использованные.
+    """
+
+    def __init__(self, max_keys=THROTTLE_LOCAL_MAX_KEYS):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, keys, capacity, refill_rate, now=None):
+        """
+        Списывает по жетону из каждой корзины keys.
+        Возвращает 0, если запрос разрешен, иначе время ожидания в секундах.
+        """
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            levels = [
+                refill(*self.buckets.get(key, (capacity, now)), now,
+                       capacity, refill_rate)
+                for key in keys
+            ]
+            lowest = min(levels)
+            if lowest < 1:
+                for key in keys:
+                    if key in self.buckets:
+                        self.buckets.move_to_end(key)
+                return (1 - lowest) / refill_rate
+            for key, tokens in zip(keys, levels):
+                self.buckets[key] = (tokens - 1, now)
+                self.buckets.move_to_end(key)
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return 0
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+
+class SQLiteBucketStore:
+    """
+    Хранилище корзин жетонов в файле SQLite, общее для всех процессов
+    сервера. Чтение и запись корзин идут в одной транзакции BEGIN IMMEDIATE.
+    """
+
+    def __init__(self, path, timeout=5):
+        self.path = str(path)
+        self.timeout = timeout
+        self.local = threading.local()
+        self.calls = 0
+
+    @property
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS bucket ('
+                'key TEXT PRIMARY KEY, tokens REAL, updated REAL)'
+            )
+            self.local.connection = connection
+        return connection
+
+    def consume(self, keys, capacity, refill_rate, now=None):
+        now = time.time() if now is None else now
+        connection = self.connection
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            wait = self.consume_locked(connection, keys, capacity,
+                                       refill_rate, now)
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return wait
+
+    def consume_locked(self, connection, keys, capacity, refill_rate, now):
+        stored = {
+            key: (tokens, updated) for key, tokens, updated in
+            connection.execute(
+                'SELECT key, tokens, updated FROM bucket WHERE key IN '
+                f'({", ".join("?" * len(keys))})', keys
+            )
+        }
+        levels = [
+            refill(*stored.get(key, (capacity, now)), now,
+                   capacity, refill_rate)
+            for key in keys
+        ]
+        lowest = min(levels)
+        if lowest < 1:
+            return (1 - lowest) / refill_rate
+        connection.executemany(
+            'INSERT OR REPLACE INTO bucket (key, tokens, updated) '
+            'VALUES (?, ?, ?)',
+            [(key, tokens - 1, now) for key, tokens in zip(keys, levels)]
+        )
+        self.calls += 1
+        if self.calls % THROTTLE_PRUNE_EVERY == 0:
+            connection.execute(
+                'DELETE FROM bucket WHERE updated < ?',
+                (now - capacity / refill_rate,)
+            )
+        return 0
+
+    def clear(self):
+        self.connection.execute('DELETE FROM bucket')
+
+
+_store = None
+
+
+def get_bucket_store():
+    """Возвращает хранилище корзин из настройки TOKEN_BUCKET_STORE."""
+    global _store
+    if _store is None:
+        config = settings.TOKEN_BUCKET_STORE
+        _store = import_string(config['BACKEND'])(
+            **config.get('OPTIONS', {}))
+    return _store
+
+
+@receiver(setting_changed)
+def reset_bucket_store(setting, **kwargs):
+    global _store
+    if setting == 'TOKEN_BUCKET_STORE':
+        _store = None
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов по алгоритму корзины жетонов.
+    Скорость задается для view.throttle_scope в DEFAULT_THROTTLE_RATES,
+    корзины ведутся по IP и по полям запроса из identity_fields.
+    """
+
+    identity_fields = ('username', 'email')
+
+    def get_keys(self, request, scope):
+        keys = [f'{scope}:ip:{self.get_ident(request)}']
+        data = request.data
+        for field in self.identity_fields:
+            value = data.get(field) if hasattr(data, 'get') else None
+            if isinstance(value, str) and value:
+                keys.append(f'{scope}:{field}:{value.lower()}')
+        return keys
+
+    def allow_request(self, request, view):
+        self.wait_time = 0
+        scope = getattr(view, 'throttle_scope', None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return True
+        capacity, duration = SimpleRateThrottle.parse_rate(None, rate)
+        self.wait_time = get_bucket_store().consume(
+            self.get_keys(request, scope), capacity, capacity / duration)
+        return not self.wait_time
+
+    def wait(self):
+        return self.wait_time
@@ -0,0 +1,118 @@
+import threading
+
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from rest_framework.renderers import JSONRenderer
+
+from reviews.models import Category, Genre, Review, Title, TitleDocument
+from reviews.signals import review_deletion_muted
+from .representations import RATING
+from .serializers import TitlesReadSerializer
+from constants import TITLE_DOCUMENTS_BATCH_SIZE
+
+
+_pending = threading.local()
+_renderer = JSONRenderer()
+
+
+def render_documents(title_ids):
+    """JSON произведений title_ids в формате TitlesReadSerializer."""
+    titles = Title.objects.filter(
+        id__in=title_ids, deleted_at__isnull=True
+    ).select_related('category').prefetch_related('genre').annotate(
+        rating=RATING)
+    return [
+        TitleDocument(title_id=title.id, body=_renderer.render(
+            TitlesReadSerializer(title).data).decode())
+        for title in titles
+    ]
+
+
+def build_documents(title_ids):
+    """
+    Пересобирает документы произведений title_ids пакетами: пакет
+    записывается одним upsert, документы удаленных произведений
+    удаляются. Возвращает новые документы.
+    """
+    title_ids = list(title_ids)
+    documents = []
+    for start in range(0, len(title_ids), TITLE_DOCUMENTS_BATCH_SIZE):
+        batch = title_ids[start:start + TITLE_DOCUMENTS_BATCH_SIZE]
+        batch_documents = render_documents(batch)
+        rendered = {document.title_id for document in batch_documents}
+        gone = [pk for pk in batch if pk not in rendered]
+        if gone:
+            TitleDocument.objects.filter(title_id__in=gone).delete()
+        if batch_documents:
+            TitleDocument.upsert(batch_documents)
+        documents += batch_documents
+    return documents
+
+
+def flush():
+    title_ids = getattr(_pending, 'title_ids', None)
+    _pending.title_ids = set()
+    if title_ids:
+        build_documents(sorted(title_ids))
+
+
+def refresh_documents(title_ids):
+    """
+    Пересобирает документы после фиксации транзакции. Произведения
+    из нескольких изменений одной транзакции пересобираются один раз.
+    """
+    if not hasattr(_pending, 'title_ids'):
+        _pending.title_ids = set()
+    _pending.title_ids.update(title_ids)
+    transaction.on_commit(flush)
+
+
+def related_titles(instance):
+    if isinstance(instance, Genre):
+        return Title.genre.through.objects.filter(
+            genre=instance).values_list('title_id', flat=True)
+    return instance.titles.values_list('id', flat=True)
+
+
+@receiver(post_save, sender=Title)
+def refresh_title(sender, instance, **kwargs):
+    refresh_documents([instance.pk])
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def refresh_genres(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Жанры произведения изменены через ORM: set, add, remove или clear
+    со стороны произведения или жанра, например в админке или shell.
+    Произведения очищаемого жанра выбираются до очистки.
+    """
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            refresh_documents([instance.pk])
+    elif action in ('post_add', 'post_remove'):
+        refresh_documents(pk_set)
+    elif action == 'pre_clear':
+        refresh_documents(related_titles(instance))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def refresh_rating(sender, instance, **kwargs):
+    if not review_deletion_muted():
+        refresh_documents([instance.title_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+def refresh_renamed(sender, instance, created, **kwargs):
+    """Переименование жанра или категории меняет все их произведения."""
+    if not created:
+        refresh_documents(related_titles(instance))
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def refresh_deleted(sender, instance, **kwargs):
+    refresh_documents(related_titles(instance))
@@ -1,10 +1,13 @@
-from django.urls import include, path
+from django.urls import include, path, re_path
 from rest_framework import routers
 
+from reviews.models import Comment, Review
 from .views import (CategoryViewSet, GenreViewSet,
                     TitleViewSet, UserSignupTokenDetail,
                     UserViewSet, UserMeDetail, CommentViewSet,
-                    ReviewViewSet)
+                    ReviewViewSet, FeedbackExportView, ProfileReportView,
+                    UserReviewViewSet, UserCommentViewSet,
+                    RecentActivityView, BatchView)
 
 
 router_v1 = routers.DefaultRouter()
@@ -12,6 +15,10 @@ router_v1.register('categories', CategoryViewSet, basename='categories')
 router_v1.register('genres', GenreViewSet, basename='genres')
 router_v1.register('titles', TitleViewSet, basename='titles')
 router_v1.register('users', UserViewSet, basename='users')
+router_v1.register(r'users/(?P<username>[^/.]+)/reviews',
+                   UserReviewViewSet, basename='user-reviews')
+router_v1.register(r'users/(?P<username>[^/.]+)/comments',
+                   UserCommentViewSet, basename='user-comments')
 router_v1.register(r'titles/(?P<title_id>\d+)/reviews',
                    ReviewViewSet, basename='reviews')
 router_v1.register((r'titles/(?P<title_id>\d+)/reviews'
@@ -24,5 +31,14 @@ urlpatterns = [
     path('v1/', include('djoser.urls')),
     path('v1/', include('djoser.urls.jwt')),
     path('v1/auth/signup/', UserSignupTokenDetail.as_view()),
-    path('v1/auth/token/', UserSignupTokenDetail.as_view())
+    path('v1/auth/token/', UserSignupTokenDetail.as_view()),
+    path('v1/moderation/recent/', RecentActivityView.as_view()),
+    path('v1/batch/', BatchView.as_view()),
+    path('v1/export/reviews/',
+         FeedbackExportView.as_view(model=Review, title_lookup='title_id')),
+    path('v1/export/comments/',
+         FeedbackExportView.as_view(model=Comment,
+                                    title_lookup='review__title_id')),
+    re_path(r'^v1/profiles/(?P<profile_id>[0-9a-f]{32})/$',
+            ProfileReportView.as_view()),
 ]
@@ -2,6 +2,8 @@ import hashlib
 
 from django.core.mail import send_mail
 
+from .metrics import increment
+
 
 def get_confirmation_code(username: str) -> str:
     """Возвращает код подтверждения."""
@@ -13,10 +15,11 @@ def get_confirmation_code(username: str) -> str:
 def send_confirmation_email(username: str, email: str) -> None:
     """Отправляет письмо с кодом подтверждения на указанный email."""
     code = get_confirmation_code(username)
-    send_mail(
+    sent = send_mail(
         subject='Регистрация на YaMDb',
         message=f'Ваш код подтверждения: {code}',
         from_email='YaMDb',
         recipient_list=[f'{email}'],
         fail_silently=True
     )
+    increment('api_emails_sent_total', sent)
@@ -1,35 +1,74 @@
+import json
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import Avg
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
-from rest_framework import (generics, permissions, status,
+from rest_framework import (generics, mixins, permissions, status,
                             viewsets, filters)
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+from rest_framework.views import APIView
 from django_filters.rest_framework import DjangoFilterBackend
 
-from reviews.models import Category, Genre, Title, Review
+from reviews.deletion import schedule_deletion
+from reviews.exports import (CONTENT_TYPES, EXPORT_FORMATS, stream_export,
+                             visible_feedback)
+from reviews.models import (Category, Comment, Genre, Title, TitleDocument,
+                            Review)
 from .permissions import (IsAdminOrReadOnly, IsRoleAdminOnly,
+                          IsRoleModeratorOrAdmin,
                           IsOwnerAdminModeratorOrReadOnly)
 from .serializers import (UserSerializer,
                           UserMeUpdateSerializer,
                           UserSignupSerializer,
                           UserTokenSerializer,
                           CategorySerializer,
+                          CategoryBulkCreateSerializer,
                           GenreSerializer,
+                          GenreBulkCreateSerializer,
                           TitlesEditorSerializer,
+                          TitlesBulkCreateSerializer,
                           TitlesReadSerializer,
+                          TitlesHistogramSerializer,
                           ReviewSerializer,
-                          CommentSerializer)
+                          CommentSerializer,
+                          UserReviewSerializer,
+                          UserCommentSerializer,
+                          BatchSerializer)
+from .activity import (decode_cursor, encode_cursor, recent_activity,
+                       represent)
+from .batch import run_batch
+from .facets import FACETS, get_facets, invalidate_facets
+from .metrics import increment
+from .pagination import FeedCursorPagination
+from .profiling import load_report
+from .query_budget import QueryBudgetMixin
+from .slug_cache import checked_slugs
+from .throttling import TokenBucketThrottle
+from .title_documents import render_documents
+from .representations import (COMMENT_VALUES, RATING, REVIEW_VALUES,
+                              TITLE_VALUES, represent_comments,
+                              represent_reviews, represent_titles)
 from .utils import send_confirmation_email
-from .viewsets import GetPostDeleteViewSet
+from .viewsets import (BulkCreateMixin, FastListMixin, GetPostDeleteViewSet,
+                       SparseFieldsMixin)
 from .filters import TitleFilter
+from constants import ACTIVITY_MAX_LIMIT, TITLE_BATCH_MAX_IDS
 
 
 User = get_user_model()
 
 
-class UserViewSet(viewsets.ModelViewSet):
-    """Класс представления для модели User."""
+class UserViewSet(SparseFieldsMixin, QueryBudgetMixin, viewsets.ModelViewSet):
+    """
+    Класс представления для модели User. Удаленный пользователь сразу
+    скрывается, его отзывы и комментарии удаляются в фоне.
+    """
 
     queryset = User.objects.all()
     serializer_class = UserSerializer
@@ -39,11 +78,19 @@ class UserViewSet(viewsets.ModelViewSet):
     search_fields = ('username',)
     lookup_field = 'username'
     http_method_names = ('get', 'post', 'patch', 'delete')
+    query_budgets = {'list': 3, 'retrieve': 2, 'create': 5,
+                     'partial_update': 5, 'destroy': 8}
+
+    def perform_destroy(self, instance):
+        schedule_deletion(instance)
 
 
-class UserMeDetail(generics.RetrieveAPIView, generics.UpdateAPIView):
+class UserMeDetail(QueryBudgetMixin, generics.RetrieveAPIView,
+                   generics.UpdateAPIView):
     """Класс представления для модели User ресурса /me."""
 
+    query_budgets = {'get': 2, 'put': 5, 'patch': 5}
+
     def get_serializer_class(self):
         if self.request.method == 'GET':
             return UserSerializer
@@ -54,11 +101,19 @@ class UserMeDetail(generics.RetrieveAPIView, generics.UpdateAPIView):
         return get_object_or_404(User, username=username)
 
 
-class UserSignupTokenDetail(generics.CreateAPIView):
+class UserSignupTokenDetail(QueryBudgetMixin, generics.CreateAPIView):
     """Класс представления для модели User ресурсов /signup и /token."""
 
     queryset = User.objects.all()
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (TokenBucketThrottle,)
+    query_budgets = {'post': 4}
+
+    @property
+    def throttle_scope(self):
+        if 'token' in self.request.path:
+            return 'auth_token'
+        return 'auth_signup'
 
     def get_serializer_class(self):
         if 'token' in self.request.path:
@@ -70,9 +125,11 @@ class UserSignupTokenDetail(generics.CreateAPIView):
         serializer.is_valid(raise_exception=True)
         if 'token' in self.request.path:
             data = {'token': serializer.data['token']}
+            increment('api_tokens_issued_total')
         else:
             self.perform_create(serializer)
             data = serializer.data
+            increment('api_signups_total')
         return Response(data=data, status=status.HTTP_200_OK)
 
     def perform_create(self, serializer):
@@ -86,6 +143,11 @@ class CategoryViewSet(GetPostDeleteViewSet):
 
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    bulk_create_serializer_class = CategoryBulkCreateSerializer
+    # destroy: аутентификация, категория, произведения для SET NULL,
+    # BEGIN, их id, UPDATE, DELETE, документы (3), версия словаря.
+    query_budgets = {'list': 3, 'create': 5, 'bulk_create': 5,
+                     'destroy': 11}
 
 
 class GenreViewSet(GetPostDeleteViewSet):
@@ -93,55 +155,437 @@ class GenreViewSet(GetPostDeleteViewSet):
 
     queryset = Genre.objects.all().order_by('id')
     serializer_class = GenreSerializer
-
-
-class TitleViewSet(viewsets.ModelViewSet):
-    """Класс представления для модели Title."""
-
-    queryset = Title.objects.annotate(rating=Avg('reviews__score'))
+    bulk_create_serializer_class = GenreBulkCreateSerializer
+    # destroy: аутентификация, жанр, BEGIN, id произведений, DELETE связей
+    # и жанра, документы (3), версия словаря.
+    query_budgets = {'list': 3, 'create': 5, 'bulk_create': 5,
+                     'destroy': 10}
+
+
+class TitleViewSet(BulkCreateMixin, FastListMixin, SparseFieldsMixin,
+                   QueryBudgetMixin, viewsets.ModelViewSet):
+    """
+    Класс представления для модели Title. Удаленное произведение сразу
+    скрывается, его отзывы и комментарии удаляются в фоне.
+    """
+
+    queryset = Title.objects.filter(deleted_at__isnull=True).select_related(
+        'category').prefetch_related('genre').annotate(
+        rating=RATING).order_by('id')
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
     http_method_names = ('get', 'post', 'patch', 'delete')
+    fast_list_values = TITLE_VALUES
+    fast_list_representation = staticmethod(represent_titles)
+    bulk_create_serializer_class = TitlesBulkCreateSerializer
+    sparse_columns = {'rating': (), 'genre': (), 'score_histogram': (),
+                      'category': ('category__name', 'category__slug')}
+    sparse_prefetch = ('genre',)
+    # Документ произведения пересобирается в запросе тремя запросами:
+    # произведение с рейтингом, жанры и INSERT ... ON CONFLICT.
+    # list: аутентификация, COUNT, id страницы, документы и сборка
+    # недостающих (3); retrieve: аутентификация, документ и сборка (3);
+    # create: аутентификация, BEGIN, версии словарей slug (2) и их
+    # перезагрузка (2), INSERT, проверка и INSERT жанров, жанры ответа,
+    # версия фасетов, документ (3); partial_update: то же с UPDATE вместо
+    # INSERT, плюс произведение, текущие жанры и DELETE лишних жанров;
+    # destroy: аутентификация, произведение, BEGIN, UPDATE, DELETE
+    # документа, задача удаления, версия фасетов; facets: аутентификация,
+    # версия и счетчики одним UNION ALL.
+    query_budgets = {'list': 7, 'retrieve': 5, 'create': 14,
+                     'partial_update': 17, 'destroy': 7, 'facets': 3}
+
+    def get_queryset(self):
+        fields = self.get_sparse_fields()
+        if self.action == 'destroy' or (
+                fields is not None and 'rating' not in fields):
+            return Title.objects.filter(
+                deleted_at__isnull=True).order_by('id')
+        if self.action == 'partial_update':
+            return super().get_queryset().prefetch_related(None)
+        return super().get_queryset()
 
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH'):
             return TitlesEditorSerializer
+        if (self.action == 'retrieve'
+                and self.request.query_params.get('score_histogram')
+                in ('1', 'true')):
+            return TitlesHistogramSerializer
         return TitlesReadSerializer
 
+    def use_documents(self):
+        return (settings.TITLE_DOCUMENTS
+                and self.request.accepted_renderer.format == 'json'
+                and self.get_sparse_fields() is None)
+
+    def get_documents(self, title_ids):
+        """
+        Словарь id -> готовый JSON произведений title_ids. Недостающие
+        документы собираются и сохраняются, для несуществующих
+        произведений ничего не записывается.
+        """
+        documents = dict(TitleDocument.objects.filter(
+            title_id__in=title_ids).values_list('title_id', 'body'))
+        missing = [pk for pk in title_ids if pk not in documents]
+        built = render_documents(missing) if missing else []
+        if built:
+            TitleDocument.upsert(built, replace=False)
+            documents.update((document.title_id, document.body)
+                             for document in built)
+        return documents
+
+    def get_batch_ids(self):
+        """Id из параметра ?ids= без повторов или None."""
+        ids = self.request.query_params.get('ids')
+        if ids is None:
+            return None
+        ids = [pk.strip() for pk in ids.split(',') if pk.strip()]
+        if not all(pk.isdigit() for pk in ids):
+            raise ValidationError({'ids': ['Ожидаются целые id через '
+                                           'запятую.']})
+        ids = list(dict.fromkeys(int(pk) for pk in ids))
+        if len(ids) > TITLE_BATCH_MAX_IDS:
+            raise ValidationError({'ids': [
+                f'Не больше {TITLE_BATCH_MAX_IDS} id в запросе.']})
+        return ids
+
+    def batch(self, title_ids):
+        """
+        Произведения title_ids в порядке запроса без пагинации и других
+        фильтров. Ненайденные id перечисляются в missing.
+        """
+        if self.use_documents():
+            documents = self.get_documents(title_ids)
+            missing = [pk for pk in title_ids if pk not in documents]
+            results = ','.join(documents[pk] for pk in title_ids
+                               if pk in documents)
+            return HttpResponse(
+                f'{{"results":[{results}],'
+                f'"missing":{json.dumps(missing)}}}',
+                content_type='application/json'
+            )
+        titles = {title.pk: title for title in self.prune_queryset(
+            self.get_queryset().filter(pk__in=title_ids))}
+        serializer = self.get_serializer(
+            [titles[pk] for pk in title_ids if pk in titles], many=True)
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in title_ids if pk not in titles],
+        })
+
+    def list(self, request, *args, **kwargs):
+        title_ids = self.get_batch_ids()
+        if title_ids is not None:
+            return self.batch(title_ids)
+        if not self.use_documents():
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(
+            Title.objects.filter(deleted_at__isnull=True).order_by('id'))
+        title_ids = queryset.values_list('id', flat=True)
+        page = self.paginate_queryset(title_ids)
+        title_ids = list(title_ids) if page is None else page
+        documents = self.get_documents(title_ids)
+        results = '[' + ','.join(documents[pk] for pk in title_ids
+                                 if pk in documents) + ']'
+        if page is not None:
+            results = (
+                f'{{"count":{self.paginator.count},'
+                f'"next":{json.dumps(self.paginator.get_next_link())},'
+                f'"previous":'
+                f'{json.dumps(self.paginator.get_previous_link())},'
+                f'"results":{results}}}'
+            )
+        return HttpResponse(results, content_type='application/json')
+
+    def retrieve(self, request, *args, **kwargs):
+        if (not self.use_documents()
+                or self.get_serializer_class() is not TitlesReadSerializer):
+            return super().retrieve(request, *args, **kwargs)
+        pk = kwargs['pk']
+        documents = self.get_documents([int(pk)]) if pk.isdigit() else {}
+        if not documents:
+            raise Http404
+        return HttpResponse(documents[int(pk)],
+                            content_type='application/json')
 
-class ReviewViewSet(viewsets.ModelViewSet):
+    def create(self, request, *args, **kwargs):
+        with checked_slugs():
+            return super().create(request, *args, **kwargs)
+
+    def update(self, request, *args, **kwargs):
+        with checked_slugs():
+            return super().update(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        super().perform_create(serializer)
+        invalidate_facets()
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        invalidate_facets()
+
+    def perform_destroy(self, instance):
+        schedule_deletion(instance)
+        invalidate_facets()
+
+    @action(detail=False)
+    def facets(self, request):
+        """Количество произведений по жанрам, категориям и годам."""
+        facets = request.query_params.get('facets')
+        facets = facets.split(',') if facets else list(FACETS)
+        unknown = [facet for facet in facets if facet not in FACETS]
+        if unknown:
+            names = ', '.join(FACETS)
+            return Response(
+                {'facets': [f'Допустимые фасеты: {names}.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        params = {key: request.query_params[key]
+                  for key in self.filterset_class.base_filters
+                  if key in request.query_params}
+        return Response(get_facets(params, facets))
+
+
+class ReviewViewSet(FastListMixin, SparseFieldsMixin, QueryBudgetMixin,
+                    viewsets.ModelViewSet):
     """Класс представления для модели Review."""
 
     serializer_class = ReviewSerializer
     permission_classes = (IsOwnerAdminModeratorOrReadOnly,)
     http_method_names = ('get', 'post', 'patch', 'delete')
+    fast_list_values = REVIEW_VALUES
+    fast_list_representation = staticmethod(represent_reviews)
+    sparse_columns = {'author': ('author__username',)}
+    sparse_required_columns = ('title',)
+    # create: аутентификация, произведение, проверка повторного отзыва,
+    # BEGIN, INSERT, гистограмма, документ (3); partial_update: отзыв
+    # вместо проверки и UPDATE вместо INSERT; destroy: отзыв, DELETE
+    # комментариев и отзыва вместо проверки и INSERT.
+    query_budgets = {'list': 4, 'retrieve': 3, 'create': 9,
+                     'partial_update': 9, 'destroy': 10}
+
+    def get_title(self):
+        return get_object_or_404(Title, pk=self.kwargs.get('title_id'),
+                                 deleted_at__isnull=True)
 
     def get_queryset(self):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return self.get_title().reviews.filter(
+            author__deleted_at__isnull=True).select_related('author')
+
+    def get_serializer_context(self):
+        """Произведение нового отзыва загружается один раз на запрос."""
+        context = super().get_serializer_context()
+        if self.action == 'create':
+            context['title'] = self.get_title()
+        return context
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, pk=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=self.request.user,
+                        title=serializer.context['title'])
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(FastListMixin, SparseFieldsMixin, QueryBudgetMixin,
+                     viewsets.ModelViewSet):
     """Класс представления для модели Comment."""
 
     serializer_class = CommentSerializer
     permission_classes = (IsOwnerAdminModeratorOrReadOnly,)
     http_method_names = ('get', 'post', 'patch', 'delete')
+    fast_list_values = COMMENT_VALUES
+    fast_list_representation = staticmethod(represent_comments)
+    sparse_columns = {'author': ('author__username',)}
+    sparse_required_columns = ('review',)
+    query_budgets = {'list': 4, 'retrieve': 3, 'create': 3,
+                     'partial_update': 4, 'destroy': 4}
 
     def get_queryset(self):
         review = get_object_or_404(
             Review, pk=self.kwargs.get("review_id"),
-            title__pk=self.kwargs.get('title_id')
+            title__pk=self.kwargs.get('title_id'),
+            title__deleted_at__isnull=True,
+            author__deleted_at__isnull=True
         )
-        return review.comments.all()
+        return review.comments.filter(
+            author__deleted_at__isnull=True).select_related('author')
 
     def perform_create(self, serializer):
         title_id = self.kwargs.get('title_id')
         review_id = self.kwargs.get('review_id')
-        review = get_object_or_404(Review, id=review_id, title=title_id)
+        review = get_object_or_404(Review, id=review_id, title=title_id,
+                                   title__deleted_at__isnull=True,
+                                   author__deleted_at__isnull=True)
         serializer.save(author=self.request.user, review=review)
+
+
+class UserFeedViewSet(SparseFieldsMixin, QueryBudgetMixin,
+                      mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Базовый класс лент отзывов и комментариев пользователя. Страница
+    ленты вместе с автором и произведением выбирается одним запросом,
+    существование пользователя проверяется только для пустой ленты.
+    """
+
+    permission_classes = (permissions.AllowAny,)
+    pagination_class = FeedCursorPagination
+    sparse_columns = {'author': ('author__username',),
+                      'title': ('title__name',)}
+    sparse_required_columns = ('pub_date',)
+    query_budgets = {'list': 3}
+    model = None
+    feed_related = ()
+    title_lookup = None
+
+    def get_queryset(self):
+        return self.model.objects.filter(
+            author__username=self.kwargs['username'],
+            author__deleted_at__isnull=True,
+            **{f'{self.title_lookup}__deleted_at__isnull': True}
+        ).select_related('author', *self.feed_related)
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if (not response.data['results']
+                and not User.objects.filter(
+                    username=self.kwargs['username']).exists()):
+            raise Http404
+        return response
+
+
+class UserReviewViewSet(UserFeedViewSet):
+    """Класс представления ленты отзывов пользователя."""
+
+    model = Review
+    serializer_class = UserReviewSerializer
+    feed_related = ('title',)
+    title_lookup = 'title'
+
+
+class UserCommentViewSet(UserFeedViewSet):
+    """Класс представления ленты комментариев пользователя."""
+
+    model = Comment
+    serializer_class = UserCommentSerializer
+    feed_related = ('review__title',)
+    title_lookup = 'review__title'
+    sparse_columns = {'author': ('author__username',),
+                      'title': ('review__title__name',)}
+
+
+class RecentActivityView(QueryBudgetMixin, APIView):
+    """
+    Класс представления ленты последних отзывов и комментариев по всем
+    произведениям для модераторов. Параметр cursor листает ленту в
+    прошлое, since отдает записи новее курсора для опроса.
+    """
+
+    permission_classes = (permissions.IsAuthenticated,
+                          IsRoleModeratorOrAdmin)
+    query_budgets = {'get': 3}
+
+    def get_limit(self):
+        limit = self.request.query_params.get('limit')
+        if limit is None:
+            return api_settings.PAGE_SIZE
+        if not limit.isdigit() or not 0 < int(limit) <= ACTIVITY_MAX_LIMIT:
+            raise ValidationError(
+                {'limit': [f'Ожидается число от 1 до {ACTIVITY_MAX_LIMIT}.']})
+        return int(limit)
+
+    def get(self, request):
+        limit = self.get_limit()
+        before = request.query_params.get('cursor')
+        since = request.query_params.get('since')
+        if before and since:
+            return Response(
+                {'since': ['Нельзя передавать cursor и since вместе.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        page, more = recent_activity(
+            limit,
+            before=decode_cursor(before, 'cursor') if before else None,
+            since=decode_cursor(since, 'since') if since else None
+        )
+        url = remove_query_param(request.build_absolute_uri(), 'cursor')
+        next_url = None
+        if more and since:
+            next_url = replace_query_param(url, 'since',
+                                           encode_cursor(page[0]))
+        elif more:
+            next_url = replace_query_param(url, 'cursor',
+                                           encode_cursor(page[-1]))
+        return Response({
+            'next': next_url,
+            'since': encode_cursor(page[0]) if page else since,
+            'results': [represent(item) for item in page],
+        })
+
+
+class FeedbackExportView(QueryBudgetMixin, APIView):
+    """
+    Класс представления для потоковой выгрузки отзывов и комментариев
+    в NDJSON или csv.
+    """
+
+    permission_classes = (permissions.IsAuthenticated, IsRoleAdminOnly,)
+    model = None
+    title_lookup = None
+    query_budgets = {'get': 2}
+
+    def get(self, request, *args, **kwargs):
+        output = request.query_params.get('output', 'ndjson')
+        if output not in EXPORT_FORMATS:
+            formats = ', '.join(EXPORT_FORMATS)
+            return Response(
+                {'output': [f'Допустимые форматы: {formats}.']},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = visible_feedback(self.model)
+        title_id = request.query_params.get('title')
+        if title_id is not None:
+            if not title_id.isdigit():
+                return Response(
+                    {'title': ['Ожидается id произведения.']},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(**{self.title_lookup: title_id})
+        response = StreamingHttpResponse(
+            stream_export(queryset, output),
+            content_type=CONTENT_TYPES[output]
+        )
+        name = self.model._meta.model_name
+        response['Content-Disposition'] = (
+            f'attachment; filename="{name}.{output}"')
+        return response
+
+
+class BatchView(APIView):
+    """
+    Класс представления пакетных запросов: выполняет список операций
+    {method, path, body} представлениями API внутри одного запроса
+    и возвращает их статусы и ответы по порядку. Права проверяются
+    в каждой операции, бюджеты SQL-запросов тоже.
+    """
+
+    permission_classes = (permissions.AllowAny,)
+
+    def post(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return Response({'results': run_batch(
+            request, serializer.validated_data['operations'],
+            serializer.validated_data['parallel'])})
+
+
+class ProfileReportView(QueryBudgetMixin, APIView):
+    """Класс представления для отчетов профилирования запросов."""
+
+    permission_classes = (permissions.IsAuthenticated, IsRoleAdminOnly,)
+    query_budgets = {'get': 1}
+
+    def get(self, request, profile_id):
+        report = load_report(profile_id)
+        if report is None:
+            return Response(status=status.HTTP_404_NOT_FOUND)
+        return Response(report)
@@ -1,9 +1,127 @@
-from rest_framework import filters, mixins, viewsets
+from django.conf import settings
+from rest_framework import filters, mixins, status, viewsets
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
 
 from .permissions import IsAdminOrReadOnly
+from .query_budget import QueryBudgetMixin
+
+
+class BulkCreateMixin:
+    """
+    Миксин массового создания: POST со списком объектов в теле
+    обрабатывается bulk_create_serializer_class за один запрос.
+    Бюджет SQL-запросов такого POST задается ключом bulk_create.
+    """
+
+    bulk_create_serializer_class = None
+
+    def get_query_budget_key(self):
+        key = super().get_query_budget_key()
+        if key == 'create' and isinstance(self.request.data, list):
+            return 'bulk_create'
+        return key
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+        serializer = self.bulk_create_serializer_class(
+            data=request.data, many=True,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        results = serializer.get_results()
+        if not serializer.instance:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif len(serializer.instance) < len(results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED
+        return Response(results, status=response_status)
+
+
+class SparseFieldsMixin:
+    """
+    Миксин выборочных полей: параметры ?fields= и ?omit= GET-запроса
+    оставляют в ответе только перечисленные поля сериализатора. Запрос
+    к базе выбирает через .only() только их столбцы: по умолчанию столбец
+    с именем поля, иначе столбцы из sparse_columns. Таблицы из столбцов
+    вида relation__column присоединяются через select_related, связи из
+    sparse_prefetch загружаются, только если их поле запрошено.
+    """
+
+    sparse_columns = {}
+    sparse_prefetch = ()
+    sparse_required_columns = ()
+
+    def get_sparse_fields(self):
+        """Запрошенные поля ответа или None, если ответ полный."""
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = self.parse_sparse_fields()
+        return self._sparse_fields
+
+    def parse_sparse_fields(self):
+        params = self.request.query_params
+        if self.request.method != 'GET' or not (
+                params.get('fields') or params.get('omit')):
+            return None
+        available = self.get_serializer_class().Meta.fields
+        requested = {
+            param: [name for name in params.get(param, '').split(',')
+                    if name]
+            for param in ('fields', 'omit')
+        }
+        errors = {}
+        for param, names in requested.items():
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                errors[param] = [f'Неизвестные поля: {", ".join(unknown)}.']
+        if errors:
+            raise ValidationError(errors)
+        selected = requested['fields'] or available
+        return [name for name in available
+                if name in selected and name not in requested['omit']]
+
+    def filter_queryset(self, queryset):
+        return self.prune_queryset(super().filter_queryset(queryset))
+
+    def prune_queryset(self, queryset):
+        """Оставляет в запросе только столбцы и связи выбранных полей."""
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return queryset
+        columns = list(self.sparse_required_columns)
+        for name in fields:
+            columns += self.sparse_columns.get(name, (name,))
+        related = {column.rsplit('__', 1)[0]
+                   for column in columns if '__' in column}
+        for path in related:
+            parts = path.split('__')
+            columns += ['__'.join(parts[:end])
+                        for end in range(1, len(parts) + 1)]
+        prefetch = [name for name in self.sparse_prefetch if name in fields]
+        queryset = queryset.select_related(None).prefetch_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset.only(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in set(target.fields) - set(fields):
+                target.fields.pop(name)
+        return serializer
 
 
 class GetPostDeleteViewSet(
+    BulkCreateMixin,
+    SparseFieldsMixin,
+    QueryBudgetMixin,
     mixins.CreateModelMixin,
     mixins.DestroyModelMixin,
     mixins.ListModelMixin,
@@ -15,3 +133,27 @@ class GetPostDeleteViewSet(
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+
+
+class FastListMixin:
+    """
+    Миксин быстрого списка: при включенной настройке FAST_LIST_ENDPOINTS
+    ответ собирается из .values() без создания сериализаторов.
+    Используется вместе с SparseFieldsMixin: выборочные поля отдает
+    обычный список.
+    """
+
+    fast_list_values = ()
+    fast_list_representation = None
+
+    def list(self, request, *args, **kwargs):
+        if (not getattr(settings, 'FAST_LIST_ENDPOINTS', False)
+                or self.get_sparse_fields() is not None):
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values(*self.fast_list_values)
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(
+                self.fast_list_representation(page))
+        return Response(self.fast_list_representation(rows))
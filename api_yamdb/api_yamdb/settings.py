@@ -27,6 +27,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.profiling.RequestProfilingMiddleware',
+    'api.profiling.OnDemandProfilingMiddleware',
+    'api.slow_queries.SlowQueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -113,9 +116,86 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
+    'NUM_PROXIES': 0,
+    'DEFAULT_THROTTLE_RATES': {
+        'auth_signup': '30/min',
+        'auth_token': '30/min',
+    },
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=10),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+
+FAST_LIST_ENDPOINTS = False
+
+TITLE_DOCUMENTS = True
+
+BATCH_REQUEST_WORKERS = 4
+
+QUERY_BUDGET_MODE = None
+
+DEFERRED_DELETION = {
+    'BATCH_SIZE': 1000,
+    'BACKGROUND': True,
+    'CLAIM_TIMEOUT': 300,
+}
+
+TITLE_FACETS = {
+    'CACHE': 'default',
+    'TIMEOUT': 300,
+}
+
+EVENT_STREAM = {
+    'HEARTBEAT': 15,
+    'QUEUE_SIZE': 100,
+    'BACKLOG': 100,
+}
+
+TOKEN_BUCKET_STORE = {
+    'BACKEND': 'api.throttling.LocalMemoryBucketStore',
+}
+
+REQUEST_PROFILING = {
+    'SAMPLE_RATE': 0.0,
+    'LOG_FILE': BASE_DIR / 'request_profile.jsonl',
+    'PROFILE_DIR': BASE_DIR / 'profiles',
+}
+
+METRICS_DIR = BASE_DIR / 'metrics'
+
+METRICS_ACCESS = {
+    'ALLOWED_IPS': ('127.0.0.1', '::1'),
+    'TOKEN': None,
+}
+
+SLOW_QUERY_LOG = {
+    'THRESHOLD_MS': 100,
+    'PATH': BASE_DIR / 'slow_queries.sqlite3',
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'jsonl': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'request_profile': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': REQUEST_PROFILING['LOG_FILE'],
+            'maxBytes': 10 * 1024 * 1024,
+            'backupCount': 5,
+            'delay': True,
+            'formatter': 'jsonl',
+        },
+    },
+    'loggers': {
+        'api.profiling': {
+            'handlers': ['request_profile'],
+            'level': 'INFO',
+            'propagate': False,
+        },
+    },
+}
@@ -11,3 +11,18 @@ USERNAME_MAX_LENGTH: Final = 150
 EMAIL_MAX_LENGTH: Final = 254
 MIN_SCORE: Final = 1
 MAX_SCORE: Final = 10
+BULK_CREATE_MAX_ITEMS: Final = 1000
+EXPORT_CHUNK_SIZE: Final = 2000
+THROTTLE_PRUNE_EVERY: Final = 1000
+THROTTLE_LOCAL_MAX_KEYS: Final = 100000
+LATENCY_BUCKETS: Final = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                          1.0, 2.5, 5.0, 10.0)
+METRICS_FILE_SIZE: Final = 1024 * 1024
+PROFILE_TOP_FUNCTIONS: Final = 40
+MAX_UNICODE_CHAR: Final = '\U0010ffff'
+ACTIVITY_MAX_LIMIT: Final = 100
+TITLE_DOCUMENTS_BATCH_SIZE: Final = 500
+TITLE_BATCH_MAX_IDS: Final = 500
+BATCH_MAX_OPERATIONS: Final = 20
+CACHE_VERSIONS: Final = ('slug-cache:reviews.category',
+                         'slug-cache:reviews.genre', 'title-facets')
@@ -1,20 +1,62 @@
 from django.contrib import admin
+from django.contrib.admin.views.main import PAGE_VAR
 
-from .models import Category, Genre, Title
+from .models import Category, Comment, Genre, Review, Title
+from .paginators import CountlessPaginator
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Список объектов без подсчета строк таблицы: страницы листаются
+    вперед по одной, ссылки «Показать все» нет.
+    """
+
+    paginator = CountlessPaginator
+    show_full_result_count = False
+    list_max_show_all = 0
+
+    def get_paginator(self, request, queryset, per_page, orphans=0,
+                      allow_empty_first_page=True):
+        try:
+            number = int(request.GET.get(PAGE_VAR, 1))
+        except ValueError:
+            number = 1
+        return self.paginator(queryset, per_page, orphans,
+                              allow_empty_first_page, number=max(number, 1))
 
 
 @admin.register(Title)
-class TitleAdmin(admin.ModelAdmin):
-    list_display = ('pk', 'name', 'year', 'description')
-    search_fields = ('text',)
+class TitleAdmin(LargeTableAdmin):
+    list_display = ('pk', 'name', 'year', 'category', 'description')
+    list_select_related = ('category',)
+    search_fields = ('^name',)
+    autocomplete_fields = ('genre', 'category')
     empty_value_display = '-пусто-'
 
 
 @admin.register(Genre)
 class GenreAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
+    search_fields = ('name', 'slug')
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     prepopulated_fields = {'slug': ('name',)}
+    search_fields = ('name', 'slug')
+
+
+@admin.register(Review)
+class ReviewAdmin(LargeTableAdmin):
+    list_display = ('pk', 'title', 'author', 'score', 'pub_date')
+    list_select_related = ('title', 'author')
+    raw_id_fields = ('title', 'author')
+    search_fields = ('=author__username',)
+
+
+@admin.register(Comment)
+class CommentAdmin(LargeTableAdmin):
+    list_display = ('pk', 'text', 'review_id', 'author', 'pub_date')
+    list_select_related = ('author',)
+    raw_id_fields = ('review', 'author')
+    search_fields = ('=author__username',)
@@ -0,0 +1,186 @@
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import (Comment, DeletionJob, Review, ScoreHistogram, Title,
+                     TitleDocument)
+from .signals import mute_review_deletion
+
+
+User = get_user_model()
+logger = logging.getLogger('reviews.deletion')
+_worker_lock = threading.Lock()
+
+
+def schedule_deletion(instance):
+    """
+    Помечает произведение или пользователя удаленным и создает задачу
+    удаления его отзывов и комментариев. Пользователь сразу теряет
+    доступ: is_active сбрасывается, его отзывы скрываются и вычитаются
+    из распределений оценок, документы их произведений удаляются.
+    У произведения удаляется документ.
+
+    Количество запросов постоянно, но у пользователя работа базы растет
+    с числом его отзывов: UPDATE гистограмм считает их оценки по индексу
+    автора, а DELETE удаляет документы всех произведений, на которые он
+    писал отзывы. Это оставлено в запросе, чтобы рейтинг и распределение
+    оценок не учитывали его отзывы сразу, а не после задачи удаления.
+    """
+    target = 'user' if isinstance(instance, User) else 'title'
+    changes = {'deleted_at': timezone.now()}
+    if target == 'user':
+        changes['is_active'] = False
+    with transaction.atomic():
+        type(instance)._base_manager.filter(pk=instance.pk).update(**changes)
+        if target == 'title':
+            TitleDocument.objects.filter(title_id=instance.pk).delete()
+        else:
+            reviews = Review.objects.filter(author_id=instance.pk)
+            ScoreHistogram.remove_reviews(reviews)
+            TitleDocument.objects.filter(
+                title_id__in=reviews.values('title_id')).delete()
+        job = DeletionJob.objects.create(target=target,
+                                         object_id=instance.pk)
+    if settings.DEFERRED_DELETION['BACKGROUND']:
+        transaction.on_commit(start_worker)
+    return job
+
+
+def dependents(job):
+    """Возвращает комментарии и отзывы, удаляемые задачей."""
+    if job.target == 'title':
+        return (Comment.objects.filter(review__title_id=job.object_id),
+                Review.objects.filter(title_id=job.object_id))
+    return (
+        Comment.objects.filter(Q(author_id=job.object_id)
+                               | Q(review__author_id=job.object_id)),
+        Review.objects.filter(author_id=job.object_id),
+    )
+
+
+def delete_batch(job, queryset, batch_size):
+    """
+    Удаляет до batch_size объектов queryset в одной транзакции. Отзывы
+    удаляются вместе с комментариями к ним, в том числе добавленными
+    после удаления комментариев задачей. Продлевает задачу.
+    """
+    model = queryset.model
+    with transaction.atomic():
+        ids = list(queryset.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            return 0
+        with mute_review_deletion():
+            _, counts = model.objects.filter(id__in=ids).delete()
+        deleted = {'comments_deleted': counts.get(Comment._meta.label, 0)}
+        if model is Review:
+            deleted['reviews_deleted'] = counts.get(Review._meta.label, 0)
+        DeletionJob.objects.filter(pk=job.pk).update(
+            claimed_at=timezone.now(),
+            **{counter: F(counter) + count
+               for counter, count in deleted.items()})
+    for counter, count in deleted.items():
+        setattr(job, counter, getattr(job, counter) + count)
+    return len(ids)
+
+
+def run_job(job, batch_size=None, progress=None):
+    """
+    Выполняет задачу: удаляет пакетами комментарии, затем отзывы, затем
+    сам объект. После каждого пакета вызывает progress(job).
+    """
+    batch_size = batch_size or settings.DEFERRED_DELETION['BATCH_SIZE']
+    comments, reviews = dependents(job)
+    if job.reviews_total is None:
+        job.comments_total = comments.count()
+        job.reviews_total = reviews.count()
+        job.save(update_fields=('comments_total', 'reviews_total'))
+    for queryset in (comments, reviews):
+        while delete_batch(job, queryset, batch_size):
+            logger.info('%s: удалено отзывов %s из %s, комментариев %s '
+                        'из %s', job, job.reviews_deleted, job.reviews_total,
+                        job.comments_deleted, job.comments_total)
+            if progress is not None:
+                progress(job)
+    model = User if job.target == 'user' else Title
+    with transaction.atomic():
+        model._base_manager.filter(pk=job.object_id).delete()
+        job.finished_at = timezone.now()
+        job.save(update_fields=('finished_at',))
+    return job
+
+
+def pending_jobs():
+    return DeletionJob.objects.filter(finished_at__isnull=True).order_by('id')
+
+
+def free_jobs():
+    """
+    Незавершенные задачи, которые не выполняет другой процесс: не взятые
+    в работу или не продленные дольше DEFERRED_DELETION['CLAIM_TIMEOUT']
+    секунд, например после остановки процесса.
+    """
+    expired = timezone.now() - timedelta(
+        seconds=settings.DEFERRED_DELETION['CLAIM_TIMEOUT'])
+    return pending_jobs().filter(Q(claimed_at__isnull=True)
+                                 | Q(claimed_at__lt=expired))
+
+
+def claim_job():
+    """
+    Берет в работу первую свободную задачу. Задачу забирает тот процесс,
+    чей UPDATE с условием свободной задачи изменил строку, поэтому одну
+    задачу не выполняют два процесса. Возвращает задачу или None.
+    """
+    while True:
+        job = free_jobs().first()
+        if job is None:
+            return None
+        job.claimed_at = timezone.now()
+        if free_jobs().filter(pk=job.pk).update(claimed_at=job.claimed_at):
+            return job
+
+
+def run_pending(batch_size=None, progress=None):
+    """Выполняет все свободные задачи, возвращает их количество."""
+    done = 0
+    while True:
+        job = claim_job()
+        if job is None:
+            return done
+        run_job(job, batch_size, progress)
+        done += 1
+
+
+def work():
+    failed = False
+    try:
+        run_pending()
+    except DatabaseError:
+        logger.exception('Ошибка отложенного удаления.')
+        failed = True
+    finally:
+        _worker_lock.release()
+    try:
+        if not failed and free_jobs().exists():
+            start_worker()
+    finally:
+        connection.close()
+
+
+def start_worker():
+    """
+    Запускает фоновый поток удаления, если он еще не запущен
+    в этом процессе. Возвращает поток или None.
+    """
+    if not _worker_lock.acquire(blocking=False):
+        return None
+    thread = threading.Thread(target=work, name='deletion-worker',
+                              daemon=True)
+    thread.start()
+    return thread
@@ -5,7 +5,8 @@ import django.db.utils
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.management.base import BaseCommand
 
-from reviews.models import Comment, Review, Category, Genre, Title
+from reviews.models import (Comment, Review, Category, Genre, Title,
+                            ScoreHistogram)
 from users.models import YamdbUserInterface
 
 DATA = {
@@ -105,6 +106,7 @@ class Command(BaseCommand):
                 for model, name_file in DATA.items():
                     load_data(model, name_file)
                 load_genre_title()
+                ScoreHistogram.rebuild()
                 self.stdout.write(
                     self.style.SUCCESS('Таблицы загружены в базу данных.'))
             elif options['clear']:
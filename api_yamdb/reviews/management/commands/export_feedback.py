@@ -0,0 +1,64 @@
+from django.core.management.base import BaseCommand
+
+from reviews.exports import EXPORT_FORMATS, stream_export, visible_feedback
+from reviews.models import Comment, Review
+from constants import EXPORT_CHUNK_SIZE
+
+MODELS = {
+    'reviews': Review,
+    'comments': Comment,
+}
+
+
+class Command(BaseCommand):
+    help = ('Потоково выгружает отзывы или комментарии в NDJSON или csv. '
+            'Формат csv совместим с командой csv_to_db')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'model',
+            choices=MODELS,
+            help='Выгружаемая таблица'
+        )
+        parser.add_argument(
+            '-o',
+            '--output',
+            choices=EXPORT_FORMATS,
+            default='ndjson',
+            help='Формат выгрузки'
+        )
+        parser.add_argument(
+            '-t',
+            '--title',
+            type=int,
+            help='Выгрузить записи только одного произведения'
+        )
+        parser.add_argument(
+            '-f',
+            '--file',
+            help='Файл для записи, по умолчанию stdout'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=EXPORT_CHUNK_SIZE,
+            help='Количество строк, читаемых из базы за раз'
+        )
+
+    def handle(self, *args, **options):
+        model = MODELS[options['model']]
+        queryset = visible_feedback(model)
+        if options['title'] is not None:
+            lookup = 'title_id' if model is Review else 'review__title_id'
+            queryset = queryset.filter(**{lookup: options['title']})
+        lines = stream_export(queryset, options['output'],
+                              options['chunk_size'])
+        if not options['file']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(options['file'], 'w', encoding='utf-8',
+                  newline='') as export_file:
+            export_file.writelines(lines)
+        self.stdout.write(
+            self.style.SUCCESS(f'Выгрузка записана в {options["file"]}.'))
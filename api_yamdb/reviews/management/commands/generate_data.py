@@ -0,0 +1,297 @@
+import csv
+import os
+import random
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.exports import EXPORT_COLUMNS, format_date
+from reviews.models import (Category, Comment, Genre, Review, ScoreHistogram,
+                            Title)
+from users.models import YamdbUserInterface
+from constants import MAX_SCORE, MIN_SCORE
+
+WORDS = (
+    'фильм книга песня сюжет герой автор финал сцена музыка роль голос '
+    'история драма смех слезы мир время жизнь город ночь дорога любовь '
+    'тайна война память друг враг море небо огонь свет тень сон дом '
+    'отличный скучный сильный странный живой честный долгий яркий '
+    'смотреть читать слушать понять помнить ждать верить'
+).split()
+DATE_RANGE_SECONDS = 5 * 365 * 24 * 60 * 60
+ROLES = (('user', 0.97), ('moderator', 0.02), ('admin', 0.01))
+CSV_COLUMNS = {
+    YamdbUserInterface: (
+        ('id', 'id'), ('username', 'username'), ('email', 'email'),
+        ('role', 'role'), ('bio', 'bio'), ('first_name', 'first_name'),
+        ('last_name', 'last_name'),
+    ),
+    Category: (('id', 'id'), ('name', 'name'), ('slug', 'slug')),
+    Genre: (('id', 'id'), ('name', 'name'), ('slug', 'slug')),
+    Title: (
+        ('id', 'id'), ('name', 'name'), ('year', 'year'),
+        ('category', 'category_id'),
+    ),
+    Title.genre.through: (
+        ('id', 'id'), ('title_id', 'title_id'), ('genre_id', 'genre_id'),
+    ),
+    **EXPORT_COLUMNS,
+}
+CSV_FILES = {
+    YamdbUserInterface: 'users.csv',
+    Category: 'category.csv',
+    Genre: 'genre.csv',
+    Title: 'titles.csv',
+    Title.genre.through: 'genre_title.csv',
+    Review: 'review.csv',
+    Comment: 'comments.csv',
+}
+
+
+def next_id(model):
+    last = model._base_manager.order_by('-id').values_list(
+        'id', flat=True).first()
+    return (last or 0) + 1
+
+
+def zipf_counts(total, items, exponent, cap):
+    """
+    Распределяет total элементов по items корзинам по закону Ципфа.
+    Отдает количество для каждой корзины, не больше cap: излишек
+    переносится в следующие корзины.
+    """
+    weights_sum = sum(1 / rank ** exponent for rank in range(1, items + 1))
+    cumulative, previous, carry = 0.0, 0, 0
+    for rank in range(1, items + 1):
+        cumulative += 1 / rank ** exponent
+        current = round(total * cumulative / weights_sum)
+        wanted = current - previous + carry
+        yield min(cap, wanted)
+        carry = max(0, wanted - cap)
+        previous = current
+
+
+@contextmanager
+def keep_pub_date(*models):
+    """Отключает auto_now_add у pub_date, чтобы сохранить даты генератора."""
+    fields = [model._meta.get_field('pub_date') for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = ('Генерирует большой синтетический набор данных: пользователей, '
+            'категории, жанры, произведения, отзывы и комментарии')
+
+    def add_arguments(self, parser):
+        for name, default in (('users', 1000), ('categories', 10),
+                              ('genres', 30), ('titles', 10000),
+                              ('reviews', 100000), ('comments', 100000)):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Количество создаваемых объектов ({name})'
+            )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Зерно генератора случайных чисел'
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа отзывов по произведениям'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Размер пакета bulk_create'
+        )
+        parser.add_argument(
+            '--csv-dir',
+            help='Каталог для csv-файлов в формате csv_to_db'
+        )
+        parser.add_argument(
+            '--no-db',
+            action='store_true',
+            help='Не записывать данные в базу, только в csv'
+        )
+
+    def text(self, low, high):
+        length = self.rng.randint(low, high)
+        return ' '.join(self.rng.choices(WORDS, k=length))
+
+    def date(self):
+        seconds = self.rng.randrange(DATE_RANGE_SECONDS)
+        return self.now - timedelta(seconds=seconds)
+
+    def users(self, first_id, count):
+        roles, weights = zip(*ROLES)
+        for pk in range(first_id, first_id + count):
+            yield {
+                'id': pk,
+                'username': f'user{pk}',
+                'email': f'user{pk}@yamdb.fake',
+                'role': self.rng.choices(roles, weights)[0],
+                'bio': '',
+                'first_name': '',
+                'last_name': '',
+                'password': '!',
+            }
+
+    def slugs(self, first_id, count, prefix):
+        for pk in range(first_id, first_id + count):
+            yield {'id': pk, 'name': f'{prefix.title()} {pk}',
+                   'slug': f'{prefix}-{pk}'}
+
+    def titles(self, first_id, count, categories, genres, links_first_id):
+        link_id = links_first_id
+        for pk in range(first_id, first_id + count):
+            yield Title, {
+                'id': pk,
+                'name': self.text(1, 4).capitalize(),
+                'year': self.rng.randint(1900, self.now.year),
+                'description': self.text(10, 60),
+                'category_id': self.rng.choice(categories),
+            }
+            for genre_id in self.rng.sample(
+                    genres, self.rng.randint(1, min(3, len(genres)))):
+                yield Title.genre.through, {
+                    'id': link_id, 'title_id': pk, 'genre_id': genre_id}
+                link_id += 1
+
+    def reviews(self, first_id, count, titles, users, exponent):
+        pk = first_id
+        counts = zipf_counts(count, len(titles), exponent, len(users))
+        for title_id, title_count in zip(titles, counts):
+            quality = self.rng.uniform(MIN_SCORE, MAX_SCORE)
+            for author_id in self.rng.sample(users, title_count):
+                score = round(self.rng.gauss(quality, 1.8))
+                yield {
+                    'id': pk,
+                    'title_id': title_id,
+                    'text': self.text(5, 80),
+                    'author_id': author_id,
+                    'score': min(MAX_SCORE, max(MIN_SCORE, score)),
+                    'pub_date': self.date(),
+                }
+                pk += 1
+
+    def comments(self, first_id, count, reviews, users):
+        for pk in range(first_id, first_id + count):
+            yield {
+                'id': pk,
+                'review_id': reviews[int(len(reviews)
+                                         * self.rng.random() ** 3)],
+                'text': self.text(3, 40),
+                'author_id': self.rng.choice(users),
+                'pub_date': self.date(),
+            }
+
+    def write(self, rows, model=None):
+        """Записывает строки пакетами в базу и csv-файлы."""
+        rows = ((model, row) for row in rows) if model else rows
+        written = 0
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                break
+            by_model = {row_model: [] for row_model in CSV_FILES}
+            for row_model, row in batch:
+                by_model[row_model].append(row)
+            for row_model, model_rows in by_model.items():
+                if not model_rows:
+                    continue
+                if self.write_db:
+                    with transaction.atomic():
+                        row_model.objects.bulk_create(
+                            row_model(**row) for row in model_rows)
+                if row_model in self.csv_writers:
+                    self.write_csv(row_model, model_rows)
+            written += len(batch)
+        return written
+
+    def open_csv(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.csv_files = []
+        self.csv_writers = {}
+        for model, name in CSV_FILES.items():
+            csv_file = open(os.path.join(directory, name), 'w',
+                            encoding='utf-8', newline='')
+            writer = csv.writer(csv_file)
+            writer.writerow(column for column, _ in CSV_COLUMNS[model])
+            self.csv_files.append(csv_file)
+            self.csv_writers[model] = writer
+
+    def write_csv(self, model, rows):
+        columns = CSV_COLUMNS[model]
+        self.csv_writers[model].writerows(
+            [format_date(row[field]) if column == 'pub_date' else row[field]
+             for column, field in columns]
+            for row in rows
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.now = datetime.now(timezone.utc)
+        self.batch_size = options['batch_size']
+        self.write_db = not options['no_db']
+        self.csv_writers = {}
+        self.csv_files = []
+        if options['csv_dir']:
+            self.open_csv(options['csv_dir'])
+        elif not self.write_db:
+            self.stdout.write(self.style.ERROR(
+                'С ключом --no-db нужно указать --csv-dir.'))
+            return
+
+        first = {model: next_id(model) if self.write_db else 1
+                 for model in CSV_FILES}
+        users = range(first[YamdbUserInterface],
+                      first[YamdbUserInterface] + options['users'])
+        categories = range(first[Category],
+                           first[Category] + options['categories'])
+        genres = range(first[Genre], first[Genre] + options['genres'])
+        titles = range(first[Title], first[Title] + options['titles'])
+        try:
+            with keep_pub_date(Review, Comment):
+                steps = (
+                    ('пользователей', YamdbUserInterface,
+                     self.users(users.start, len(users))),
+                    ('категорий', Category,
+                     self.slugs(categories.start, len(categories),
+                                'category')),
+                    ('жанров', Genre,
+                     self.slugs(genres.start, len(genres), 'genre')),
+                    ('произведений и связей с жанрами', None,
+                     self.titles(titles.start, len(titles), categories,
+                                 genres, first[Title.genre.through])),
+                    ('отзывов', Review,
+                     self.reviews(first[Review], options['reviews'], titles,
+                                  users, options['zipf'])),
+                )
+                for name, model, rows in steps:
+                    count = self.write(rows, model)
+                    self.stdout.write(f'Создано {name}: {count}')
+                reviews = range(first[Review], first[Review] + count)
+                if reviews:
+                    count = self.write(
+                        self.comments(first[Comment], options['comments'],
+                                      reviews, users), Comment)
+                    self.stdout.write(f'Создано комментариев: {count}')
+        finally:
+            for csv_file in self.csv_files:
+                csv_file.close()
+        if self.write_db:
+            ScoreHistogram.rebuild()
+        self.stdout.write(self.style.SUCCESS('Данные сгенерированы.'))
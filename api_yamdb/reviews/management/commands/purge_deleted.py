@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from reviews.deletion import pending_jobs, run_pending
+from reviews.models import DeletionJob
+
+
+class Command(BaseCommand):
+    help = ('Удаляет пакетами отзывы и комментарии удаленных произведений '
+            'и пользователей, затем сами объекты')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            help='Количество строк, удаляемых в одной транзакции'
+        )
+        parser.add_argument(
+            '--status',
+            action='store_true',
+            help='Только показать ход незавершенных задач'
+        )
+
+    def show(self, job):
+        self.stdout.write(
+            f'{job}: {job.progress:.0%}, отзывов {job.reviews_deleted}'
+            f'/{job.reviews_total}, комментариев {job.comments_deleted}'
+            f'/{job.comments_total}'
+        )
+
+    def handle(self, *args, **options):
+        if options['status']:
+            for job in pending_jobs():
+                self.show(job)
+            return
+        count = run_pending(options['batch_size'], progress=self.show)
+        finished = DeletionJob.objects.filter(finished_at__isnull=False)
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач удаления: {count}, '
+            f'всего завершено: {finished.count()}.'))
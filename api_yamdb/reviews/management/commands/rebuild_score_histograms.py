@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import ScoreHistogram
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает распределения оценок всех произведений '
+            'одним проходом по таблице отзывов')
+
+    def handle(self, *args, **options):
+        count = ScoreHistogram.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Распределения оценок пересчитаны для {count} произведений.'))
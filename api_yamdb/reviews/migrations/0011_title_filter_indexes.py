@@ -0,0 +1,26 @@
+# Generated by Django 3.2 on 2026-10-19 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_scorehistogram'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['name'], name='title_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year'], name='title_year_idx'),
+        ),
+        migrations.RunSQL(
+            'CREATE INDEX "title_genre_genre_id_title_id_idx" '
+            'ON "reviews_title_genre" ("genre_id", "title_id")',
+            'DROP INDEX "title_genre_genre_id_title_id_idx"',
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 3.2 on 2026-10-19 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_title_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeletionJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('target', models.CharField(choices=[('title', 'Произведение'), ('user', 'Пользователь')], max_length=16, verbose_name='Объект')),
+                ('object_id', models.BigIntegerField(verbose_name='id объекта')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершена')),
+                ('reviews_total', models.PositiveIntegerField(null=True, verbose_name='Отзывов')),
+                ('comments_total', models.PositiveIntegerField(null=True, verbose_name='Комментариев')),
+                ('reviews_deleted', models.PositiveIntegerField(default=0, verbose_name='Удалено отзывов')),
+                ('comments_deleted', models.PositiveIntegerField(default=0, verbose_name='Удалено комментариев')),
+            ],
+            options={
+                'verbose_name': 'Задача удаления',
+                'verbose_name_plural': 'Задачи удаления',
+            },
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Удалено'),
+        ),
+    ]
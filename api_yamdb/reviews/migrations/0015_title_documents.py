@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-19 15:15
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0014_feedback_pub_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleDocument',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('body', models.TextField(verbose_name='JSON')),
+            ],
+            options={
+                'verbose_name': 'Документ произведения',
+                'verbose_name_plural': 'Документы произведений',
+            },
+        ),
+    ]
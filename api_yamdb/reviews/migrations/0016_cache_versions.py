@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-19 15:41
+
+from django.db import migrations, models
+
+
+def create_versions(apps, schema_editor):
+    CacheVersion = apps.get_model('reviews', 'CacheVersion')
+    CacheVersion.objects.bulk_create([
+        CacheVersion(name=name, version='')
+        for name in ('slug-cache:reviews.category', 'slug-cache:reviews.genre')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0015_title_documents'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Кэш')),
+                ('version', models.CharField(max_length=32, verbose_name='Версия')),
+            ],
+            options={
+                'verbose_name': 'Версия кэша',
+                'verbose_name_plural': 'Версии кэшей',
+            },
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
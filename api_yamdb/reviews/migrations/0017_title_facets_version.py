@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def create_version(apps, schema_editor):
+    CacheVersion = apps.get_model('reviews', 'CacheVersion')
+    CacheVersion.objects.get_or_create(name='title-facets',
+                                       defaults={'version': ''})
+
+
+def delete_version(apps, schema_editor):
+    CacheVersion = apps.get_model('reviews', 'CacheVersion')
+    CacheVersion.objects.filter(name='title-facets').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0016_cache_versions'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_version, delete_version),
+    ]
@@ -1,12 +1,17 @@
+import uuid
+
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 
 from .validators import validate_actual_year
 from constants import NAME_MAX_LENGTH, SLUG_MAX_LENGTH, MIN_SCORE, MAX_SCORE
 
 
 User = get_user_model()
+SCORES = range(MIN_SCORE, MAX_SCORE + 1)
 
 
 class GenreCategoryBaseClass(models.Model):
@@ -63,6 +68,12 @@ class Title(models.Model):
         null=True,
         blank=True
     )
+    deleted_at = models.DateTimeField(
+        verbose_name='Удалено',
+        null=True,
+        blank=True,
+        editable=False
+    )
 
     def __str__(self):
         return self.name
@@ -70,6 +81,153 @@ class Title(models.Model):
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=['name'], name='title_name_idx'),
+            models.Index(fields=['year'], name='title_year_idx'),
+            models.Index(fields=['deleted_at'], name='title_deleted_at_idx',
+                         condition=Q(deleted_at__isnull=False)),
+        ]
+
+
+class TitleDocument(models.Model):
+    """
+    Модель для хранения готового JSON произведения в формате выдачи API:
+    список и карточка произведения читаются без соединений таблиц и без
+    сериализации.
+    """
+
+    title = models.OneToOneField(
+        Title,
+        verbose_name='Произведение',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='document'
+    )
+    body = models.TextField('JSON')
+
+    @classmethod
+    def upsert(cls, documents, replace=True):
+        """
+        Записывает документы одним INSERT ... ON CONFLICT: новые
+        вставляются, у существующих JSON заменяется или, при
+        replace=False, остается прежним.
+        """
+        quote = connection.ops.quote_name
+        conflict = (f'DO UPDATE SET {quote("body")} = excluded.{quote("body")}'
+                    if replace else 'DO NOTHING')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {quote(cls._meta.db_table)} '
+                f'({quote("title_id")}, {quote("body")}) VALUES '
+                + ', '.join(['(%s, %s)'] * len(documents))
+                + f' ON CONFLICT ({quote("title_id")}) {conflict}',
+                [value for document in documents
+                 for value in (document.title_id, document.body)]
+            )
+
+    class Meta:
+        verbose_name = 'Документ произведения'
+        verbose_name_plural = 'Документы произведений'
+
+
+class ScoreHistogram(models.Model):
+    """
+    Модель для хранения распределения оценок произведения:
+    по одному счетчику score_<n> на каждую оценку.
+    """
+
+    title = models.OneToOneField(
+        Title,
+        verbose_name='Произведение',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score_histogram'
+    )
+
+    def as_dict(self):
+        return {score: getattr(self, f'score_{score}')
+                for score in SCORES}
+
+    @classmethod
+    def change(cls, title_id, old_score=None, new_score=None):
+        """
+        Сдвигает счетчики при изменении оценки отзыва. Если у оценки
+        есть новое значение, строка вставляется или обновляется одним
+        INSERT ... ON CONFLICT, поэтому одновременные первые отзывы
+        произведения учитываются оба.
+        """
+        if old_score == new_score:
+            return
+        if new_score is None:
+            cls.objects.filter(title_id=title_id).update(
+                **{f'score_{old_score}': F(f'score_{old_score}') - 1})
+            return
+        quote = connection.ops.quote_name
+        table = quote(cls._meta.db_table)
+        columns = [quote(f'score_{score}') for score in SCORES]
+        changes = [f'{columns[new_score - MIN_SCORE]} = '
+                   f'{table}.{columns[new_score - MIN_SCORE]} + 1']
+        if old_score is not None:
+            changes.append(f'{columns[old_score - MIN_SCORE]} = '
+                           f'{table}.{columns[old_score - MIN_SCORE]} - 1')
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({quote("title_id")}, '
+                f'{", ".join(columns)}) '
+                f'VALUES (%s{", %s" * len(columns)}) '
+                f'ON CONFLICT ({quote("title_id")}) DO UPDATE SET '
+                f'{", ".join(changes)}',
+                [title_id, *(int(score == new_score) for score in SCORES)]
+            )
+
+    @classmethod
+    def remove_reviews(cls, reviews):
+        """
+        Вычитает оценки отзывов reviews, например скрытых отзывов
+        удаленного пользователя, одним запросом: количество отзывов
+        с каждой оценкой считается подзапросом по произведению.
+        """
+        changes = {}
+        for score in SCORES:
+            count = reviews.filter(
+                title_id=OuterRef('title_id'), score=score
+            ).order_by().values('title_id').annotate(
+                count=Count('id')).values('count')
+            changes[f'score_{score}'] = F(f'score_{score}') - Coalesce(
+                Subquery(count), 0, output_field=models.PositiveIntegerField())
+        cls.objects.filter(
+            title_id__in=reviews.values('title_id')).update(**changes)
+
+    @classmethod
+    def rebuild(cls):
+        """
+        Пересчитывает все гистограммы одним запросом по отзывам. Отзывы
+        удаленных пользователей и произведений, которые еще ждут задачи
+        удаления, не учитываются, как и в рейтинге.
+        """
+        histograms = {}
+        counts = Review.objects.filter(
+            author__deleted_at__isnull=True, title__deleted_at__isnull=True
+        ).values_list('title_id', 'score').annotate(
+            count=Count('id')).order_by()
+        for title_id, score, count in counts.iterator():
+            histogram = histograms.setdefault(title_id, cls(title_id=title_id))
+            setattr(histogram, f'score_{score}', count)
+        with transaction.atomic():
+            cls.objects.all().delete()
+            cls.objects.bulk_create(histograms.values())
+        return len(histograms)
+
+    class Meta:
+        verbose_name = 'Распределение оценок'
+        verbose_name_plural = 'Распределения оценок'
+
+
+for score in SCORES:
+    ScoreHistogram.add_to_class(
+        f'score_{score}',
+        models.PositiveIntegerField(f'Оценок {score}', default=0)
+    )
 
 
 class BaseFeedback(models.Model):
@@ -94,6 +252,12 @@ class BaseFeedback(models.Model):
 
     class Meta:
         abstract = True
+        indexes = [
+            models.Index(fields=['author', 'pub_date'],
+                         name='%(class)s_author_pub_date_idx'),
+            models.Index(fields=['pub_date', 'id'],
+                         name='%(class)s_pub_date_idx'),
+        ]
 
 
 class Review(BaseFeedback):
@@ -113,6 +277,19 @@ class Review(BaseFeedback):
         )
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
+    def save(self, *args, **kwargs):
+        old_score = getattr(self, '_loaded_score', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            ScoreHistogram.change(self.title_id, old_score, self.score)
+        self._loaded_score = self.score
+
     class Meta(BaseFeedback.Meta):
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
@@ -139,3 +316,107 @@ class Comment(BaseFeedback):
     class Meta(BaseFeedback.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+
+
+class DeletionJob(models.Model):
+    """
+    Задача отложенного удаления произведения или пользователя:
+    отзывы и комментарии удаляются пакетами, счетчики показывают ход
+    удаления.
+    """
+
+    TARGETS = (
+        ('title', 'Произведение'),
+        ('user', 'Пользователь'),
+    )
+
+    target = models.CharField('Объект', max_length=16, choices=TARGETS)
+    object_id = models.BigIntegerField('id объекта')
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершена', null=True, blank=True)
+    reviews_total = models.PositiveIntegerField('Отзывов', null=True)
+    comments_total = models.PositiveIntegerField('Комментариев', null=True)
+    reviews_deleted = models.PositiveIntegerField(
+        'Удалено отзывов', default=0)
+    comments_deleted = models.PositiveIntegerField(
+        'Удалено комментариев', default=0)
+    claimed_at = models.DateTimeField('Взята в работу', null=True,
+                                      blank=True)
+
+    def __str__(self):
+        return f'{self.target} {self.object_id}'
+
+    @property
+    def progress(self):
+        """Доля удаленных отзывов и комментариев от 0 до 1."""
+        if self.finished_at is not None:
+            return 1.0
+        total = (self.reviews_total or 0) + (self.comments_total or 0)
+        if not total:
+            return 0.0
+        return (self.reviews_deleted + self.comments_deleted) / total
+
+    class Meta:
+        verbose_name = 'Задача удаления'
+        verbose_name_plural = 'Задачи удаления'
+
+
+class CacheVersion(models.Model):
+    """
+    Модель для хранения версий кэшей в памяти процессов: общая для всех
+    процессов сервера метка, которая меняется при изменении данных.
+    """
+
+    name = models.CharField('Кэш', max_length=100, primary_key=True)
+    version = models.CharField('Версия', max_length=32)
+
+    class Meta:
+        verbose_name = 'Версия кэша'
+        verbose_name_plural = 'Версии кэшей'
+
+    @classmethod
+    def current(cls, name):
+        """
+        Текущая версия кэша name одним запросом. Пока версию ни разу
+        не меняли, она пустая.
+        """
+        return cls.objects.filter(name=name).values_list(
+            'version', flat=True).first() or ''
+
+    @classmethod
+    def bump(cls, *names):
+        """
+        Меняет версии кэшей names одним запросом. Строка версии создается
+        при первой смене, версии известных кэшей создают миграции.
+        """
+        names = set(names)
+        version = uuid.uuid4().hex
+        if cls.objects.filter(name__in=names).update(
+                version=version) < len(names):
+            cls.objects.bulk_create(
+                [cls(name=name, version=version) for name in names],
+                ignore_conflicts=True)
+
+    @classmethod
+    def bump_on_commit(cls, name):
+        """
+        Меняет версию кэша name после фиксации транзакции. Версии всех
+        кэшей, измененных в транзакции, меняются одним запросом.
+        """
+        connection = transaction.get_connection()
+        if connection.in_atomic_block:
+            for _, callback in connection.run_on_commit:
+                if isinstance(callback, VersionBump):
+                    callback.names.add(name)
+                    return
+        transaction.on_commit(VersionBump(name))
+
+
+class VersionBump:
+    """Отложенная до фиксации транзакции смена версий кэшей."""
+
+    def __init__(self, name):
+        self.names = {name}
+
+    def __call__(self):
+        CacheVersion.bump(*self.names)
@@ -0,0 +1,34 @@
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+
+class CountlessPaginator(Paginator):
+    """
+    Пагинатор без COUNT(*) для больших таблиц. Страница number выбирается
+    с одним лишним объектом: по нему известно, есть ли следующая страница,
+    а количество объектов считается до конца этой выборки.
+    """
+
+    def __init__(self, object_list, per_page, orphans=0,
+                 allow_empty_first_page=True, number=1):
+        super().__init__(object_list, per_page, 0, allow_empty_first_page)
+        self.number = number
+
+    @cached_property
+    def offset(self):
+        return (self.number - 1) * self.per_page
+
+    @cached_property
+    def window(self):
+        return list(
+            self.object_list[self.offset:self.offset + self.per_page + 1])
+
+    @cached_property
+    def count(self):
+        return self.offset + len(self.window)
+
+    def page(self, number):
+        number = self.validate_number(number)
+        if number != self.number:
+            return super().page(number)
+        return self._get_page(self.window[:self.per_page], number, self)
@@ -0,0 +1,41 @@
+import threading
+from contextlib import contextmanager
+
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Review, ScoreHistogram
+
+
+_muted = threading.local()
+
+
+@contextmanager
+def mute_review_deletion():
+    """
+    Отключает в текущем потоке обработчики удаления отзывов. Задача
+    удаления обходится без них: оценки удаленного пользователя уже
+    вычтены, а гистограмма и документ удаленного произведения удаляются
+    вместе с ним.
+    """
+    _muted.active = True
+    try:
+        yield
+    finally:
+        _muted.active = False
+
+
+def review_deletion_muted():
+    return getattr(_muted, 'active', False)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_score(sender, instance, **kwargs):
+    """
+    Уменьшает счетчик гистограммы при удалении отзыва. Оценки отзывов
+    удаленного пользователя вычитаются при пометке пользователя.
+    """
+    if review_deletion_muted() or instance.author.deleted_at is not None:
+        return
+    ScoreHistogram.change(instance.title_id,
+                          getattr(instance, '_loaded_score', instance.score))
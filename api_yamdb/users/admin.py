@@ -1,10 +1,11 @@
 from django.contrib import admin
 
+from reviews.admin import LargeTableAdmin
 from .models import YamdbUserInterface
 
 
 @admin.register(YamdbUserInterface)
-class YamdbUserInterfaceAdmin(admin.ModelAdmin):
+class YamdbUserInterfaceAdmin(LargeTableAdmin):
     list_display = ('username', 'email', 'first_name', 'last_name', 'role',)
     fields = ('username', 'email', 'first_name', 'last_name', 'bio', 'role',)
-    search_fields = ('username',)
+    search_fields = ('^username', '=email')
@@ -0,0 +1,25 @@
+# Generated by Django 3.2 on 2026-10-19 15:02
+
+from django.db import migrations, models
+import users.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name='yamdbuserinterface',
+            managers=[
+                ('objects', users.models.YamdbUserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='yamdbuserinterface',
+            name='deleted_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Удален'),
+        ),
+    ]
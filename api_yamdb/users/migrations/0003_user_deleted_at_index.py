@@ -0,0 +1,17 @@
+# Generated by Django 3.2 on 2026-10-19 16:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_user_deleted_at'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='yamdbuserinterface',
+            index=models.Index(condition=models.Q(deleted_at__isnull=False), fields=['deleted_at'], name='user_deleted_at_idx'),
+        ),
+    ]
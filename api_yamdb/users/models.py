@@ -1,4 +1,4 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
 
 from constants import ROLE_USER, ROLE_MODERATOR, ROLE_ADMIN, ROLE_MAX_LENGTH
@@ -11,6 +11,16 @@ USER_ROLES = (
 )
 
 
+class YamdbUserManager(UserManager):
+    """
+    Менеджер пользователей без помеченных удаленными: такие пользователи
+    не находятся ни при входе, ни по JWT-токену.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class YamdbUserInterface(AbstractUser):
     """Пользовательская модель для пользователей."""
 
@@ -18,6 +28,10 @@ class YamdbUserInterface(AbstractUser):
     role = models.CharField(max_length=ROLE_MAX_LENGTH,
                             choices=USER_ROLES,
                             default=ROLE_USER)
+    deleted_at = models.DateTimeField('Удален', null=True, blank=True,
+                                      editable=False)
+
+    objects = YamdbUserManager()
 
     def __str__(self):
         return self.username
@@ -33,3 +47,7 @@ class YamdbUserInterface(AbstractUser):
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+        indexes = [
+            models.Index(fields=['deleted_at'], name='user_deleted_at_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+        ]
@@ -0,0 +1,169 @@
+"""
+Замеры производительности эндпоинтов API на синтетических наборах данных.
+
+    python -m benchmarks --dataset 1k
+    python -m benchmarks --dataset 100k --update-baseline
+
+Запуск завершается с ошибкой, если SQL-запросов больше, чем в эталоне
+из benchmarks/baselines, а с --check-timings — и если время ответа
+хуже эталона больше допустимого отклонения.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCHMARKS_DIR.parent / 'api_yamdb'))
+sys.path.insert(0, str(BENCHMARKS_DIR.parent))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+DATASETS = {
+    '1k': {'users': 100, 'titles': 100, 'reviews': 1000, 'comments': 1000},
+    '100k': {'users': 2000, 'titles': 10000, 'reviews': 100000,
+             'comments': 100000},
+    '1m': {'users': 10000, 'titles': 100000, 'reviews': 1000000,
+           'comments': 1000000},
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Замеры эндпоинтов API с проверкой регрессий')
+    parser.add_argument('--dataset', choices=DATASETS, default='1k',
+                        help='Набор данных по количеству отзывов')
+    parser.add_argument('--iterations', type=int, default=100,
+                        help='Количество замеров каждого сценария')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Количество повторов замера, берется лучший')
+    parser.add_argument('--check-timings', action='store_true',
+                        help='Сравнивать с эталоном также время ответа '
+                             'и rps, эталон должен быть снят на этой '
+                             'машине')
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='Допустимое ухудшение времени ответа и rps')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help='Изменение времени, которое считается шумом')
+    parser.add_argument('--query-tolerance', type=int, default=0,
+                        help='Допустимый рост количества SQL-запросов')
+    parser.add_argument('--only',
+                        help='Замерять только сценарии с этой подстрокой')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='Сохранить результаты как эталон')
+    parser.add_argument('--output', help='Файл для результатов в JSON')
+    return parser.parse_args()
+
+
+def prepare_dataset(name):
+    """Создает базу набора данных при первом запуске."""
+    from django.core.management import call_command
+    from reviews.models import Review, TitleDocument
+
+    call_command('migrate', verbosity=0)
+    if not Review.objects.exists():
+        print(f'Генерация набора данных {name}...')
+        call_command('generate_data', seed=0, **DATASETS[name])
+    if not TitleDocument.objects.exists():
+        call_command('rebuild_title_documents')
+
+
+def run(args, baseline_path):
+    from django.conf import settings
+    from django.test.utils import override_settings
+
+    from benchmarks.cases import (benchmark_objects, build_cases,
+                                  uncovered_routes)
+    from benchmarks.runner import best_of, compare, make_client, measure
+
+    prepare_dataset(args.dataset)
+    workdir = tempfile.mkdtemp(prefix='benchmarks-')
+    rest_framework = {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {'auth_signup': '1000000/s',
+                                   'auth_token': '1000000/s'},
+    }
+    # Количество SQL-запросов не должно зависеть от загрузки машины:
+    # журнал медленных запросов выполняет EXPLAIN в соединении запроса,
+    # а фоновый поток удаления конкурирует за базу, хотя задачи
+    # откатываются вместе с транзакцией замера.
+    with override_settings(
+            REST_FRAMEWORK=rest_framework,
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            METRICS_DIR=os.path.join(workdir, 'metrics'),
+            REQUEST_PROFILING={**settings.REQUEST_PROFILING,
+                               'PROFILE_DIR': workdir},
+            SLOW_QUERY_LOG={**settings.SLOW_QUERY_LOG,
+                            'PATH': os.path.join(workdir, 'slow.sqlite3'),
+                            'THRESHOLD_MS': math.inf},
+            DEFERRED_DELETION={**settings.DEFERRED_DELETION,
+                               'BACKGROUND': False}):
+        objects = benchmark_objects()
+        cases = build_cases(objects)
+        for route, method in sorted(uncovered_routes(cases)):
+            print(f'Нет сценария для {method} {route}')
+        if args.only:
+            cases = [case for case in cases if args.only in case.name]
+        client = make_client(objects['admin'])
+        results = {}
+        for case in cases:
+            results[case.name] = best_of([
+                measure(client, case, args.iterations)
+                for _ in range(args.repeat)
+            ])
+            print('{:<32} {rps:>9} rps  p50 {p50_ms:>8} ms  '
+                  'p95 {p95_ms:>8} ms  p99 {p99_ms:>8} ms  '
+                  '{queries:>3} SQL'.format(case.name, **results[case.name]))
+
+    if args.output:
+        write_json(args.output, results)
+    if args.update_baseline:
+        baseline = load_json(baseline_path)
+        write_json(baseline_path, {**baseline, **results})
+        print(f'Эталон сохранен: {baseline_path}')
+        return 0
+    if not baseline_path.exists():
+        print(f'Эталон {baseline_path} не найден. Сохраните его '
+              f'с --update-baseline.')
+        return 1
+    regressions = compare(results, load_json(baseline_path),
+                          args.tolerance if args.check_timings else None,
+                          args.query_tolerance, args.min_delta_ms)
+    for regression in regressions:
+        print(f'Регрессия: {regression}')
+    return 1 if regressions else 0
+
+
+def load_json(path):
+    if not Path(path).exists():
+        return {}
+    with open(path, encoding='utf-8') as json_file:
+        return json.load(json_file)
+
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as json_file:
+        json.dump(data, json_file, ensure_ascii=False, indent=2,
+                  sort_keys=True)
+        json_file.write('\n')
+
+
+def main():
+    args = parse_args()
+    from django.conf import settings
+
+    data_dir = BENCHMARKS_DIR / 'data'
+    data_dir.mkdir(exist_ok=True)
+    settings.DATABASES['default']['NAME'] = (
+        data_dir / f'{args.dataset}.sqlite3')
+
+    import django
+    django.setup()
+    return run(args, BENCHMARKS_DIR / 'baselines' / f'{args.dataset}.json')
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,209 @@
+import uuid
+from collections import namedtuple
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count
+from django.urls import URLResolver, get_resolver, resolve
+
+from api.profiling import save_report
+from api.utils import get_confirmation_code
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+User = get_user_model()
+BENCHMARK_ADMIN = 'benchmark_admin'
+WATCHLIST_SIZE = 50
+IGNORED_METHODS = ('head', 'options', 'trace')
+API_URLCONF = 'api.urls'
+
+Case = namedtuple('Case', 'name method path data status')
+
+
+def join_route(prefix, route):
+    """Склеивает маршруты так же, как ResolverMatch.route."""
+    return prefix + (route[1:] if prefix and route.startswith('^')
+                     else route)
+
+
+def walk(patterns, prefix=''):
+    for pattern in patterns:
+        route = join_route(prefix, str(pattern.pattern))
+        if isinstance(pattern, URLResolver):
+            yield from walk(pattern.url_patterns, route)
+        else:
+            yield route, pattern.callback
+
+
+def view_methods(callback):
+    view = getattr(callback, 'cls', None) or callback.view_class
+    actions = getattr(callback, 'actions', None)
+    methods = actions if actions else [
+        method for method in view.http_method_names if hasattr(view, method)]
+    return view, [method.upper() for method in methods
+                  if method in view.http_method_names
+                  and method not in IGNORED_METHODS]
+
+
+def api_routes():
+    """
+    Возвращает пары (маршрут, метод) всех представлений приложения api
+    из api/urls.py.
+    Варианты маршрутов с суффиксом формата не учитываются.
+    """
+    routes = set()
+    api_urls = [
+        pattern for pattern in get_resolver().url_patterns
+        if isinstance(pattern, URLResolver)
+        and getattr(pattern.urlconf_name, '__name__', None) == API_URLCONF
+    ]
+    for route, callback in walk(api_urls):
+        view, methods = view_methods(callback)
+        if (not view.__module__.startswith('api.')
+                or '(?P<format>' in route):
+            continue
+        routes.update((route, method) for method in methods)
+    return routes
+
+
+def uncovered_routes(cases):
+    """Возвращает маршруты api, для которых нет сценария замера."""
+    covered = {(resolve(case.path.split('?')[0]).route, case.method)
+               for case in cases}
+    return api_routes() - covered
+
+
+def benchmark_objects():
+    """
+    Выбирает объекты набора данных для сценариев: произведение
+    с наибольшим числом отзывов, его отзыв с наибольшим числом
+    комментариев, категорию, жанр и пользователя. Создает
+    администратора для замеров и отчет профилирования.
+    """
+    admin, _ = User.objects.get_or_create(
+        username=BENCHMARK_ADMIN,
+        defaults={'email': f'{BENCHMARK_ADMIN}@yamdb.fake', 'role': 'admin'}
+    )
+    title = Title.objects.annotate(
+        total=Count('reviews')).order_by('-total', 'id').first()
+    review = Review.objects.filter(title=title).annotate(
+        total=Count('comments')).order_by('-total', 'id').first()
+    comment = Comment.objects.filter(review=review).first()
+    if comment is None:
+        comment = Comment.objects.create(review=review, author=admin,
+                                         text='Комментарий для замеров')
+    profile_id = uuid.uuid4().hex
+    save_report(profile_id, {'id': profile_id, 'functions': [],
+                             'queries': []})
+    return {
+        'admin': admin,
+        'user': User.objects.exclude(pk=admin.pk).order_by('id').first(),
+        'title': title,
+        'review': review,
+        'comment': comment,
+        'category': Category.objects.order_by('id').first(),
+        'genre': Genre.objects.order_by('id').first(),
+        'profile_id': profile_id,
+    }
+
+
+def build_cases(objects):
+    """Возвращает сценарии замера для всех маршрутов api."""
+    admin, user = objects['admin'], objects['user']
+    title, review = objects['title'], objects['review']
+    category, genre = objects['category'], objects['genre']
+    titles = f'/api/v1/titles/{title.id}/'
+    reviews = f'{titles}reviews/'
+    comments = f'{reviews}{review.id}/comments/'
+    new_user = {'username': 'benchmark_new', 'email': 'new@yamdb.fake'}
+    watchlist = Title.objects.order_by('-id').values_list(
+        'id', flat=True)[:WATCHLIST_SIZE]
+    return [
+        Case('categories-list GET', 'GET', '/api/v1/categories/', None, 200),
+        Case('categories-list POST', 'POST', '/api/v1/categories/',
+             {'name': 'Новая', 'slug': 'benchmark-new'}, 201),
+        Case('categories-detail DELETE', 'DELETE',
+             f'/api/v1/categories/{category.slug}/', None, 204),
+        Case('genres-list GET', 'GET', '/api/v1/genres/', None, 200),
+        Case('genres-list POST', 'POST', '/api/v1/genres/',
+             {'name': 'Новый', 'slug': 'benchmark-new'}, 201),
+        Case('genres-detail DELETE', 'DELETE',
+             f'/api/v1/genres/{genre.slug}/', None, 204),
+        Case('titles-list GET', 'GET', '/api/v1/titles/', None, 200),
+        Case('titles-list GET genre', 'GET',
+             f'/api/v1/titles/?genre={genre.slug}&year={title.year}',
+             None, 200),
+        Case('titles-list GET fields', 'GET',
+             '/api/v1/titles/?fields=id,name,rating', None, 200),
+        Case('titles-list GET ids', 'GET',
+             '/api/v1/titles/?ids=' + ','.join(map(str, watchlist)),
+             None, 200),
+        Case('titles-list POST', 'POST', '/api/v1/titles/',
+             {'name': 'Новое произведение', 'year': 2000,
+              'category': category.slug, 'genre': [genre.slug]}, 201),
+        Case('titles-facets GET', 'GET',
+             f'/api/v1/titles/facets/?genre={genre.slug}', None, 200),
+        Case('titles-detail GET', 'GET', titles, None, 200),
+        Case('titles-detail GET histogram', 'GET',
+             f'{titles}?score_histogram=1', None, 200),
+        Case('titles-detail PATCH', 'PATCH', titles,
+             {'name': 'Новое название'}, 200),
+        Case('titles-detail DELETE', 'DELETE', titles, None, 204),
+        Case('reviews-list GET', 'GET', reviews, None, 200),
+        Case('reviews-list POST', 'POST', reviews,
+             {'text': 'Отзыв для замеров', 'score': 7}, 201),
+        Case('reviews-detail GET', 'GET', f'{reviews}{review.id}/',
+             None, 200),
+        Case('reviews-detail PATCH', 'PATCH', f'{reviews}{review.id}/',
+             {'score': 3}, 200),
+        Case('reviews-detail DELETE', 'DELETE', f'{reviews}{review.id}/',
+             None, 204),
+        Case('comments-list GET', 'GET', comments, None, 200),
+        Case('comments-list POST', 'POST', comments,
+             {'text': 'Комментарий для замеров'}, 201),
+        Case('comments-detail GET', 'GET',
+             f'{comments}{objects["comment"].id}/', None, 200),
+        Case('comments-detail PATCH', 'PATCH',
+             f'{comments}{objects["comment"].id}/', {'text': 'Новый'}, 200),
+        Case('comments-detail DELETE', 'DELETE',
+             f'{comments}{objects["comment"].id}/', None, 204),
+        Case('users-list GET', 'GET', '/api/v1/users/', None, 200),
+        Case('users-list POST', 'POST', '/api/v1/users/', new_user, 201),
+        Case('users-detail GET', 'GET', f'/api/v1/users/{user.username}/',
+             None, 200),
+        Case('users-detail PATCH', 'PATCH',
+             f'/api/v1/users/{user.username}/', {'bio': 'Новое'}, 200),
+        Case('users-detail DELETE', 'DELETE',
+             f'/api/v1/users/{user.username}/', None, 204),
+        Case('user-reviews-list GET', 'GET',
+             f'/api/v1/users/{review.author.username}/reviews/', None, 200),
+        Case('user-comments-list GET', 'GET',
+             f'/api/v1/users/{objects["comment"].author.username}'
+             '/comments/', None, 200),
+        Case('users-me GET', 'GET', '/api/v1/users/me/', None, 200),
+        Case('users-me PATCH', 'PATCH', '/api/v1/users/me/',
+             {'bio': 'Новое'}, 200),
+        Case('users-me PUT', 'PUT', '/api/v1/users/me/',
+             {'username': admin.username, 'email': admin.email,
+              'bio': 'Новое'}, 200),
+        Case('auth-signup POST', 'POST', '/api/v1/auth/signup/',
+             new_user, 200),
+        Case('auth-token POST', 'POST', '/api/v1/auth/token/',
+             {'username': admin.username,
+              'confirmation_code': get_confirmation_code(admin.username)},
+             200),
+        Case('batch POST', 'POST', '/api/v1/batch/',
+             {'operations': [
+                 {'method': 'GET', 'path': titles},
+                 {'method': 'GET', 'path': f'{reviews}?limit=5'},
+                 {'method': 'GET', 'path': '/api/v1/users/me/'},
+             ]}, 200),
+        Case('moderation-recent GET', 'GET', '/api/v1/moderation/recent/',
+             None, 200),
+        Case('export-reviews GET', 'GET',
+             f'/api/v1/export/reviews/?title={title.id}', None, 200),
+        Case('export-comments GET', 'GET',
+             f'/api/v1/export/comments/?title={title.id}&output=csv',
+             None, 200),
+        Case('profiles GET', 'GET',
+             f'/api/v1/profiles/{objects["profile_id"]}/', None, 200),
+    ]
@@ -0,0 +1,438 @@
+"""
+Нагрузочное тестирование запущенного сервера по Postman-коллекции.
+
+    python -m benchmarks.loadtest --base-url http://127.0.0.1:8000 \\
+        --concurrency 20 --rate 5 --duration 60
+
+Сначала один раз выполняется папка регистрации: коды подтверждения
+и токены пользователей из set_up_data.sh. Затем сессии - остальные
+папки коллекции по порядку - запускаются параллельно, у каждой сессии
+свои переменные коллекции.
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict, namedtuple
+from http import HTTPStatus
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR / 'api_yamdb'))
+sys.path.insert(0, str(BASE_DIR))
+
+from api.utils import get_confirmation_code  # noqa: E402
+from benchmarks.stats import summarize  # noqa: E402
+
+COLLECTION = (BASE_DIR / 'postman_collection'
+              / 'Ymdb-collection.postman_collection.json')
+SETUP_FOLDER = 'registration // No Auth'
+UNIQUE_FIELDS = ('username', 'email', 'slug')
+UNIQUE_STATUSES = (HTTPStatus.OK, HTTPStatus.CREATED)
+STATUS_CODES = {status.phrase: status.value for status in HTTPStatus}
+VARIABLE = re.compile(r'{{\s*([$\w]+)\s*}}')
+EXTRACT = re.compile(
+    r'(?:const|let|var)\s+(\w+)\s*=\s*'
+    r'_\.get\(responseData,\s*["\'](\w+)["\']\)')
+STORE = re.compile(r'collectionVariables\.set\(["\'](\w+)["\'],\s*(\w+)\)')
+EXPECTED = re.compile(r'to\.be\.eql\(\s*["\']([A-Za-z ]+)["\']\s*\)')
+DYNAMIC_VARIABLES = {
+    '$guid': lambda: str(uuid.uuid4()),
+    '$timestamp': lambda: str(int(time.time())),
+    '$randomInt': lambda: str(random.randint(0, 1000)),
+}
+
+PostmanRequest = namedtuple(
+    'PostmanRequest', 'name folder method path body token expected extract')
+
+
+def bearer_token(auth):
+    if not auth or auth.get('type') != 'bearer':
+        return None
+    return next((entry['value'] for entry in auth.get('bearer', ())
+                 if entry['key'] == 'token'), None)
+
+
+def parse_request(item, folders, auth):
+    """
+    Разбирает запрос коллекции. Из тестов Postman берутся ожидаемый
+    статус и переменные, которые сохраняются из ответа.
+    """
+    request = item['request']
+    script = '\n'.join(
+        line for event in item.get('event', ())
+        if event['listen'] == 'test' for line in event['script']['exec']
+    )
+    fields = dict(EXTRACT.findall(script))
+    expected = EXPECTED.search(script)
+    url = request['url']
+    parts = urlsplit(url['raw'] if isinstance(url, dict) else url)
+    body = request.get('body') or {}
+    return PostmanRequest(
+        name=f'{folders[-1]}/{item["name"]}',
+        folder=folders[0],
+        method=request['method'],
+        path=parts.path + (f'?{parts.query}' if parts.query else ''),
+        body=body.get('raw') if body.get('mode') == 'raw' else None,
+        token=bearer_token(request.get('auth') or auth),
+        expected=STATUS_CODES.get(expected.group(1)) if expected else None,
+        extract={variable: fields[local]
+                 for variable, local in STORE.findall(script)
+                 if local in fields},
+    )
+
+
+def load_collection(path=COLLECTION):
+    """Возвращает переменные коллекции и ее запросы по порядку."""
+    with open(path, encoding='utf-8') as collection_file:
+        collection = json.load(collection_file)
+    variables = {variable['key']: variable.get('value', '')
+                 for variable in collection.get('variable', ())}
+    requests = []
+
+    def walk(items, folders, auth):
+        for item in items:
+            item_auth = item.get('auth') or auth
+            if 'item' in item:
+                walk(item['item'], folders + [item['name']], item_auth)
+            else:
+                requests.append(parse_request(item, folders, item_auth))
+
+    walk(collection['item'], [], collection.get('auth'))
+    return variables, requests
+
+
+def fill_confirmation_codes(variables):
+    """
+    Подставляет коды подтверждения пользователей коллекции вместо
+    заглушек: код вычисляется так же, как при регистрации.
+    """
+    for key, value in list(variables.items()):
+        if not key.endswith('ConfirmationCode') or value not in ('', '0'):
+            continue
+        username = variables.get(key.replace('ConfirmationCode', 'Username'))
+        if username:
+            variables[key] = get_confirmation_code(username)
+
+
+def substitute(text, variables, escape=str):
+    """
+    Подставляет {{переменные}} коллекции и динамические переменные,
+    пропуская значения через escape.
+    """
+    def replace(match):
+        name = match.group(1)
+        if name in DYNAMIC_VARIABLES:
+            return escape(DYNAMIC_VARIABLES[name]())
+        if name not in variables:
+            return match.group(0)
+        return escape(str(variables[name]))
+    return VARIABLE.sub(replace, text)
+
+
+def quote_value(value):
+    return quote(value, safe='')
+
+
+def make_unique(body, suffix):
+    """
+    Добавляет суффикс сессии к заданным в коллекции значениям username,
+    email и slug тела запроса, чтобы параллельные сессии не создавали
+    одинаковые объекты. Значения из {{переменных}} не меняются.
+    """
+    try:
+        data = json.loads(body)
+    except ValueError:
+        return body
+    if not isinstance(data, dict):
+        return body
+    for field in UNIQUE_FIELDS:
+        value = data.get(field)
+        if isinstance(value, str) and value and '{{' not in value:
+            name, at, domain = value.partition('@')
+            data[field] = f'{name}-{suffix}{at}{domain}'
+    return json.dumps(data, ensure_ascii=False)
+
+
+class HTTPConnection:
+    """
+    Соединение HTTP/1.1 поверх потоков asyncio. Без keep_alive на каждый
+    запрос открывается новое соединение: runserver отправляет заголовки и
+    тело ответа отдельно, и на постоянном соединении алгоритм Нейгла
+    вместе с отложенным ACK добавляет к каждому ответу ~40 мс.
+    """
+
+    def __init__(self, base_url, keep_alive=False):
+        self.keep_alive = keep_alive
+        parts = urlsplit(base_url)
+        self.ssl = parts.scheme == 'https'
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.ssl else 80)
+        self.reader = self.writer = None
+
+    async def request(self, method, path, headers, body=b''):
+        """Возвращает статус и тело ответа."""
+        reused = self.writer is not None
+        try:
+            return await self.exchange(method, path, headers, body)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            await self.close()
+            if not reused:
+                raise
+        return await self.exchange(method, path, headers, body)
+
+    async def exchange(self, method, path, headers, body):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                self.host, self.port, ssl=self.ssl)
+        lines = [f'{method} {path} HTTP/1.1',
+                 f'Host: {self.host}:{self.port}',
+                 f'Content-Length: {len(body)}']
+        if not self.keep_alive:
+            lines.append('Connection: close')
+        lines.extend(f'{key}: {value}' for key, value in headers.items())
+        self.writer.write(
+            ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError('Сервер закрыл соединение.')
+        version, status = status_line.split()[:2]
+        response_headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            key, _, value = line.decode('latin-1').partition(':')
+            response_headers[key.strip().lower()] = value.strip()
+        status = int(status)
+        keep_alive = (self.keep_alive and version != b'HTTP/1.0'
+                      and response_headers.get(
+                          'connection', '').lower() != 'close')
+        if method == 'HEAD' or status in (204, 304):
+            content = b''
+        elif response_headers.get('transfer-encoding') == 'chunked':
+            content = await self.read_chunked()
+        elif 'content-length' in response_headers:
+            content = await self.reader.readexactly(
+                int(response_headers['content-length']))
+        else:
+            content = await self.reader.read()
+            keep_alive = False
+        if not keep_alive:
+            await self.close()
+        return status, content
+
+    async def read_chunked(self):
+        chunks = []
+        while True:
+            size = int((await self.reader.readline()).split(b';')[0], 16)
+            if not size:
+                await self.reader.readline()
+                return b''.join(chunks)
+            chunks.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            try:
+                await self.writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+        self.reader = self.writer = None
+
+
+class LoadStats:
+    """Время ответа и статусы по именам запросов коллекции."""
+
+    def __init__(self):
+        self.timings = defaultdict(list)
+        self.statuses = defaultdict(Counter)
+        self.unexpected = Counter()
+        self.errors = Counter()
+        self.sessions = 0
+
+    def add(self, request, status, duration):
+        self.timings[request.name].append(duration)
+        self.statuses[request.name][status] += 1
+        if request.expected is not None and status != request.expected:
+            self.unexpected[request.name] += 1
+
+    def report(self, wall_time, order):
+        """Итоги по запросам в порядке коллекции."""
+        rows = {}
+        for name in order:
+            timings = self.timings.get(name)
+            if not timings and not self.errors[name]:
+                continue
+            rows[name] = {
+                'requests': len(timings or ()),
+                'rps': round(len(timings or ()) / wall_time, 2),
+                'unexpected': self.unexpected[name],
+                'errors': self.errors[name],
+                'statuses': dict(self.statuses[name]),
+                **(summarize(timings) if timings else {}),
+            }
+        return rows
+
+
+async def perform(connection, request, variables, stats, suffix=None):
+    """Выполняет запрос коллекции и сохраняет переменные из ответа."""
+    headers = {'Accept': 'application/json',
+               'Content-Type': 'application/json'}
+    if request.token:
+        headers['Authorization'] = (
+            f'Bearer {substitute(request.token, variables)}')
+    body = request.body or ''
+    if suffix is not None and request.expected in UNIQUE_STATUSES:
+        body = make_unique(body, suffix)
+    body = substitute(body, variables)
+    started = time.perf_counter()
+    try:
+        status, content = await connection.request(
+            request.method,
+            substitute(request.path, variables, escape=quote_value),
+            headers, body.encode())
+    except (OSError, asyncio.IncompleteReadError):
+        stats.errors[request.name] += 1
+        return
+    stats.add(request, status, time.perf_counter() - started)
+    if request.extract and status == (request.expected or status):
+        store_variables(request, content, variables)
+
+
+def store_variables(request, content, variables):
+    """Сохраняет поля ответа в переменные, как тесты коллекции."""
+    try:
+        data = json.loads(content)
+    except ValueError:
+        return
+    if isinstance(data, dict):
+        for variable, field in request.extract.items():
+            if field in data:
+                variables[variable] = data[field]
+
+
+async def run_session(base_url, requests, variables, stats, suffix=None,
+                      keep_alive=False):
+    connection = HTTPConnection(base_url, keep_alive)
+    variables = dict(variables)
+    try:
+        for request in requests:
+            await perform(connection, request, variables, stats, suffix)
+    finally:
+        await connection.close()
+    stats.sessions += 1
+    return variables
+
+
+async def run_load(base_url, requests, variables, stats, concurrency,
+                   rate=None, sessions=None, duration=None, keep_alive=False):
+    """
+    Запускает сессии: не больше concurrency одновременно, с
+    пуассоновским потоком rate сессий в секунду или сразу по
+    освобождении места, пока не истечет duration секунд или не
+    будет запущено sessions сессий.
+    """
+    slots = asyncio.Semaphore(concurrency)
+    tasks = set()
+    started = time.perf_counter()
+    number = 0
+    while not (sessions is not None and number >= sessions
+               or duration is not None
+               and time.perf_counter() - started >= duration):
+        await slots.acquire()
+        number += 1
+        task = asyncio.create_task(run_session(
+            base_url, requests, variables, stats, number, keep_alive))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+        task.add_done_callback(lambda _: slots.release())
+        if rate:
+            await asyncio.sleep(random.expovariate(rate))
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - started
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.loadtest',
+        description='Нагрузочное тестирование по Postman-коллекции')
+    parser.add_argument('--base-url', default='http://127.0.0.1:8000',
+                        help='Адрес запущенного сервера')
+    parser.add_argument('--collection', default=COLLECTION,
+                        help='Файл Postman-коллекции')
+    parser.add_argument('--concurrency', type=int, default=10,
+                        help='Количество одновременных сессий')
+    parser.add_argument('--rate', type=float,
+                        help='Частота запуска сессий в секунду')
+    parser.add_argument('--sessions', type=int,
+                        help='Количество сессий')
+    parser.add_argument('--duration', type=float,
+                        help='Длительность нагрузки в секундах')
+    parser.add_argument('--keep-alive', action='store_true',
+                        help='Использовать постоянные соединения')
+    parser.add_argument('--folder', action='append',
+                        help='Папка коллекции для сессий, можно несколько')
+    parser.add_argument('--setup-folder', default=SETUP_FOLDER,
+                        help='Папка, выполняемая один раз перед нагрузкой')
+    parser.add_argument('--var', action='append', default=[],
+                        help='Переменная коллекции в виде ключ=значение')
+    parser.add_argument('--output', help='Файл для результатов в JSON')
+    return parser.parse_args(argv)
+
+
+def print_report(rows, stats, wall_time):
+    print(f'{"запрос":<60} {"кол-во":>7} {"rps":>8} {"p50 мс":>8} '
+          f'{"p95 мс":>8} {"p99 мс":>8} {"статус":>7}')
+    for name, row in rows.items():
+        print(f'{name[:60]:<60} {row["requests"]:>7} {row["rps"]:>8} '
+              f'{row.get("p50_ms", "-"):>8} {row.get("p95_ms", "-"):>8} '
+              f'{row.get("p99_ms", "-"):>8} '
+              f'{row["unexpected"] + row["errors"]:>7}')
+    total = sum(row['requests'] for row in rows.values())
+    print(f'Сессий: {stats.sessions}, запросов: {total}, '
+          f'{total / wall_time:.2f} rps за {wall_time:.1f} с. '
+          f'В столбце «статус» - ответы с неожиданным статусом и ошибки.')
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    variables, requests = load_collection(args.collection)
+    variables.update(item.split('=', 1) for item in args.var)
+    fill_confirmation_codes(variables)
+    setup = [request for request in requests
+             if request.folder == args.setup_folder]
+    load = [request for request in requests
+            if (request.folder in args.folder if args.folder
+                else request.folder != args.setup_folder)]
+    setup_stats = LoadStats()
+    variables = asyncio.run(
+        run_session(args.base_url, setup, variables, setup_stats))
+    if setup_stats.unexpected or setup_stats.errors:
+        print('Подготовка прошла с ошибками, проверьте set_up_data.sh: '
+              + ', '.join(setup_stats.unexpected + setup_stats.errors))
+    sessions = args.sessions
+    if sessions is None and args.duration is None:
+        sessions = args.concurrency
+    stats = LoadStats()
+    wall_time = asyncio.run(run_load(
+        args.base_url, load, variables, stats, args.concurrency,
+        args.rate, sessions, args.duration, args.keep_alive))
+    rows = stats.report(wall_time, dict.fromkeys(
+        request.name for request in load))
+    print_report(rows, stats, wall_time)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(rows, output, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
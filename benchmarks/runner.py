@@ -0,0 +1,121 @@
+import json
+import time
+
+from django.db import connection, transaction
+from django.test import TestCase
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.profiling import RequestStats
+from .stats import TIME_METRICS, summarize
+
+
+GATED_TIME_METRICS = ('p50_ms', 'p95_ms')
+
+
+class BenchmarkError(Exception):
+    """Сценарий замера вернул неожиданный ответ."""
+
+
+def make_client(user):
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+    return client
+
+
+def perform(client, case):
+    """
+    Выполняет запрос сценария в транзакции, которая затем откатывается,
+    чтобы изменяющие запросы не накапливали изменения в наборе данных.
+    Обработчики on_commit, зарегистрированные запросом, выполняются
+    внутри замера: без фиксации транзакции они бы не вызвались, и
+    их время и SQL-запросы не попали бы в результат.
+    Возвращает ответ, время в секундах и количество SQL-запросов.
+    """
+    stats = RequestStats()
+    with transaction.atomic(), connection.execute_wrapper(stats):
+        started = time.perf_counter()
+        with TestCase.captureOnCommitCallbacks(execute=True):
+            response = client.generic(
+                case.method, case.path,
+                json.dumps(case.data) if case.data is not None else '',
+                content_type='application/json'
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+        duration = time.perf_counter() - started
+        transaction.set_rollback(True)
+    if response.status_code != case.status:
+        raise BenchmarkError(
+            f'{case.name}: ожидался статус {case.status}, '
+            f'получен {response.status_code}.')
+    return response, duration, stats.queries
+
+
+def measure(client, case, iterations, warmup=2):
+    """Замеряет сценарий: пропускная способность, перцентили, SQL."""
+    for _ in range(warmup):
+        perform(client, case)
+    timings, queries = [], 0
+    for _ in range(iterations):
+        _, duration, count = perform(client, case)
+        timings.append(duration)
+        queries = max(queries, count)
+    return {
+        'method': case.method,
+        'path': case.path,
+        'requests': iterations,
+        'rps': round(iterations / sum(timings), 2),
+        'queries': queries,
+        **summarize(timings),
+    }
+
+
+def best_of(results):
+    """
+    Сводит повторные замеры сценария: лучшие значения времени и rps.
+    Так единичные задержки машины не попадают в результат.
+    """
+    best = dict(results[0])
+    for result in results[1:]:
+        for metric in TIME_METRICS:
+            best[metric] = min(best[metric], result[metric])
+        best['rps'] = max(best['rps'], result['rps'])
+        best['queries'] = max(best['queries'], result['queries'])
+    return best
+
+
+def compare(results, baseline, tolerance=None, query_tolerance=0,
+            min_delta_ms=0):
+    """
+    Сравнивает результаты с эталоном. Возвращает список регрессий:
+    рост числа SQL-запросов больше query_tolerance, а если задан
+    tolerance — рост p50 и p95 времени ответа или падение пропускной
+    способности больше этой доли. Изменения времени меньше min_delta_ms
+    миллисекунд считаются шумом, p99 слишком шумный для проверки
+    и только записывается.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries'] + query_tolerance:
+            regressions.append(
+                f'{name}: SQL-запросов {result["queries"]}, '
+                f'в эталоне {base["queries"]}')
+        if tolerance is None:
+            continue
+        for metric in GATED_TIME_METRICS:
+            if (result[metric] > base[metric] * (1 + tolerance)
+                    and result[metric] - base[metric] > min_delta_ms):
+                regressions.append(
+                    f'{name}: {metric} {result[metric]}, '
+                    f'в эталоне {base[metric]}')
+        slower_ms = 1000 / result['rps'] - 1000 / base['rps']
+        if (result['rps'] < base['rps'] / (1 + tolerance)
+                and slower_ms > min_delta_ms):
+            regressions.append(
+                f'{name}: rps {result["rps"]}, в эталоне {base["rps"]}')
+    return regressions
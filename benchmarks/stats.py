@@ -0,0 +1,19 @@
+import math
+
+
+PERCENTILES = (50, 95, 99)
+TIME_METRICS = tuple(f'p{percentile}_ms' for percentile in PERCENTILES)
+
+
+def percentile(values, percent):
+    """Перцентиль по методу ближайшего ранга."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def summarize(timings):
+    """Перцентили времени в миллисекундах по замерам в секундах."""
+    return {
+        metric: round(percentile(timings, percent) * 1000, 3)
+        for percent, metric in zip(PERCENTILES, TIME_METRICS)
+    }
@@ -1,8 +1,13 @@
 import os
 import sys
 
+import pytest
+from django.core.cache import cache
 from django.utils.version import get_version
 
+from constants import CACHE_VERSIONS
+from reviews.models import CacheVersion
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(BASE_DIR)
 
@@ -33,3 +38,32 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def test_settings(settings):
+    settings.QUERY_BUDGET_MODE = 'raise'
+    settings.DEFERRED_DELETION = {**settings.DEFERRED_DELETION,
+                                  'BACKGROUND': False}
+
+
+@pytest.fixture(autouse=True)
+def metrics_dir(settings, tmp_path):
+    """Файлы метрик тестов пишутся во временный каталог."""
+    settings.METRICS_DIR = tmp_path / 'metrics'
+    return settings.METRICS_DIR
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+@pytest.fixture(autouse=True)
+def cache_versions(request):
+    """Строки версий кэшей, которые создает миграция, после очистки базы."""
+    if request.node.get_closest_marker('django_db') is None:
+        return
+    CacheVersion.objects.bulk_create(
+        [CacheVersion(name=name, version='') for name in CACHE_VERSIONS],
+        ignore_conflicts=True)
@@ -0,0 +1,72 @@
+from http import HTTPStatus
+
+import pytest
+from reviews.models import Title
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08FastListAPI:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def get_both(self, client, settings, url):
+        settings.FAST_LIST_ENDPOINTS = False
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        settings.FAST_LIST_ENDPOINTS = True
+        fast_response = client.get(url)
+        assert fast_response.status_code == HTTPStatus.OK
+        return response.json(), fast_response.json()
+
+    def test_01_fast_list_matches_serializers(self, client, settings,
+                                              admin_client, admin,
+                                              user_client, user):
+        settings.TITLE_DOCUMENTS = False
+        author_map = {admin: admin_client, user: user_client}
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        Title.objects.create(name='Без категории', year=2000)
+
+        urls = (
+            self.TITLES_URL,
+            f'{self.TITLES_URL}?genre=horror',
+            f'{self.TITLES_URL}?limit=1&offset=1',
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            self.COMMENTS_URL_TEMPLATE.format(
+                title_id=titles[0]['id'], review_id=reviews[0]['id']
+            ),
+        )
+        for url in urls:
+            expected, fast = self.get_both(client, settings, url)
+            assert fast == expected, (
+                f'Проверьте, что быстрый список `{url}` совпадает с ответом '
+                'сериализатора.'
+            )
+
+    def test_02_documents_match_serializers(self, client, settings,
+                                            admin_client, admin,
+                                            user_client, user):
+        settings.FAST_LIST_ENDPOINTS = False
+        author_map = {admin: admin_client, user: user_client}
+        _, _, titles = create_comments(admin_client, author_map)
+        Title.objects.create(name='Без категории', year=2000)
+
+        urls = (
+            self.TITLES_URL,
+            f'{self.TITLES_URL}?genre=horror',
+            f'{self.TITLES_URL}{titles[0]["id"]}/',
+        )
+        for url in urls:
+            settings.TITLE_DOCUMENTS = False
+            expected = client.get(url).json()
+            settings.TITLE_DOCUMENTS = True
+            documents = client.get(url).json()
+            assert documents == expected, (
+                f'Проверьте, что ответ `{url}` из документов произведений '
+                'совпадает с ответом сериализатора.'
+            )
@@ -0,0 +1,91 @@
+from http import HTTPStatus
+
+import pytest
+from reviews.models import Category, Genre, Title
+
+from tests.utils import create_categories, create_genre
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09BulkCreateAPI:
+
+    TITLES_URL = '/api/v1/titles/'
+    GENRES_URL = '/api/v1/genres/'
+    CATEGORIES_URL = '/api/v1/categories/'
+
+    def test_01_bulk_create_genres_and_categories(self, admin_client,
+                                                  user_client):
+        create_genre(admin_client)
+        data = [
+            {'name': 'Вестерн', 'slug': 'western'},
+            {'name': 'Ужасы', 'slug': 'horror'},
+            {'name': 'Мюзикл', 'slug': 'musical'},
+            {'name': 'Мюзикл 2', 'slug': 'musical'},
+        ]
+        response = user_client.post(self.GENRES_URL, data=data,
+                                    format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        response = admin_client.post(self.GENRES_URL, data=data,
+                                     format='json')
+        assert response.status_code == HTTPStatus.MULTI_STATUS, (
+            f'Проверьте, что POST-запрос со списком к `{self.GENRES_URL}` '
+            'с частично некорректными данными возвращает статус 207.'
+        )
+        results = response.json()
+        assert [item['status'] for item in results] == [201, 400, 201, 400]
+        assert results[0]['data'] == data[0]
+        assert 'slug' in results[1]['errors']
+        assert Genre.objects.count() == 5
+
+        data = [{'name': 'Сериал', 'slug': 'series'},
+                {'name': 'Игры', 'slug': 'games'}]
+        response = admin_client.post(self.CATEGORIES_URL, data=data,
+                                     format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        assert [item['data'] for item in response.json()] == data
+        assert Category.objects.count() == 2
+
+    def test_02_bulk_create_titles(self, admin_client,
+                                   django_assert_max_num_queries):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        data = [
+            {
+                'name': f'Произведение {index}',
+                'year': 2000 + index,
+                'genre': [genres[0]['slug'], genres[index % 3]['slug']],
+                'category': categories[index % 2]['slug'],
+            }
+            for index in range(20)
+        ]
+        data.append({'name': 'Без жанра', 'year': 2000, 'genre': [],
+                     'category': categories[0]['slug']})
+        data.append({'name': 'Неизвестный жанр', 'year': 2000,
+                     'genre': ['unknown'],
+                     'category': categories[0]['slug']})
+        with django_assert_max_num_queries(40):
+            response = admin_client.post(self.TITLES_URL, data=data,
+                                         format='json')
+        assert response.status_code == HTTPStatus.MULTI_STATUS
+        results = response.json()
+        assert [item['status'] for item in results[-2:]] == [400, 400]
+        assert 'genre' in results[-1]['errors']
+        assert Title.objects.count() == 20
+
+        created = results[3]['data']
+        assert created['name'] == data[3]['name']
+        assert created['category']['slug'] == data[3]['category']
+        assert [genre['slug'] for genre in created['genre']] == (
+            sorted(set(data[3]['genre']),
+                   key=[genre['slug'] for genre in genres].index)
+        )
+        detail = admin_client.get(f'{self.TITLES_URL}{created["id"]}/')
+        assert detail.json() == created
+
+    def test_03_bulk_create_rejects_oversized_payload(self, admin_client):
+        data = [{'name': 'x', 'slug': f'x{index}'} for index in range(1001)]
+        response = admin_client.post(self.GENRES_URL, data=data,
+                                     format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert not Genre.objects.exists()
@@ -0,0 +1,103 @@
+import csv
+import io
+import json
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from reviews.management.commands.csv_to_db import (changes_fields,
+                                                   get_list_fields_model)
+from reviews.models import Review
+
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10ExportAPI:
+
+    REVIEWS_EXPORT_URL = '/api/v1/export/reviews/'
+    COMMENTS_EXPORT_URL = '/api/v1/export/comments/'
+
+    def test_01_export_permissions(self, client, user_client):
+        for url in (self.REVIEWS_EXPORT_URL, self.COMMENTS_EXPORT_URL):
+            assert client.get(url).status_code == HTTPStatus.UNAUTHORIZED
+            assert user_client.get(url).status_code == HTTPStatus.FORBIDDEN
+
+    def test_02_export_ndjson_and_csv(self, admin_client, admin,
+                                      user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        comments, reviews, titles = create_comments(admin_client, author_map)
+
+        response = admin_client.get(
+            f'{self.REVIEWS_EXPORT_URL}?title={titles[0]["id"]}')
+        assert response.status_code == HTTPStatus.OK
+        assert response.streaming
+        rows = [json.loads(line) for line in
+                b''.join(response.streaming_content).decode().splitlines()]
+        assert [row['id'] for row in rows] == [
+            review['id'] for review in reviews]
+        assert rows[0]['author'] == admin.id
+        assert rows[0]['title_id'] == titles[0]['id']
+
+        response = admin_client.get(
+            f'{self.COMMENTS_EXPORT_URL}?output=csv')
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'].startswith('text/csv')
+        table = list(csv.DictReader(io.StringIO(
+            b''.join(response.streaming_content).decode())))
+        assert [row['text'] for row in table] == [
+            comment['text'] for comment in comments]
+
+        response = admin_client.get(f'{self.REVIEWS_EXPORT_URL}?output=xml')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_03_export_command_round_trips_with_csv_to_db(
+            self, admin_client, admin, user_client, user, tmp_path):
+        author_map = {admin: admin_client, user: user_client}
+        create_comments(admin_client, author_map)
+        expected = list(Review.objects.order_by('id').values_list(
+            'id', 'title_id', 'author_id', 'text', 'score'))
+        export_file = tmp_path / 'review.csv'
+        call_command('export_feedback', 'reviews', output='csv',
+                     file=str(export_file), chunk_size=1,
+                     stdout=io.StringIO())
+
+        with open(export_file, encoding='utf-8') as csv_file:
+            table = list(csv.DictReader(csv_file))
+        Review.objects.all().delete()
+        changes_fields(get_list_fields_model(Review), table)
+        Review.objects.bulk_create(Review(**row) for row in table)
+        assert list(Review.objects.order_by('id').values_list(
+            'id', 'title_id', 'author_id', 'text', 'score')) == expected
+
+    def test_04_deleted_feedback_is_not_exported(self, admin_client, admin,
+                                                 user_client, user,
+                                                 tmp_path):
+        author_map = {admin: admin_client, user: user_client}
+        _, reviews, titles = create_comments(admin_client, author_map)
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+
+        response = admin_client.get(self.REVIEWS_EXPORT_URL)
+        rows = [json.loads(line) for line in
+                b''.join(response.streaming_content).decode().splitlines()]
+        assert [row['id'] for row in rows] == [reviews[0]['id']], (
+            'Проверьте, что отзывы удаленного пользователя не выгружаются.'
+        )
+        response = admin_client.get(self.COMMENTS_EXPORT_URL)
+        rows = [json.loads(line) for line in
+                b''.join(response.streaming_content).decode().splitlines()]
+        assert rows and {row['author'] for row in rows} == {admin.id}
+        assert reviews[1]['id'] not in {row['review_id'] for row in rows}, (
+            'Проверьте, что комментарии к отзывам удаленного пользователя '
+            'не выгружаются.'
+        )
+
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        for model in ('reviews', 'comments'):
+            export_file = tmp_path / f'{model}.ndjson'
+            call_command('export_feedback', model, file=str(export_file),
+                         stdout=io.StringIO())
+            assert export_file.read_text(encoding='utf-8') == '', (
+                'Проверьте, что отзывы и комментарии удаленного '
+                'произведения не выгружаются.'
+            )
@@ -0,0 +1,93 @@
+import io
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from reviews.models import ScoreHistogram
+
+from tests.utils import create_reviews, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11ScoreHistogramAPI:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_histogram(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+            + '?score_histogram=true'
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json()['score_histogram']
+
+    def test_01_histogram_follows_reviews(self, client, admin_client, admin,
+                                          user_client, user, moderator_client,
+                                          moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        title_id = titles[0]['id']
+
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id))
+        assert 'score_histogram' not in response.json(), (
+            'Поле `score_histogram` должно выводиться только по запросу.'
+        )
+        histogram = self.get_histogram(client, title_id)
+        assert histogram['5'] == 3
+        assert sum(histogram.values()) == 3
+        assert self.get_histogram(client, titles[1]['id'])['5'] == 0
+
+        url = self.REVIEW_DETAIL_URL_TEMPLATE.format(
+            title_id=title_id, review_id=reviews[1]['id'])
+        response = user_client.patch(url, data={'score': 8})
+        assert response.status_code == HTTPStatus.OK
+        response = user_client.patch(url, data={'text': 'Новый текст'})
+        assert response.status_code == HTTPStatus.OK
+        response = admin_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=reviews[2]['id'])
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+
+        histogram = self.get_histogram(client, title_id)
+        assert histogram['5'] == 1
+        assert histogram['8'] == 1
+        assert sum(histogram.values()) == 2
+
+        user.delete()
+        assert self.get_histogram(client, title_id)['8'] == 0
+
+    def test_02_rebuild_command(self, client, admin_client, admin,
+                                user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        reviews, titles = create_reviews(admin_client, author_map)
+        expected = self.get_histogram(client, titles[0]['id'])
+        ScoreHistogram.objects.all().delete()
+
+        call_command('rebuild_score_histograms', stdout=io.StringIO())
+        assert self.get_histogram(client, titles[0]['id']) == expected
+        assert ScoreHistogram.objects.count() == 1
+
+    def test_03_change_upserts_row(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        ScoreHistogram.change(title_id, new_score=4)
+        ScoreHistogram.change(title_id, new_score=4)
+        ScoreHistogram.change(title_id, old_score=4, new_score=9)
+        histogram = ScoreHistogram.objects.get(title_id=title_id).as_dict()
+        assert histogram[4] == 1 and histogram[9] == 1, (
+            'Проверьте, что первая оценка создает строку распределения, '
+            'а следующие сдвигают ее счетчики.'
+        )
+        assert sum(histogram.values()) == 2
+        ScoreHistogram.change(title_id, old_score=9)
+        histogram = ScoreHistogram.objects.get(title_id=title_id).as_dict()
+        assert histogram[9] == 0
@@ -0,0 +1,112 @@
+from http import HTTPStatus
+
+import pytest
+from api.throttling import LocalMemoryBucketStore, SQLiteBucketStore
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12ThrottlingAPI:
+
+    URL_SIGNUP = '/api/v1/auth/signup/'
+    URL_TOKEN = '/api/v1/auth/token/'
+
+    @pytest.fixture(params=('local', 'sqlite'))
+    def bucket_store(self, request, settings, tmp_path):
+        rest_framework = dict(settings.REST_FRAMEWORK)
+        rest_framework['DEFAULT_THROTTLE_RATES'] = {
+            'auth_signup': '3/min',
+            'auth_token': '2/min',
+        }
+        settings.REST_FRAMEWORK = rest_framework
+        if request.param == 'local':
+            settings.TOKEN_BUCKET_STORE = {
+                'BACKEND': 'api.throttling.LocalMemoryBucketStore',
+            }
+        else:
+            settings.TOKEN_BUCKET_STORE = {
+                'BACKEND': 'api.throttling.SQLiteBucketStore',
+                'OPTIONS': {'path': tmp_path / 'throttle.sqlite3'},
+            }
+
+    def signup(self, client, index, ip):
+        return client.post(
+            self.URL_SIGNUP,
+            data={'username': f'user{index}',
+                  'email': f'user{index}@yamdb.fake'},
+            REMOTE_ADDR=ip
+        )
+
+    def test_01_signup_limited_by_ip(self, client, bucket_store,
+                                     django_user_model):
+        for index in range(3):
+            response = self.signup(client, index, '10.0.0.1')
+            assert response.status_code == HTTPStatus.OK
+        response = self.signup(client, 3, '10.0.0.1')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что частота POST-запросов к `{self.URL_SIGNUP}` '
+            'с одного IP ограничена.'
+        )
+        assert 'Retry-After' in response
+        assert django_user_model.objects.count() == 3
+        response = self.signup(client, 3, '10.0.0.2')
+        assert response.status_code == HTTPStatus.OK
+
+    def test_02_signup_limited_by_username(self, client, bucket_store):
+        for index in range(3):
+            response = self.signup(client, 0, f'10.0.1.{index}')
+            assert response.status_code == HTTPStatus.OK
+        response = self.signup(client, 0, '10.0.1.100')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            f'Проверьте, что частота POST-запросов к `{self.URL_SIGNUP}` '
+            'для одного username ограничена независимо от IP.'
+        )
+
+    def test_03_token_scope_is_separate(self, client, bucket_store):
+        for _ in range(2):
+            response = client.post(self.URL_TOKEN, data={})
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = client.post(self.URL_TOKEN, data={})
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+        response = self.signup(client, 0, '127.0.0.1')
+        assert response.status_code == HTTPStatus.OK
+
+    def test_04_forwarded_for_is_ignored(self, client, bucket_store):
+        for index in range(4):
+            response = client.post(
+                self.URL_SIGNUP,
+                data={'username': f'user{index}',
+                      'email': f'user{index}@yamdb.fake'},
+                REMOTE_ADDR='10.0.2.1',
+                HTTP_X_FORWARDED_FOR=f'192.168.0.{index}')
+        assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS, (
+            'Проверьте, что подмена заголовка X-Forwarded-For не позволяет '
+            'обойти ограничение по IP.'
+        )
+
+
+@pytest.mark.parametrize('store_class', ('local', 'sqlite'))
+def test_bucket_refills_over_time(store_class, tmp_path):
+    if store_class == 'local':
+        store = LocalMemoryBucketStore()
+    else:
+        store = SQLiteBucketStore(tmp_path / 'throttle.sqlite3')
+    keys = ['scope:ip:1', 'scope:username:user']
+    assert store.consume(keys, 2, 1.0, now=100.0) == 0
+    assert store.consume(keys, 2, 1.0, now=100.0) == 0
+    assert store.consume(keys, 2, 1.0, now=100.0) == pytest.approx(1.0)
+    assert store.consume(keys, 2, 1.0, now=100.5) == pytest.approx(0.5)
+    assert store.consume(keys, 2, 1.0, now=101.0) == 0
+    assert store.consume(['scope:ip:2', 'scope:username:user'],
+                         2, 1.0, now=101.0) > 0
+
+
+def test_local_store_evicts_least_recently_used():
+    store = LocalMemoryBucketStore(max_keys=2)
+    assert store.consume(['a'], 1, 1.0, now=100.0) == 0
+    assert store.consume(['b'], 1, 1.0, now=100.0) == 0
+    assert store.consume(['a'], 1, 1.0, now=100.0) > 0
+    assert store.consume(['c'], 1, 1.0, now=100.0) == 0
+    assert list(store.buckets) == ['a', 'c'], (
+        'Проверьте, что при переполнении удаляется давно не '
+        'использованная корзина.'
+    )
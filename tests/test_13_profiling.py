@@ -0,0 +1,67 @@
+import io
+import json
+import logging
+
+import pytest
+from django.core.management import call_command
+
+from tests.utils import create_reviews
+
+
+@pytest.fixture
+def profile_log(settings, tmp_path):
+    settings.REQUEST_PROFILING = {
+        'SAMPLE_RATE': 1.0,
+        'LOG_FILE': tmp_path / 'request_profile.jsonl',
+    }
+    handler = logging.FileHandler(settings.REQUEST_PROFILING['LOG_FILE'])
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    logger = logging.getLogger('api.profiling')
+    logger.addHandler(handler)
+    yield settings.REQUEST_PROFILING['LOG_FILE']
+    logger.removeHandler(handler)
+    handler.close()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ProfilingAPI:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_server_timing_header(self, client):
+        response = client.get(self.TITLES_URL)
+        assert 'Server-Timing' in response, (
+            'Проверьте, что ответ содержит заголовок `Server-Timing`.'
+        )
+        timing = response['Server-Timing']
+        for metric in ('app;dur=', 'db;dur=', 'serializer;dur='):
+            assert metric in timing
+        assert 'queries' in timing
+
+    def test_02_sampled_log_and_summary(self, client, admin_client, admin,
+                                        profile_log, settings):
+        # Готовые документы произведений отдаются без сериализатора.
+        settings.TITLE_DOCUMENTS = False
+        create_reviews(admin_client, {admin: admin_client})
+        client.get(self.TITLES_URL)
+        client.get(self.TITLES_URL)
+
+        entries = [json.loads(line) for line in
+                   profile_log.read_text(encoding='utf-8').splitlines()]
+        titles_list = [entry for entry in entries
+                       if entry['route'] == 'titles-list'
+                       and entry['method'] == 'GET']
+        assert len(titles_list) == 2
+        entry = titles_list[0]
+        assert entry['status'] == 200
+        assert entry['queries'] >= 2
+        assert entry['serializer_ms'] > 0
+        assert entry['size'] > 0
+        assert {'reviews-list', 'titles-list'} <= {
+            entry['route'] for entry in entries}
+
+        out = io.StringIO()
+        call_command('profile_summary', file=str(profile_log), stdout=out)
+        summary = out.getvalue()
+        assert 'titles-list' in summary
+        assert 'p99' in summary
@@ -0,0 +1,132 @@
+import multiprocessing
+from http import HTTPStatus
+
+import pytest
+from api import metrics
+from constants import LATENCY_BUCKETS
+
+
+def increment_in_child():
+    metrics.increment('api_emails_sent_total', 2)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14MetricsAPI:
+
+    METRICS_URL = '/metrics'
+
+    def get_metrics(self, client):
+        response = client.get(self.METRICS_URL)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Эндпоинт `{self.METRICS_URL}` не найден.'
+        )
+        assert response['Content-Type'].startswith('text/plain')
+        return dict(
+            line.rsplit(' ', 1) for line in response.content.decode()
+            .splitlines() if not line.startswith('#')
+        )
+
+    def test_01_request_and_auth_metrics(self, client, metrics_dir):
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        client.post('/api/v1/auth/signup/', data={
+            'username': 'metrics', 'email': 'metrics@yamdb.fake'})
+        client.post('/api/v1/auth/token/', data={
+            'username': 'metrics',
+            'confirmation_code': 'wrong'
+        })
+
+        values = self.get_metrics(client)
+        labels = 'view="TitleViewSet",method="GET"'
+        assert float(values[
+            f'api_requests_total{{status="200",{labels}}}']) == 2
+        assert float(values[
+            f'api_request_duration_seconds_bucket{{le="+Inf",{labels}}}'
+        ]) == 2
+        assert float(values[
+            f'api_request_duration_seconds_count{{{labels}}}']) == 2
+        assert float(values[f'api_db_queries_total{{{labels}}}']) >= 2
+        assert float(values['api_signups_total']) == 1
+        assert float(values['api_emails_sent_total']) == 1
+        assert 'api_tokens_issued_total' not in values
+        assert int(values['process_resident_memory_bytes']) > 0
+
+    def test_02_metrics_aggregate_across_processes(self, client,
+                                                   metrics_dir):
+        metrics.increment('api_emails_sent_total')
+        process = multiprocessing.get_context('fork').Process(
+            target=increment_in_child)
+        process.start()
+        process.join()
+        assert len(list(metrics_dir.glob('metrics_*.db'))) == 2
+        values = self.get_metrics(client)
+        assert float(values['api_emails_sent_total']) == 3
+
+    def test_03_dead_process_files_are_merged(self, client, metrics_dir,
+                                              monkeypatch):
+        process = multiprocessing.get_context('fork').Process(
+            target=increment_in_child)
+        process.start()
+        process.join()
+        child_file = metrics_dir / f'metrics_{process.pid}.db'
+        assert child_file.exists()
+        monkeypatch.setattr(metrics, '_values_pid', None)
+        metrics.increment('api_emails_sent_total')
+        assert not child_file.exists(), (
+            'Проверьте, что файлы значений завершенных процессов удаляются.'
+        )
+        assert (metrics_dir / metrics.ARCHIVE_FILE).exists()
+        values = self.get_metrics(client)
+        assert float(values['api_emails_sent_total']) == 3, (
+            'Проверьте, что значения завершенных процессов сохраняются.'
+        )
+
+    def test_04_histogram_buckets_are_ordered(self, client, metrics_dir):
+        metrics.observe_request('TitleViewSet', 'GET', 200, 0.3, 1, 0.01)
+        metrics.observe_request('ReviewViewSet', 'GET', 200, 0.02, 1, 0.01)
+        lines = [line.rsplit(' ', 1)[0] for line in client.get(
+            self.METRICS_URL).content.decode().splitlines()
+            if line.startswith('api_request_duration_seconds')]
+        expected = []
+        for view in ('ReviewViewSet', 'TitleViewSet'):
+            labels = f'view="{view}",method="GET"'
+            expected += [
+                f'api_request_duration_seconds_bucket{{le="{bucket}",'
+                f'{labels}}}' for bucket in LATENCY_BUCKETS + ('+Inf',)]
+            expected += [f'api_request_duration_seconds_sum{{{labels}}}',
+                         f'api_request_duration_seconds_count{{{labels}}}']
+        assert lines == expected, (
+            'Проверьте, что корзины гистограммы выводятся по возрастанию '
+            'границы до +Inf, затем сумма и количество.'
+        )
+
+    def test_05_access_is_restricted(self, client, settings, metrics_dir):
+        outside = {'REMOTE_ADDR': '203.0.113.5'}
+        assert client.get(self.METRICS_URL, **outside).status_code == (
+            HTTPStatus.FORBIDDEN), (
+            'Проверьте, что метрики недоступны с адресов не из '
+            "METRICS_ACCESS['ALLOWED_IPS']."
+        )
+        settings.METRICS_ACCESS = {**settings.METRICS_ACCESS,
+                                   'TOKEN': 'secret'}
+        assert client.get(self.METRICS_URL, **outside,
+                          HTTP_AUTHORIZATION='Bearer wrong').status_code == (
+            HTTPStatus.FORBIDDEN)
+        assert client.get(self.METRICS_URL, **outside,
+                          HTTP_AUTHORIZATION='Bearer secret').status_code == (
+            HTTPStatus.OK)
+
+
+def test_mmap_values_grow_and_reload(tmp_path):
+    path = str(tmp_path / 'metrics_1.db')
+    values = metrics.MmapValues(path, size=64)
+    for index in range(100):
+        values.add(f'metric{{index="{index}"}}', index)
+    values.add('metric{index="5"}', 0.5)
+    reloaded = metrics.MmapValues(path)
+    reloaded.add('metric{index="7"}')
+    totals = {key: value for key, _, value in
+              metrics.iterate_entries(reloaded.mmap, reloaded.used)}
+    assert len(totals) == 100
+    assert totals['metric{index="5"}'] == 5.5
+    assert totals['metric{index="7"}'] == 8
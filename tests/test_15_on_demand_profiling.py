@@ -0,0 +1,60 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def profile_dir(settings, tmp_path):
+    settings.REQUEST_PROFILING = dict(
+        settings.REQUEST_PROFILING, PROFILE_DIR=tmp_path / 'profiles')
+    return settings.REQUEST_PROFILING['PROFILE_DIR']
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15OnDemandProfilingAPI:
+
+    TITLES_URL = '/api/v1/titles/?genre=horror'
+
+    def test_01_admin_gets_profile(self, admin_client, profile_dir):
+        create_titles(admin_client)
+        response = admin_client.get(self.TITLES_URL, HTTP_X_PROFILE='1')
+        assert response.status_code == HTTPStatus.OK
+        assert 'X-Profile-Id' in response, (
+            'Проверьте, что запрос администратора с заголовком `X-Profile` '
+            'профилируется.'
+        )
+        assert len(response.json()['results']) == 1
+
+        report = admin_client.get(response['X-Profile-Url'])
+        assert report.status_code == HTTPStatus.OK
+        report = report.json()
+        assert report['route'] == 'titles-list'
+        assert report['functions']
+        assert all('cumtime_ms' in item for item in report['functions'])
+        selects = [query for query in report['queries']
+                   if query['sql'].startswith('SELECT')]
+        assert selects
+        assert all(query['plan'] for query in selects)
+
+        response = admin_client.get(
+            '/api/v1/titles/?genre=horror&profile=1')
+        assert 'X-Profile-Id' in response
+
+    def test_02_profile_only_for_admin(self, client, admin_client,
+                                       user_client, profile_dir):
+        for api_client in (client, user_client):
+            response = api_client.get(self.TITLES_URL, HTTP_X_PROFILE='1')
+            assert response.status_code == HTTPStatus.OK
+            assert 'X-Profile-Id' not in response
+        response = admin_client.get(self.TITLES_URL)
+        assert 'X-Profile-Id' not in response
+        assert not profile_dir.exists()
+
+        response = user_client.get(
+            '/api/v1/profiles/' + '0' * 32 + '/')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+        response = admin_client.get(
+            '/api/v1/profiles/' + '0' * 32 + '/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
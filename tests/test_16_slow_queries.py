@@ -0,0 +1,53 @@
+import io
+
+import pytest
+from api.slow_queries import fingerprint, get_slow_query_store, normalize
+from django.core.management import call_command
+
+from tests.utils import create_titles
+
+
+@pytest.fixture
+def slow_query_log(settings, tmp_path):
+    settings.SLOW_QUERY_LOG = {
+        'THRESHOLD_MS': 0,
+        'PATH': tmp_path / 'slow_queries.sqlite3',
+    }
+    return get_slow_query_store()
+
+
+def test_fingerprint_ignores_literals_and_in_lists():
+    first = normalize(
+        'SELECT * FROM "reviews_title" WHERE "id" IN (%s, %s, %s) '
+        "AND name = 'a'  LIMIT 21")
+    second = normalize(
+        'SELECT * FROM "reviews_title"\n WHERE "id" IN (%s) '
+        "AND name = 'other' LIMIT 10")
+    assert first == second
+    assert fingerprint(first) == fingerprint(second)
+    assert 'score_1' in normalize('SELECT "score_1" FROM t')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16SlowQueryLogAPI:
+
+    def test_01_slow_queries_are_grouped(self, client, admin_client,
+                                         slow_query_log):
+        create_titles(admin_client)
+        slow_query_log.clear()
+        client.get('/api/v1/titles/?genre=horror')
+        client.get('/api/v1/titles/?genre=drama')
+
+        rows = slow_query_log.top('count', 100)
+        titles_list = [row for row in rows if row[1] == 'titles-list']
+        assert titles_list, (
+            'Проверьте, что медленные запросы записываются с маршрутом API.'
+        )
+        assert all(row[4] == 2 for row in titles_list)
+        selects = [row for row in titles_list
+                   if row[2].startswith('SELECT')]
+        assert selects and all(row[3] for row in selects)
+
+        out = io.StringIO()
+        call_command('slow_queries', plan=True, order='count', stdout=out)
+        assert 'titles-list' in out.getvalue()
@@ -0,0 +1,54 @@
+import csv
+import io
+import os
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+from reviews.models import Comment, Review, ScoreHistogram, Title
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17GenerateData:
+
+    def test_01_generate_data(self, tmp_path):
+        call_command(
+            'generate_data', users=20, categories=2, genres=4, titles=10,
+            reviews=100, comments=30, csv_dir=str(tmp_path),
+            stdout=io.StringIO()
+        )
+        assert Title.objects.count() == 10
+        assert Review.objects.count() == 100, (
+            'Проверьте, что generate_data создает заданное число отзывов.'
+        )
+        assert Comment.objects.count() == 30
+        assert not Review.objects.values('title', 'author').annotate(
+            total=Count('id')).filter(total__gt=1).exists(), (
+            'Проверьте, что автор оставляет не больше одного отзыва '
+            'на произведение.'
+        )
+        counts = list(Title.objects.annotate(total=Count('reviews'))
+                      .order_by('id').values_list('total', flat=True))
+        assert counts[0] > counts[-1], (
+            'Проверьте, что отзывы распределены неравномерно.'
+        )
+        histogram = ScoreHistogram.objects.get(title_id=Title.objects.first())
+        assert sum(histogram.as_dict().values()) == counts[0]
+
+        with open(os.path.join(tmp_path, 'review.csv'),
+                  encoding='utf-8') as review_file:
+            rows = list(csv.DictReader(review_file))
+        assert len(rows) == 100
+        assert set(rows[0]) == {
+            'id', 'title_id', 'text', 'author', 'score', 'pub_date'}
+
+    def test_02_generate_csv_only(self, tmp_path):
+        call_command(
+            'generate_data', users=5, titles=3, reviews=10, comments=5,
+            csv_dir=str(tmp_path), no_db=True, stdout=io.StringIO()
+        )
+        assert not Review.objects.exists()
+        assert sorted(os.listdir(tmp_path)) == sorted([
+            'users.csv', 'category.csv', 'genre.csv', 'titles.csv',
+            'genre_title.csv', 'review.csv', 'comments.csv'
+        ])
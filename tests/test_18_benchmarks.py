@@ -0,0 +1,62 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from benchmarks.cases import benchmark_objects, build_cases, uncovered_routes
+from benchmarks.runner import compare, make_client, measure, perform
+from tests.utils import create_comments
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18BenchmarksAPI:
+
+    def test_01_cases_cover_api_routes(self, settings, tmp_path,
+                                       admin_client, admin, user_client,
+                                       user):
+        settings.REQUEST_PROFILING = dict(
+            settings.REQUEST_PROFILING, PROFILE_DIR=tmp_path)
+        create_comments(admin_client, {admin: admin_client,
+                                       user: user_client})
+        objects = benchmark_objects()
+        cases = build_cases(objects)
+        assert not uncovered_routes(cases), (
+            'Добавьте в benchmarks/cases.py сценарии замера для всех '
+            'маршрутов api/urls.py.'
+        )
+        client = make_client(objects['admin'])
+        for case in cases:
+            result = measure(client, case, iterations=1, warmup=0)
+            assert result['queries'] > 0
+
+    def test_02_on_commit_is_measured(self, admin_client, admin):
+        create_comments(admin_client, {admin: admin_client})
+        objects = benchmark_objects()
+        case = next(case for case in build_cases(objects)
+                    if case.name == 'categories-list POST')
+        with CaptureQueriesContext(connection) as context:
+            perform(make_client(objects['admin']), case)
+        bumps = [query for query in context.captured_queries
+                 if query['sql'].startswith('UPDATE')
+                 and 'reviews_cacheversion' in query['sql']]
+        assert bumps, (
+            'Проверьте, что обработчики on_commit выполняются внутри замера.'
+        )
+
+
+def test_compare_reports_regressions():
+    baseline = {
+        'titles-list GET': {'queries': 3, 'rps': 100.0, 'p50_ms': 10.0,
+                            'p95_ms': 20.0, 'p99_ms': 30.0},
+    }
+    same = {'titles-list GET': dict(baseline['titles-list GET'])}
+    assert compare(same, baseline, tolerance=0.25) == []
+    n_plus_one = {'titles-list GET': dict(baseline['titles-list GET'],
+                                          queries=23)}
+    assert len(compare(n_plus_one, baseline, tolerance=0.25)) == 1
+    slower = {'titles-list GET': dict(baseline['titles-list GET'],
+                                      p95_ms=40.0, rps=50.0)}
+    assert len(compare(slower, baseline, tolerance=0.25)) == 2
+    assert compare(slower, baseline) == [], (
+        'Проверьте, что без tolerance время ответа не сравнивается.'
+    )
+    assert compare({'new GET': same['titles-list GET']}, baseline, 0) == []
@@ -0,0 +1,72 @@
+import asyncio
+import json
+
+import pytest
+
+from benchmarks.loadtest import (SETUP_FOLDER, LoadStats,
+                                 fill_confirmation_codes, load_collection,
+                                 make_unique, quote_value, run_load,
+                                 run_session, substitute)
+
+SET_UP_USERS = (
+    ('superuser', 'superuser@admin.ru', 'user', True),
+    ('admin-user', 'admin-user@admin.ru', 'admin', False),
+    ('moderator', 'moderator@admin.ru', 'moderator', False),
+)
+
+
+def test_collection_is_parsed():
+    variables, requests = load_collection()
+    fill_confirmation_codes(variables)
+    assert variables['adminConfirmationCode'] != '0'
+    token = next(request for request in requests
+                 if request.name == 'get_tokens/get_token_for_admin')
+    assert token.expected == 200
+    assert token.extract == {'adminToken': 'token'}
+    inherited = [request for request in requests
+                 if request.name.startswith('create_title_bad_requests/')]
+    assert inherited and all(
+        request.token == '{{adminToken}}' for request in inherited)
+    assert any(request.folder == SETUP_FOLDER for request in requests)
+
+
+def test_substitution_and_unique_values():
+    variables = {'name': 'Admin Title', 'slug': 'admin-slug'}
+    assert substitute('/titles/?name={{name}}', variables,
+                      escape=quote_value) == '/titles/?name=Admin%20Title'
+    assert substitute('{{missing}}', variables) == '{{missing}}'
+    body = make_unique(json.dumps({
+        'username': 'user', 'email': 'user@yamdb.fake',
+        'slug': '{{slug}}', 'name': 'name'}), 7)
+    assert json.loads(body) == {
+        'username': 'user-7', 'email': 'user-7@yamdb.fake',
+        'slug': '{{slug}}', 'name': 'name'}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_collection_replay(live_server, django_user_model, settings):
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    for username, email, role, is_superuser in SET_UP_USERS:
+        django_user_model.objects.create_user(
+            username=username, email=email, role=role,
+            is_superuser=is_superuser, is_staff=is_superuser)
+    variables, requests = load_collection()
+    fill_confirmation_codes(variables)
+    setup = [request for request in requests
+             if request.folder == SETUP_FOLDER]
+    load = [request for request in requests
+            if request.folder != SETUP_FOLDER]
+
+    setup_stats, stats = LoadStats(), LoadStats()
+    variables = asyncio.run(
+        run_session(live_server.url, setup, variables, setup_stats))
+    asyncio.run(run_load(live_server.url, load, variables, stats,
+                         concurrency=1, sessions=2))
+
+    assert not setup_stats.unexpected and not setup_stats.errors
+    assert stats.sessions == 2
+    assert not stats.errors
+    assert not stats.unexpected, (
+        'Проверьте, что запросы Postman-коллекции возвращают ожидаемые '
+        f'статусы: {dict(stats.unexpected)}'
+    )
@@ -0,0 +1,110 @@
+import logging
+
+import pytest
+from api.query_budget import QueryBudgetExceeded
+from api.views import TitleViewSet
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Comment, Review, Title
+
+from tests.utils import create_comments, create_titles
+
+
+def count_queries(client, url, data=None):
+    with CaptureQueriesContext(connection) as context:
+        if data is None:
+            response = client.get(url)
+        else:
+            response = client.post(url, data=data, format='json')
+    assert response.status_code in (200, 201)
+    return len(context)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20QueryBudgetAPI:
+
+    def test_01_lists_do_not_grow_with_data(self, admin_client, admin,
+                                            user_client, user,
+                                            moderator_client, moderator,
+                                            django_user_model):
+        authors_map = {admin: admin_client, user: user_client,
+                       moderator: moderator_client}
+        _, reviews, titles = create_comments(admin_client, authors_map)
+        title_id, review_id = titles[0]['id'], reviews[0]['id']
+        urls = (
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{review_id}/comments/',
+        )
+        before = [count_queries(admin_client, url) for url in urls]
+        title = Title.objects.get(pk=title_id)
+        review = Review.objects.get(pk=review_id)
+        for idx in range(3):
+            author = django_user_model.objects.create_user(
+                username=f'budget{idx}', email=f'budget{idx}@yamdb.fake')
+            new_title = Title.objects.create(
+                name=f'Новое {idx}', year=2000, category=title.category)
+            new_title.genre.set(title.genre.all())
+            Review.objects.create(title=title, author=author, text='Отзыв',
+                                  score=idx + 1)
+            Comment.objects.create(review=review, author=author,
+                                   text='Комментарий')
+        after = [count_queries(admin_client, url) for url in urls]
+        assert before == after, (
+            'Проверьте, что количество SQL-запросов списков произведений, '
+            'отзывов и комментариев не зависит от количества объектов.'
+        )
+
+    def test_02_title_create_does_not_depend_on_genres(self, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        data = {'name': 'Новое', 'year': 2000,
+                'category': categories[0]['slug']}
+        one = count_queries(admin_client, '/api/v1/titles/',
+                            {**data, 'genre': [genres[0]['slug']]})
+        many = count_queries(admin_client, '/api/v1/titles/',
+                             {**data, 'genre': [genre['slug']
+                                                for genre in genres]})
+        assert one == many, (
+            'Проверьте, что количество SQL-запросов при создании '
+            'произведения не зависит от количества жанров.'
+        )
+
+    def test_03_writes_stay_within_budgets(self, admin_client, user_client):
+        titles, categories, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                f'/api/v1/titles/{title_id}/reviews/',
+                data={'text': 'Отзыв', 'score': 5}, format='json')
+        assert response.status_code == 201
+        title_queries = [
+            query for query in context.captured_queries
+            if query['sql'].startswith('SELECT "reviews_title"."id"')
+            and 'AVG' not in query['sql']
+        ]
+        assert len(title_queries) == 1, (
+            'Проверьте, что произведение нового отзыва загружается один раз.'
+        )
+        response = admin_client.delete(
+            f'/api/v1/categories/{categories[0]["slug"]}/')
+        assert response.status_code == 204
+        response = admin_client.delete(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == 204
+
+    def test_04_exceeded_budget_raises(self, client, admin_client,
+                                       monkeypatch):
+        create_titles(admin_client)
+        monkeypatch.setattr(TitleViewSet, 'query_budgets', {'list': 1})
+        with pytest.raises(QueryBudgetExceeded, match='titles-list'):
+            client.get('/api/v1/titles/')
+
+    def test_05_exceeded_budget_is_logged(self, client, admin_client,
+                                          monkeypatch, settings, caplog):
+        create_titles(admin_client)
+        monkeypatch.setattr(TitleViewSet, 'query_budgets', {'list': 1})
+        settings.QUERY_BUDGET_MODE = 'log'
+        with caplog.at_level(logging.WARNING, logger='api.query_budget'):
+            response = client.get('/api/v1/titles/')
+        assert response.status_code == 200
+        assert 'titles-list' in caplog.text
+        assert 'SELECT' in caplog.text
@@ -0,0 +1,98 @@
+from itertools import combinations
+
+import pytest
+from api.filters import TitleFilter
+from api.profiling import explain
+from api.views import TitleViewSet
+from django.db import connection
+
+from tests.utils import create_titles
+
+# Количество строк и среднее число строк на значение столбца
+# для таблиц с 1M произведений.
+TABLE_STATS = {
+    'reviews_title': (1000000, {'id': 1, 'name': 2, 'year': 8000,
+                                'category_id': 100000}),
+    'reviews_title_genre': (2000000, {'id': 1, 'title_id': 2,
+                                      'genre_id': 66000}),
+    'reviews_review': (10000000, {'id': 1, 'title_id': 10,
+                                  'author_id': 1000}),
+    'reviews_genre': (30, {'id': 1, 'slug': 1}),
+    'reviews_category': (10, {'id': 1, 'slug': 1}),
+}
+LARGE_TABLES = ('reviews_title', 'reviews_title_genre', 'reviews_review')
+
+
+def index_stat(rows, averages, columns):
+    stat, current = [rows], rows
+    for column in columns:
+        current = min(current, averages.get(column, rows))
+        stat.append(max(1, current))
+    return ' '.join(str(value) for value in stat)
+
+
+@pytest.fixture
+def million_titles_stats():
+    """Подменяет статистику планировщика SQLite на 1M произведений."""
+    if connection.vendor != 'sqlite':
+        pytest.skip('Статистика подменяется только для SQLite.')
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+        cursor.execute('DELETE FROM sqlite_stat1')
+        for table, (rows, averages) in TABLE_STATS.items():
+            cursor.execute(f'PRAGMA index_list("{table}")')
+            for index in [row[1] for row in cursor.fetchall()]:
+                cursor.execute(f'PRAGMA index_info("{index}")')
+                columns = [row[2] for row in cursor.fetchall()]
+                cursor.execute(
+                    'INSERT INTO sqlite_stat1 VALUES (%s, %s, %s)',
+                    [table, index, index_stat(rows, averages, columns)])
+        cursor.execute('ANALYZE sqlite_master')
+    yield
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM sqlite_stat1')
+        cursor.execute('ANALYZE sqlite_master')
+
+
+def full_scans(queryset):
+    sql, params = queryset.query.sql_with_params()
+    return [line for line in explain(sql, params)
+            if line.startswith('SCAN')
+            and any(f'SCAN {table}' in line.split(' USING')[0]
+                    for table in LARGE_TABLES)]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21TitleFilterPlansAPI:
+
+    def test_01_filters_use_indexes(self, admin_client,
+                                    million_titles_stats):
+        titles, categories, genres = create_titles(admin_client)
+        values = {
+            'name': titles[0]['name'],
+            'name_prefix': titles[0]['name'][:3],
+            'year': titles[0]['year'],
+            'category': categories[0]['slug'],
+            'genre': genres[0]['slug'],
+        }
+        for size in range(1, len(values) + 1):
+            for names in combinations(values, size):
+                params = {name: values[name] for name in names}
+                queryset = TitleFilter(
+                    params, queryset=TitleViewSet.queryset).qs
+                assert not full_scans(queryset), (
+                    f'Проверьте, что фильтр произведений {names} '
+                    'использует индексы, а не полный просмотр таблицы: '
+                    f'{explain(*queryset.query.sql_with_params())}'
+                )
+
+    def test_02_name_prefix(self, client, admin_client):
+        create_titles(admin_client)
+        response = client.get('/api/v1/titles/?name_prefix=Терм')
+        names = [title['name'] for title in response.json()['results']]
+        assert names == ['Терминатор'], (
+            'Проверьте, что параметр `name_prefix` отбирает произведения '
+            'по началу названия.'
+        )
+        response = client.get('/api/v1/titles/?name_prefix=терм')
+        assert response.json()['count'] == 0
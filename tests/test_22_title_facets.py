@@ -0,0 +1,101 @@
+import pytest
+from api.facets import VERSION_NAME
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from reviews.models import CacheVersion, Title
+
+from tests.utils import create_titles
+
+FACETS_URL = '/api/v1/titles/facets/'
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22TitleFacetsAPI:
+
+    def test_01_facet_counts(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = client.get(FACETS_URL)
+        assert response.status_code == 200
+        data = response.json()
+        assert data['year'] == [{'year': 1988, 'count': 1},
+                                {'year': 1984, 'count': 1}]
+        assert {item['slug']: item['count'] for item in data['genre']} == {
+            genre['slug']: 1 for genre in genres}
+        assert {item['slug']: item['count']
+                for item in data['category']} == {
+            categories[0]['slug']: 1, categories[1]['slug']: 1}
+
+    def test_02_facets_follow_other_filters(self, client, admin_client):
+        titles, categories, genres = create_titles(admin_client)
+        response = client.get(
+            f'{FACETS_URL}?genre={genres[2]["slug"]}&facets=genre,year')
+        data = response.json()
+        assert set(data) == {'genre', 'year'}
+        assert data['year'] == [{'year': titles[1]['year'], 'count': 1}], (
+            'Проверьте, что фасет учитывает фильтры по другим полям.'
+        )
+        assert len(data['genre']) == 3, (
+            'Проверьте, что фасет не учитывает фильтр по самому фасету.'
+        )
+
+    def test_03_cache_is_invalidated(self, client, admin_client,
+                                     django_assert_max_num_queries):
+        titles, categories, genres = create_titles(admin_client)
+        url = f'{FACETS_URL}?facets=year'
+        client.get(url)
+        with django_assert_max_num_queries(1):
+            cached = client.get(url).json()
+        assert len(cached['year']) == 2
+
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        assert client.get(url).json()['year'] == [
+            {'year': titles[1]['year'], 'count': 1}], (
+            'Проверьте, что кэш фасетов сбрасывается при изменении '
+            'произведений.'
+        )
+        admin_client.post('/api/v1/titles/', data=[{
+            'name': 'Новое', 'year': 2001, 'genre': [genres[0]['slug']],
+            'category': categories[0]['slug']}], format='json')
+        assert len(client.get(url).json()['year']) == 2
+
+    def test_04_unknown_facet(self, client, admin_client):
+        response = client.get(f'{FACETS_URL}?facets=genre,author')
+        assert response.status_code == 400
+        assert 'facets' in response.json()
+        response = client.get(f'{FACETS_URL}?year=abc')
+        assert response.status_code == 400
+
+    def test_05_versions_are_shared(self, client, admin_client):
+        create_titles(admin_client)
+        url = f'{FACETS_URL}?facets=year'
+        assert len(client.get(url).json()['year']) == 2
+        Title.objects.bulk_create([Title(name='Новое', year=2001)])
+        assert len(client.get(url).json()['year']) == 2
+        CacheVersion.objects.filter(name=VERSION_NAME).update(version='old')
+        assert len(client.get(url).json()['year']) == 3, (
+            'Проверьте, что версия кэша фасетов берется из базы и сброс, '
+            'сделанный другим процессом, виден в этом процессе.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            with transaction.atomic():
+                CacheVersion.bump_on_commit(VERSION_NAME)
+                CacheVersion.bump_on_commit('slug-cache:reviews.genre')
+                CacheVersion.bump_on_commit(VERSION_NAME)
+        updates = [query for query in context.captured_queries
+                   if query['sql'].startswith('UPDATE')]
+        assert len(updates) == 1, (
+            'Проверьте, что версии кэшей, измененных в транзакции, '
+            'меняются одним запросом.'
+        )
+
+    def test_06_facets_are_counted_in_one_query(self, client, admin_client):
+        _, _, genres = create_titles(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(f'{FACETS_URL}?genre={genres[0]["slug"]}')
+        assert response.status_code == 200
+        counts = [query for query in context.captured_queries
+                  if 'COUNT(' in query['sql']]
+        assert len(counts) == 1 and 'UNION ALL' in counts[0]['sql'], (
+            'Проверьте, что все фасеты считаются одним запросом UNION ALL.'
+        )
+
@@ -0,0 +1,102 @@
+import pytest
+from api.slug_cache import resolve_slugs, version_name
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import CacheVersion, Genre
+
+from tests.utils import create_titles
+
+
+def slug_lookups(context):
+    return [query['sql'] for query in context.captured_queries
+            if 'FROM "reviews_genre"' in query['sql']
+            and 'reviews_title_genre' not in query['sql']
+            or 'FROM "reviews_category"' in query['sql']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23SlugCacheAPI:
+
+    def test_01_title_write_does_not_query_slugs(self, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        data = {'name': 'Новое', 'year': 2000,
+                'genre': [genre['slug'] for genre in genres],
+                'category': categories[0]['slug']}
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data,
+                                         format='json')
+        assert response.status_code == 201
+        assert response.json()['category'] == {
+            'name': categories[0]['name'], 'slug': categories[0]['slug']}
+        assert not slug_lookups(context), (
+            'Проверьте, что жанры и категории произведения находятся по slug '
+            'без запросов к базе.'
+        )
+
+    def test_02_changes_are_visible(self, admin_client):
+        _, categories, genres = create_titles(admin_client)
+        admin_client.post('/api/v1/genres/',
+                          data={'name': 'Новый', 'slug': 'new-genre'})
+        data = {'name': 'Новое', 'year': 2000, 'genre': ['new-genre'],
+                'category': categories[0]['slug']}
+        response = admin_client.post('/api/v1/titles/', data=data,
+                                     format='json')
+        assert response.status_code == 201, (
+            'Проверьте, что новый жанр сразу доступен при создании '
+            'произведения.'
+        )
+        admin_client.delete('/api/v1/genres/new-genre/')
+        response = admin_client.post('/api/v1/titles/', data=data,
+                                     format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что удаленный жанр нельзя указать у произведения.'
+        )
+        assert 'genre' in response.json()
+
+    def test_03_shared_version_reloads_map(self, admin_client):
+        _, _, genres = create_titles(admin_client)
+        slug = genres[0]['slug']
+        assert resolve_slugs(Genre, [slug])[slug].name == genres[0]['name']
+        Genre.objects.filter(slug=slug).update(name='Из другого процесса')
+        assert resolve_slugs(Genre, [slug])[slug].name == genres[0]['name']
+        CacheVersion.bump(version_name(Genre))
+        assert resolve_slugs(Genre, [slug])[slug].name == (
+            'Из другого процесса')
+
+    def test_04_stale_slug_is_rejected(self, admin_client):
+        _, categories, _ = create_titles(admin_client)
+        for slug in ('deleted', 'lost'):
+            admin_client.post('/api/v1/genres/',
+                              data={'name': slug, 'slug': slug})
+        resolve_slugs(Genre, ['deleted', 'lost'])
+        genres = Genre.objects.filter(slug__in=('deleted', 'lost'))
+        genres._raw_delete(genres.db)
+        CacheVersion.bump(version_name(Genre))
+        data = {'name': 'Новое', 'year': 2000, 'genre': ['deleted'],
+                'category': categories[0]['slug']}
+        response = admin_client.post('/api/v1/titles/', data=data,
+                                     format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что жанр, удаленный другим процессом, нельзя '
+            'указать у произведения.'
+        )
+        assert 'genre' in response.json()
+
+    def test_05_deleted_during_request(self, admin_client, monkeypatch):
+        _, categories, _ = create_titles(admin_client)
+        admin_client.post('/api/v1/genres/',
+                          data={'name': 'Удаленный', 'slug': 'deleted'})
+        genre = Genre.objects.get(slug='deleted')
+        monkeypatch.setattr(
+            'api.serializers.resolve_slugs',
+            lambda model, slugs: {'deleted': genre} if model is Genre
+            else resolve_slugs(model, slugs))
+        Genre.objects.filter(pk=genre.pk)._raw_delete('default')
+        data = {'name': 'Новое', 'year': 2000, 'genre': ['deleted'],
+                'category': categories[0]['slug']}
+        response = admin_client.post('/api/v1/titles/', data=data,
+                                     format='json')
+        assert response.status_code == 400, (
+            'Проверьте, что удаленный во время запроса жанр не приводит '
+            'к ошибке 500.'
+        )
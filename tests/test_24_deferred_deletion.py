@@ -0,0 +1,210 @@
+import io
+import time
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from reviews.deletion import claim_job, delete_batch, run_pending
+from reviews.models import Comment, DeletionJob, Review, ScoreHistogram, Title
+
+from tests.utils import create_comments, create_single_review
+
+
+@pytest.fixture
+def feedback(admin_client, admin, user_client, user, moderator_client,
+             moderator):
+    authors_map = {admin: admin_client, user: user_client,
+                   moderator: moderator_client}
+    return create_comments(admin_client, authors_map)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24DeferredDeletionAPI:
+
+    def test_01_title_is_hidden_then_purged(self, client, admin_client,
+                                            feedback):
+        _, reviews, titles = feedback
+        title_id = titles[0]['id']
+        response = admin_client.delete(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == 204
+        assert client.get(f'/api/v1/titles/{title_id}/').status_code == 404
+        assert client.get(
+            f'/api/v1/titles/{title_id}/reviews/').status_code == 404
+        assert title_id not in [
+            title['id'] for title in client.get(
+                '/api/v1/titles/').json()['results']]
+        assert Review.objects.filter(title_id=title_id).count() == 3, (
+            'Проверьте, что отзывы удаляются не в запросе, а отдельной '
+            'задачей.'
+        )
+
+        progress = []
+        assert run_pending(batch_size=2,
+                           progress=lambda job: progress.append(
+                               job.progress)) == 1
+        assert progress == sorted(progress) and len(progress) == 4
+        assert not Review.objects.filter(title_id=title_id).exists()
+        assert not Comment.objects.filter(
+            review_id=reviews[0]['id']).exists()
+        assert not Title.objects.filter(pk=title_id).exists()
+        job = DeletionJob.objects.get()
+        assert (job.reviews_deleted, job.comments_deleted) == (3, 3)
+        assert job.finished_at is not None and job.progress == 1.0
+
+    def test_02_user_is_hidden_then_purged(self, admin_client, user_client,
+                                           user, feedback,
+                                           django_user_model):
+        _, reviews, titles = feedback
+        create_single_review(user_client, titles[1]['id'], 'Отзыв', 7)
+        user_review = Review.objects.get(title_id=titles[0]['id'],
+                                         author=user)
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == 204
+        assert user_client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что удаленный пользователь сразу теряет доступ.'
+        )
+        assert admin_client.get(
+            f'/api/v1/users/{user.username}/').status_code == 404
+
+        run_pending()
+        assert not django_user_model._base_manager.filter(
+            pk=user.pk).exists()
+        assert not Review.objects.filter(author_id=user.pk).exists()
+        assert not Comment.objects.filter(author_id=user.pk).exists()
+        assert not Comment.objects.filter(review=user_review.pk).exists()
+        histogram = ScoreHistogram.objects.get(title_id=titles[1]['id'])
+        assert histogram.score_7 == 0, (
+            'Проверьте, что распределение оценок учитывает удаленные отзывы.'
+        )
+        assert ScoreHistogram.objects.get(
+            title_id=titles[0]['id']).score_5 == 2
+
+    def test_03_purge_command(self, admin_client, feedback):
+        _, _, titles = feedback
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        out = io.StringIO()
+        call_command('purge_deleted', status=True, stdout=out)
+        assert f'title {titles[0]["id"]}: 0%' in out.getvalue()
+        call_command('purge_deleted', batch_size=1, stdout=out)
+        assert '100%' in out.getvalue()
+        assert DeletionJob.objects.get().finished_at is not None
+
+    def test_04_background_worker(self, admin_client, feedback, settings):
+        _, _, titles = feedback
+        settings.DEFERRED_DELETION = {**settings.DEFERRED_DELETION,
+                                      'BACKGROUND': True}
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        deadline = time.monotonic() + 10
+        while DeletionJob.objects.filter(finished_at__isnull=True).exists():
+            assert time.monotonic() < deadline, (
+                'Проверьте, что задача удаления выполняется в фоне.'
+            )
+            time.sleep(0.05)
+        assert not Review.objects.filter(title_id=titles[0]['id']).exists()
+
+    def test_05_deleted_author_is_hidden(self, client, admin_client,
+                                         user_client, user, moderator_client,
+                                         feedback):
+        comments, reviews, titles = feedback
+        title_url = f'/api/v1/titles/{titles[1]["id"]}/'
+        create_single_review(user_client, titles[1]['id'], 'Отзыв', 9)
+        user_review_url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+                           f'{reviews[1]["id"]}/')
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/')
+        assert reviews[1]['id'] not in [
+            review['id'] for review in response.json()['results']], (
+            'Проверьте, что отзывы удаленного пользователя скрываются сразу.'
+        )
+        assert client.get(user_review_url).status_code == 404
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+                              f'{reviews[0]["id"]}/comments/')
+        assert comments[1]['id'] not in [
+            comment['id'] for comment in response.json()['results']]
+        response = moderator_client.post(f'{user_review_url}comments/',
+                                         data={'text': 'Ответ'})
+        assert response.status_code == 404, (
+            'Проверьте, что к отзыву удаленного пользователя нельзя '
+            'оставить комментарий.'
+        )
+        data = client.get(f'{title_url}?score_histogram=1').json()
+        assert data['rating'] is None, (
+            'Проверьте, что рейтинг не учитывает отзывы удаленного '
+            'пользователя.'
+        )
+        assert data['score_histogram']['9'] == 0, (
+            'Проверьте, что распределение оценок сразу не учитывает отзывы '
+            'удаленного пользователя.'
+        )
+
+    def test_06_job_is_claimed_once(self, admin_client, feedback):
+        _, _, titles = feedback
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        job = claim_job()
+        assert job is not None
+        assert claim_job() is None, (
+            'Проверьте, что задачу, взятую в работу, не берет другой процесс.'
+        )
+        assert run_pending() == 0
+        DeletionJob.objects.update(
+            claimed_at=timezone.now() - timedelta(hours=1))
+        assert claim_job().pk == job.pk, (
+            'Проверьте, что задачу остановленного процесса можно взять '
+            'снова.'
+        )
+
+    def test_07_review_batch_deletes_its_comments(self, admin_client, admin,
+                                                  feedback):
+        _, reviews, titles = feedback
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        job = DeletionJob.objects.get()
+        Comment.objects.create(review_id=reviews[1]['id'], author=admin,
+                               text='Поздний комментарий')
+        assert delete_batch(job, Review.objects.filter(
+            title_id=titles[0]['id']), 10) == 3
+        assert not Comment.objects.exists(), (
+            'Проверьте, что комментарии удаляются в одной транзакции с '
+            'отзывами.'
+        )
+        job.refresh_from_db()
+        assert (job.reviews_deleted, job.comments_deleted) == (3, 4)
+
+    def test_08_rebuild_skips_pending_deletions(self, admin_client, user,
+                                                feedback):
+        _, _, titles = feedback
+        title_id = titles[0]['id']
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert ScoreHistogram.objects.get(title_id=title_id).score_5 == 2
+        call_command('rebuild_score_histograms', stdout=io.StringIO())
+        assert ScoreHistogram.objects.get(title_id=title_id).score_5 == 2, (
+            'Проверьте, что пересчет распределений не учитывает отзывы '
+            'удаленных пользователей.'
+        )
+        run_pending()
+        assert ScoreHistogram.objects.get(title_id=title_id).score_5 == 2
+
+    def test_09_review_batch_skips_per_review_signals(self, admin_client,
+                                                      feedback,
+                                                      django_user_model):
+        _, _, titles = feedback
+        for number in range(5):
+            author = django_user_model.objects.create(
+                username=f'reader{number}', email=f'reader{number}@ya.ru')
+            Review.objects.create(title_id=titles[0]['id'], author=author,
+                                  text=f'Отзыв {number}', score=5)
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        job = DeletionJob.objects.get()
+        with CaptureQueriesContext(connection) as ctx:
+            assert delete_batch(job, Review.objects.filter(
+                title_id=titles[0]['id']), 10) == 8
+        # BEGIN, id пакета, отзывы пакета, DELETE комментариев и отзывов,
+        # продление задачи.
+        assert len(ctx.captured_queries) == 6, (
+            'Проверьте, что пакет отзывов удаляется без запросов на каждый '
+            'отзыв: обработчики удаления отзывов в задаче отключены.'
+        )
+
@@ -0,0 +1,103 @@
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Comment, Genre, Review, Title
+
+
+REVIEWS = 250
+
+
+@pytest.fixture
+def admin_site_client(user_superuser):
+    client = Client()
+    client.force_login(user_superuser)
+    return client
+
+
+@pytest.fixture
+def feedback(django_user_model, user_superuser):
+    category = Category.objects.create(name='Фильм', slug='movie')
+    Genre.objects.bulk_create(
+        Genre(name=f'Жанр {i}', slug=f'genre-{i}') for i in range(50))
+    title = Title.objects.create(name='Большое произведение', year=2000,
+                                 category=category)
+    title.genre.set(Genre.objects.order_by('id')[:2])
+    django_user_model.objects.bulk_create(
+        django_user_model(username=f'reader{i}', email=f'reader{i}@yamdb.fake')
+        for i in range(REVIEWS))
+    users = django_user_model.objects.filter(username__startswith='reader')
+    Review.objects.bulk_create(
+        Review(title=title, author=author, text='Отзыв', score=5)
+        for author in users)
+    Comment.objects.bulk_create(
+        Comment(review=review, author=user_superuser, text='Комментарий')
+        for review in Review.objects.all())
+    return title
+
+
+def get_page(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    return response, [query['sql'] for query in context.captured_queries]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25Admin:
+
+    @pytest.mark.parametrize('url', (
+        '/admin/reviews/title/',
+        '/admin/reviews/review/',
+        '/admin/reviews/comment/',
+        '/admin/users/yamdbuserinterface/',
+    ))
+    def test_01_changelist_without_count(self, admin_site_client, feedback,
+                                         url):
+        response, queries = get_page(admin_site_client, url)
+        assert response.status_code == 200
+        assert not [sql for sql in queries if 'COUNT(' in sql.upper()], (
+            f'Проверьте, что список {url} не считает строки таблицы.'
+        )
+        assert len(queries) <= 8, (
+            f'Проверьте, что список {url} выполняет постоянное число '
+            f'запросов: {len(queries)}.'
+        )
+
+    def test_02_pages(self, admin_site_client, feedback):
+        url = '/admin/reviews/review/'
+        response = admin_site_client.get(f'{url}?p=3')
+        assert response.status_code == 200
+        assert len(response.context['cl'].result_list) == REVIEWS - 200
+        assert not response.context['cl'].paginator.page(3).has_next()
+        first = admin_site_client.get(url).context['cl']
+        assert len(first.result_list) == 100
+        assert first.paginator.page(1).has_next()
+        assert '?all=' not in admin_site_client.get(url).content.decode()
+        assert admin_site_client.get(f'{url}?p=4').status_code == 302
+
+    def test_03_title_form_uses_autocomplete(self, admin_site_client,
+                                             feedback):
+        response = admin_site_client.get(
+            f'/admin/reviews/title/{feedback.id}/change/')
+        assert response.status_code == 200
+        content = response.content.decode()
+        assert 'admin-autocomplete' in content
+        assert 'Жанр 49' not in content, (
+            'Проверьте, что форма произведения не загружает все жанры.'
+        )
+        response = admin_site_client.get(
+            '/admin/autocomplete/', {'term': 'Жанр 4', 'app_label': 'reviews',
+                                     'model_name': 'title',
+                                     'field_name': 'genre'})
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 14
+
+    def test_04_search(self, admin_site_client, feedback):
+        response = admin_site_client.get('/admin/reviews/title/?q=Большое')
+        assert list(response.context['cl'].result_list) == [feedback]
+        response = admin_site_client.get(
+            '/admin/reviews/review/?q=reader7')
+        assert len(response.context['cl'].result_list) == 1
+        response = admin_site_client.get(
+            '/admin/users/yamdbuserinterface/?q=reader24')
+        assert len(response.context['cl'].result_list) == 11
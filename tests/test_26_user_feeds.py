@@ -0,0 +1,113 @@
+import pytest
+from api.profiling import explain
+from api.views import UserCommentViewSet, UserReviewViewSet
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Comment, Review, Title
+
+TITLES = 15
+
+
+@pytest.fixture
+def titles():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    return [
+        Title.objects.create(name=f'Произведение {i}', year=2000,
+                             category=category)
+        for i in range(TITLES)
+    ]
+
+
+@pytest.fixture
+def feedback(titles, user, admin):
+    reviews = [Review.objects.create(title=title, author=user,
+                                     text=f'Отзыв {i}', score=5)
+               for i, title in enumerate(titles)]
+    Review.objects.create(title=titles[0], author=admin, text='Чужой',
+                          score=1)
+    comments = [Comment.objects.create(review=review, author=user,
+                                       text=f'Комментарий {i}')
+                for i, review in enumerate(reviews)]
+    return reviews, comments
+
+
+def feed_plan(viewset, username):
+    queryset = viewset(kwargs={'username': username}).get_queryset()
+    sql, params = queryset.order_by('-pub_date')[:11].query.sql_with_params()
+    return '\n'.join(explain(sql, params))
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26UserFeeds:
+    URL = '/api/v1/users/{username}/{feed}/'
+
+    def test_01_reviews_feed(self, client, user, feedback):
+        reviews, _ = feedback
+        url = self.URL.format(username=user.username, feed='reviews')
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        assert len(context.captured_queries) == 1, (
+            'Проверьте, что лента отзывов с авторами и произведениями '
+            'выбирается одним запросом.'
+        )
+        data = response.json()
+        assert 'count' not in data and data['next']
+        first = data['results'][0]
+        review = reviews[-1]
+        assert first == {
+            'id': review.id, 'text': review.text, 'author': user.username,
+            'score': 5, 'pub_date': first['pub_date'],
+            'title': {'id': review.title_id, 'name': review.title.name},
+        }
+        second = client.get(data['next']).json()
+        ids = [item['id'] for item in data['results'] + second['results']]
+        assert ids == [review.id for review in reversed(reviews)], (
+            'Проверьте, что лента отсортирована от новых отзывов к старым '
+            'и страницы не пересекаются.'
+        )
+        assert second['next'] is None
+
+    def test_02_comments_feed(self, client, user, feedback):
+        reviews, comments = feedback
+        url = self.URL.format(username=user.username, feed='comments')
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert len(context.captured_queries) == 1
+        first = response.json()['results'][0]
+        assert first['id'] == comments[-1].id
+        assert first['review'] == reviews[-1].id
+        assert first['title'] == {'id': reviews[-1].title_id,
+                                  'name': reviews[-1].title.name}
+
+    def test_03_missing_and_empty(self, client, moderator, user, feedback,
+                                  titles, admin_client):
+        response = client.get(self.URL.format(username='nobody',
+                                              feed='reviews'))
+        assert response.status_code == 404
+        response = client.get(self.URL.format(username=moderator.username,
+                                              feed='comments'))
+        assert response.status_code == 200
+        assert response.json()['results'] == []
+
+        admin_client.delete(f'/api/v1/titles/{titles[-1].id}/')
+        response = client.get(self.URL.format(username=user.username,
+                                              feed='reviews'))
+        assert response.json()['results'][0]['title']['id'] == (
+            titles[-2].id
+        ), 'Проверьте, что лента скрывает удаленные произведения.'
+        admin_client.delete(f'/api/v1/users/{user.username}/')
+        response = client.get(self.URL.format(username=user.username,
+                                              feed='reviews'))
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('viewset, index', (
+        (UserReviewViewSet, 'review_author_pub_date_idx'),
+        (UserCommentViewSet, 'comment_author_pub_date_idx'),
+    ))
+    def test_04_feed_uses_index(self, user, viewset, index):
+        plan = feed_plan(viewset, user.username)
+        assert index in plan, plan
+        assert 'TEMP B-TREE' not in plan, (
+            f'Проверьте, что лента сортируется по индексу {index}.'
+        )
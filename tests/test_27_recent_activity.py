@@ -0,0 +1,152 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from api.activity import activity_queryset, encode_cursor
+from api.profiling import explain
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.deletion import schedule_deletion
+from reviews.models import Category, Comment, Review, Title
+
+URL = '/api/v1/moderation/recent/'
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def title():
+    category = Category.objects.create(name='Фильм', slug='movie')
+    return Title.objects.create(name='Произведение', year=2000,
+                                category=category)
+
+
+def publish(obj, minutes):
+    type(obj).objects.filter(pk=obj.pk).update(
+        pub_date=START + timedelta(minutes=minutes))
+
+
+@pytest.fixture
+def activity(title, user, moderator, admin):
+    """
+    Отзывы и комментарии с перемежающимися датами публикации,
+    последний комментарий опубликован одновременно с отзывом.
+    """
+    expected = []
+    for minutes, author in enumerate((user, moderator, admin)):
+        review = Review.objects.create(title=title, author=author,
+                                       text=f'Отзыв {minutes}', score=5)
+        publish(review, minutes * 2)
+        comment = Comment.objects.create(review=review, author=user,
+                                         text=f'Комментарий {minutes}')
+        publish(comment, minutes * 2 + (1 if minutes < 2 else 0))
+        expected.append(('review', review.id))
+        expected.append(('comment', comment.id))
+    expected[-2:] = reversed(expected[-2:])
+    return list(reversed(expected))
+
+
+def walk(client, url):
+    items, pages = [], 0
+    while url:
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        assert response.status_code == 200
+        assert len(context.captured_queries) <= 3
+        data = response.json()
+        items += [(item['type'], item['id']) for item in data['results']]
+        url, pages = data['next'], pages + 1
+    return items, pages
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27RecentActivity:
+
+    def test_01_permissions(self, client, user_client, moderator_client,
+                            admin_client):
+        assert client.get(URL).status_code == 401
+        assert user_client.get(URL).status_code == 403
+        assert moderator_client.get(URL).status_code == 200
+        assert admin_client.get(URL).status_code == 200
+
+    def test_02_merged_pages(self, moderator_client, activity):
+        items, pages = walk(moderator_client, f'{URL}?limit=4')
+        assert items == activity, (
+            'Проверьте, что лента объединяет отзывы и комментарии '
+            'от новых к старым и страницы не пересекаются.'
+        )
+        assert pages == 2
+        first = moderator_client.get(URL).json()['results'][0]
+        assert first['type'] == 'review'
+        assert {'id', 'title_id', 'author', 'text', 'pub_date',
+                'score'} <= set(first)
+
+    def test_03_since(self, moderator_client, activity, title, moderator):
+        since = moderator_client.get(URL).json()['since']
+        response = moderator_client.get(URL, {'since': since})
+        assert response.json() == {'next': None, 'since': since,
+                                   'results': []}
+
+        review = Review.objects.get(author=moderator)
+        comments = [
+            Comment.objects.create(review=review, author=moderator,
+                                   text=f'Новый {i}')
+            for i in range(3)
+        ]
+        for minutes, comment in enumerate(comments, 10):
+            publish(comment, minutes)
+        data = moderator_client.get(URL, {'since': since,
+                                          'limit': 2}).json()
+        assert [item['id'] for item in data['results']] == [
+            comments[1].id, comments[0].id], (
+            'Проверьте, что since отдает ближайшие записи новее курсора.'
+        )
+        items, _ = walk(moderator_client, data['next'])
+        assert items == [('comment', comments[2].id)]
+        data = moderator_client.get(URL, {'since': data['since']}).json()
+        assert data['results'][0]['id'] == comments[2].id
+        assert data['results'][0]['review_id'] == review.id
+
+    @pytest.mark.parametrize('params', (
+        {'cursor': 'bad'}, {'since': 'bad'}, {'limit': '0'},
+        {'limit': '1000'},
+        {'cursor': encode_cursor({'pub_date': START, 'type': 'review',
+                                  'id': 1}),
+         'since': encode_cursor({'pub_date': START, 'type': 'review',
+                                 'id': 1})},
+    ))
+    def test_04_bad_params(self, moderator_client, params):
+        assert moderator_client.get(URL, params).status_code == 400
+
+    @pytest.mark.parametrize('kind', ('review', 'comment'))
+    @pytest.mark.parametrize('newer', (False, True))
+    def test_05_range_by_index(self, kind, newer):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        sql, params = activity_queryset(
+            kind, 11, (START, 0, 1), newer).query.sql_with_params()
+        plan = explain(sql, params)
+        assert f'{kind}_pub_date_idx (pub_date' in '\n'.join(plan), plan
+        assert not [line for line in plan
+                    if line.startswith(f'SCAN reviews_{kind}')], (
+            'Проверьте, что лента выбирается диапазоном по индексу '
+            '(pub_date, id) без сортировки всей таблицы.'
+        )
+        assert not [line for line in plan if line.startswith(
+            ('SCAN users_', 'SCAN reviews_title'))], (
+            'Проверьте, что удаленные пользователи и произведения '
+            'выбираются по частичному индексу deleted_at.'
+        )
+
+    def test_06_deleted_feedback_is_hidden(self, moderator_client, activity,
+                                           title, user):
+        schedule_deletion(user)
+        items, _ = walk(moderator_client, URL)
+        assert items == [
+            ('review', review_id) for review_id in Review.objects.exclude(
+                author=user).order_by('-pub_date').values_list(
+                    'id', flat=True)
+        ], (
+            'Проверьте, что лента не показывает отзывы и комментарии '
+            'удаленного пользователя.'
+        )
+        schedule_deletion(title)
+        assert walk(moderator_client, URL)[0] == []
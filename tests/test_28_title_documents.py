@@ -0,0 +1,161 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Category, Genre, Title, TitleDocument
+
+from tests.utils import create_single_review, create_titles
+
+TITLES_URL = '/api/v1/titles/'
+
+
+def read(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    queries = [query['sql'] for query in context.captured_queries]
+    return response.json(), queries
+
+
+def serialized(client, settings, url):
+    settings.TITLE_DOCUMENTS = False
+    try:
+        return client.get(url).json()
+    finally:
+        settings.TITLE_DOCUMENTS = True
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28TitleDocuments:
+
+    def test_01_documents_match_serializer(self, client, admin_client,
+                                           user_client, settings):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'Отзыв', 7)
+        for url in (TITLES_URL, f'{TITLES_URL}{titles[0]["id"]}/',
+                    f'{TITLES_URL}?genre=comedy', f'{TITLES_URL}?limit=1'):
+            data, queries = read(client, url)
+            assert data == serialized(client, settings, url), (
+                f'Проверьте, что {url} отдает документ в формате '
+                'TitlesReadSerializer.'
+            )
+            if '?' not in url:
+                assert not [sql for sql in queries if 'JOIN' in sql], (
+                    f'Проверьте, что {url} читается без соединений таблиц.'
+                )
+        _, queries = read(client, f'{TITLES_URL}{titles[0]["id"]}/')
+        assert len(queries) == 1
+
+    def test_02_documents_follow_changes(self, client, admin_client,
+                                         user_client, settings):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'{TITLES_URL}{title_id}/'
+        create_single_review(user_client, title_id, 'Отзыв', 7)
+        assert client.get(url).json()['rating'] == 7
+
+        admin_client.patch(url, data={'genre': ['drama'], 'name': 'Новое'},
+                           format='json')
+        data = client.get(url).json()
+        assert data['name'] == 'Новое'
+        assert [genre['slug'] for genre in data['genre']] == ['drama']
+
+        category = Category.objects.get(slug='films')
+        category.name = 'Кино'
+        category.save()
+        assert client.get(url).json()['category']['name'] == 'Кино', (
+            'Проверьте, что переименование категории пересобирает '
+            'документы ее произведений.'
+        )
+        genre = Genre.objects.get(slug='drama')
+        genre.name = 'Трагедия'
+        genre.save()
+        assert client.get(url).json()['genre'][0]['name'] == 'Трагедия'
+
+        Category.objects.get(slug='films').delete()
+        Genre.objects.get(slug='drama').delete()
+        data = client.get(url).json()
+        assert data['category'] is None and data['genre'] == []
+        assert data == serialized(client, settings, url)
+
+        admin_client.delete(url)
+        assert client.get(url).status_code == 404
+        assert not TitleDocument.objects.filter(title_id=title_id).exists()
+        assert title_id not in [
+            title['id'] for title in client.get(TITLES_URL).json()['results']]
+
+    def test_03_missing_documents_are_built(self, client, admin_client,
+                                            settings):
+        titles, categories, genres = create_titles(admin_client)
+        response = admin_client.post(TITLES_URL, data=[
+            {'name': 'Пакет', 'year': 2000, 'genre': [genres[0]['slug']],
+             'category': categories[0]['slug']},
+        ], format='json')
+        assert response.status_code == 201
+        TitleDocument.objects.all().delete()
+        data, _ = read(client, TITLES_URL)
+        assert data == serialized(client, settings, TITLES_URL)
+        assert TitleDocument.objects.count() == 3
+        assert client.get(f'{TITLES_URL}0/').status_code == 404
+        assert client.get(f'{TITLES_URL}abc/').status_code == 404
+
+    def test_04_rebuild_command(self, admin_client):
+        create_titles(admin_client)
+        TitleDocument.objects.all().delete()
+        out = io.StringIO()
+        call_command('rebuild_title_documents', stdout=out)
+        assert 'для 2 произведений' in out.getvalue()
+        assert TitleDocument.objects.count() == 2
+
+    def test_05_batch_by_ids(self, client, admin_client, settings):
+        titles, _, _ = create_titles(admin_client)
+        titles.append({'id': Title.objects.create(name='Новое', year=2000).id,
+                       'name': 'Новое'})
+        admin_client.delete(f'{TITLES_URL}{titles[1]["id"]}/')
+        ids = [titles[2]['id'], 999, titles[0]['id'], titles[1]['id'],
+               titles[2]['id']]
+        url = f'{TITLES_URL}?ids={",".join(map(str, ids))}'
+        client.get(url)
+        data, queries = read(client, url)
+        assert [title['id'] for title in data['results']] == [
+            titles[2]['id'], titles[0]['id']
+        ], 'Проверьте, что произведения идут в порядке id из запроса.'
+        assert data['missing'] == [999, titles[1]['id']]
+        assert not any(query.startswith(('INSERT', 'DELETE', 'UPDATE'))
+                       for query in queries)
+        assert data == serialized(client, settings, url)
+        response = client.get(f'{url}&fields=id,name')
+        assert response.json()['results'] == [
+            {'id': titles[2]['id'], 'name': titles[2]['name']},
+            {'id': titles[0]['id'], 'name': titles[0]['name']},
+        ]
+
+    def test_06_batch_validation(self, client, settings):
+        for ids in ('1,x', ','.join(map(str, range(501)))):
+            response = client.get(f'{TITLES_URL}?ids={ids}')
+            assert response.status_code == 400
+            assert 'ids' in response.json()
+
+    def test_07_orm_genre_changes(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+        url = f'{TITLES_URL}{title.pk}/'
+
+        def slugs():
+            return [genre['slug'] for genre in client.get(url).json()['genre']]
+
+        drama = Genre.objects.get(slug='drama')
+        title.genre.set([drama])
+        assert slugs() == ['drama'], (
+            'Проверьте, что изменение жанров через ORM пересобирает '
+            'документ произведения.'
+        )
+        horror = Genre.objects.get(slug='horror')
+        horror.title_set.add(title)
+        assert sorted(slugs()) == ['drama', 'horror']
+        drama.title_set.clear()
+        assert slugs() == ['horror']
+        title.genre.clear()
+        assert slugs() == []
@@ -0,0 +1,75 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_comments, create_titles
+
+
+def titles_sql(context):
+    return [query['sql'] for query in context.captured_queries
+            if 'reviews_title' in query['sql']]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29SparseFields:
+
+    def test_01_titles_fields(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/titles/?fields=id,name')
+        assert response.status_code == 200
+        assert response.json()['results'] == [
+            {'id': title['id'], 'name': title['name']} for title in titles
+        ]
+        sql = '\n'.join(titles_sql(context))
+        for column in ('description', 'reviews_review', 'reviews_genre',
+                       'reviews_category'):
+            assert column not in sql, (
+                f'Проверьте, что без запрошенных полей запрос не '
+                f'выбирает {column}.'
+            )
+
+    def test_02_titles_omit(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        full = client.get(url).json()
+        response = client.get(f'{url}?omit=description,genre')
+        assert response.status_code == 200
+        expected = {key: value for key, value in full.items()
+                    if key not in ('description', 'genre')}
+        assert response.json() == expected
+        response = client.get(f'{url}?fields=name,category')
+        assert response.json() == {'name': full['name'],
+                                   'category': full['category']}
+
+    def test_03_unknown_field(self, client, admin_client):
+        create_titles(admin_client)
+        response = client.get('/api/v1/titles/?fields=name,unknown')
+        assert response.status_code == 400
+        assert 'fields' in response.json()
+        response = client.get('/api/v1/categories/?omit=unknown')
+        assert response.status_code == 400
+        assert 'omit' in response.json()
+
+    def test_04_reviews_comments_and_feeds(self, client, admin_client,
+                                           admin, user_client, user):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client})
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = client.get(f'{reviews_url}?fields=id,author')
+        assert response.status_code == 200
+        assert response.json()['results'] == [
+            {'id': review['id'], 'author': review['author']}
+            for review in reviews
+        ]
+        response = client.get(
+            f'{reviews_url}{reviews[0]["id"]}/comments/?omit=text,pub_date')
+        assert [set(item) for item in response.json()['results']] == [
+            {'id', 'author'}, {'id', 'author'}
+        ]
+        response = client.get(
+            f'/api/v1/users/{user.username}/comments/?fields=title')
+        assert response.status_code == 200
+        assert response.json()['results'] == [
+            {'title': {'id': titles[0]['id'], 'name': titles[0]['name']}}
+        ]
@@ -0,0 +1,80 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from tests.utils import create_reviews
+
+BATCH_URL = '/api/v1/batch/'
+
+
+def screen(title_id):
+    return [
+        {'method': 'GET', 'path': f'/api/v1/titles/{title_id}/'},
+        {'method': 'GET',
+         'path': f'/api/v1/titles/{title_id}/reviews/?limit=1'},
+        {'method': 'GET', 'path': '/api/v1/users/me/'},
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30Batch:
+
+    @pytest.mark.parametrize('parallel', (False, True))
+    def test_01_reads(self, admin_client, admin, user_client, user,
+                      parallel):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client})
+        operations = screen(titles[0]['id'])
+        expected = [user_client.get(operation['path']).json()
+                    for operation in operations]
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                BATCH_URL, {'operations': operations, 'parallel': parallel},
+                format='json')
+        assert response.status_code == 200
+        assert response.json()['results'] == [
+            {'status': 200, 'body': body} for body in expected
+        ]
+        if not parallel:
+            auth = [query for query in context.captured_queries
+                    if 'users_yamdbuserinterface' in query['sql']
+                    and '"id" = ' in query['sql']]
+            assert len(auth) == 1, (
+                'Проверьте, что пользователь пакета загружается один раз.'
+            )
+
+    def test_02_writes_and_permissions(self, admin_client, admin,
+                                       user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client})
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        operations = [
+            {'method': 'PATCH', 'path': f'{reviews_url}{reviews[1]["id"]}/',
+             'body': {'score': 2}},
+            {'method': 'DELETE', 'path': f'{reviews_url}{reviews[0]["id"]}/'},
+            {'method': 'GET', 'path': '/api/v1/unknown/'},
+            {'method': 'GET', 'path': '/admin/'},
+            {'method': 'GET', 'path': '/api/v1/export/reviews/'},
+            {'method': 'POST', 'path': BATCH_URL, 'body': {}},
+        ]
+        response = user_client.post(BATCH_URL, {'operations': operations},
+                                    format='json')
+        statuses = [item['status'] for item in response.json()['results']]
+        assert statuses == [200, 403, 404, 404, 403, 400]
+        assert response.json()['results'][0]['body']['score'] == 2
+        anonymous = APIClient().post(BATCH_URL, {'operations': [
+            {'method': 'GET', 'path': '/api/v1/users/me/'},
+            {'method': 'GET', 'path': reviews_url},
+        ]}, format='json')
+        assert [item['status'] for item in anonymous.json()['results']] == [
+            401, 200
+        ]
+
+    def test_03_validation(self, user_client):
+        for data in ({'operations': []},
+                     {'operations': [{'method': 'HEAD', 'path': '/'}]},
+                     {'operations': screen(1) * 7}):
+            response = user_client.post(BATCH_URL, data, format='json')
+            assert response.status_code == 400
+            assert 'operations' in response.json()
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from api.events import EventStreamMiddleware, hub
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from reviews.models import Comment, Review
+
+from tests.utils import create_single_comment, create_titles
+
+TIMEOUT = 5
+
+
+async def not_found(scope, receive, send):
+    await send({'type': 'http.response.start', 'status': 418,
+                'headers': []})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+application = EventStreamMiddleware(not_found)
+
+
+def connect(title_id, last_event_id=None):
+    headers = [(b'last-event-id', last_event_id.encode())
+               if last_event_id else (b'accept', b'text/event-stream')]
+    return ApplicationCommunicator(application, {
+        'type': 'http', 'method': 'GET', 'headers': headers,
+        'path': f'/api/v1/titles/{title_id}/events/', 'query_string': b'',
+    })
+
+
+async def start(communicator):
+    await communicator.send_input({'type': 'http.request'})
+    return await communicator.receive_output(TIMEOUT)
+
+
+async def read_event(communicator):
+    while True:
+        message = await communicator.receive_output(TIMEOUT)
+        body = message['body'].decode()
+        if not body.startswith(':'):
+            return dict(line.split(': ', 1)
+                        for line in body.strip().split('\n'))
+
+
+async def disconnect(communicator):
+    await communicator.send_input({'type': 'http.disconnect'})
+    await communicator.wait(TIMEOUT)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test31EventStream:
+
+    def test_01_live_events(self, admin_client, user_client, user):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        async def scenario():
+            communicator = connect(title_id)
+            response = await start(communicator)
+            assert response['status'] == 200
+            assert (b'content-type',
+                    b'text/event-stream; charset=utf-8') in response['headers']
+            await sync_to_async(user_client.post)(
+                url, {'text': 'Новый отзыв', 'score': 7}, format='json')
+            review = await read_event(communicator)
+            review_id = await sync_to_async(
+                Review.objects.values_list('id', flat=True).get)()
+            await sync_to_async(create_single_comment)(
+                user_client, title_id, review_id, 'Новый комментарий')
+            comment = await read_event(communicator)
+            await disconnect(communicator)
+            return review, comment
+
+        review, comment = asyncio.run(scenario())
+        review_id = Review.objects.get().id
+        comment_id = Comment.objects.get().id
+        assert review['event'] == 'review'
+        assert f'"id": {review_id}' in review['data']
+        assert '"author": "TestUser"' in review['data']
+        assert comment['event'] == 'comment'
+        assert f'"review": {review_id}' in comment['data']
+        assert comment['id'].startswith(f'{review_id}.')
+        assert comment['id'].endswith(f'.{comment_id}')
+        assert not hub.has_subscribers(title_id), (
+            'Проверьте, что отключенный клиент отписывается от событий.'
+        )
+
+    def test_02_resume(self, admin_client, user_client, user, admin,
+                       settings):
+        settings.EVENT_STREAM = {**settings.EVENT_STREAM, 'BACKLOG': 1}
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        reviews = [
+            Review.objects.create(title_id=title_id, author=author,
+                                  text='Отзыв', score=5)
+            for author in (user, admin)
+        ]
+        Review.objects.create(title_id=titles[1]['id'], author=user,
+                              text='Другое произведение', score=5)
+        comment = Comment.objects.create(review=reviews[0], author=admin,
+                                         text='Комментарий')
+
+        async def scenario():
+            communicator = connect(title_id,
+                                   f'{reviews[0].id}.{comment.id - 1}')
+            await start(communicator)
+            events = [await read_event(communicator) for _ in range(2)]
+            await disconnect(communicator)
+            return events
+
+        events = asyncio.run(scenario())
+        assert [(event['event'], event['id']) for event in events] == [
+            ('review', f'{reviews[1].id}.{comment.id - 1}'),
+            ('comment', f'{reviews[1].id}.{comment.id}'),
+        ], 'Проверьте, что после Last-Event-ID отдаются только новые события.'
+
+    def test_03_routing(self):
+
+        async def scenario():
+            missing = await start(connect(999))
+            communicator = ApplicationCommunicator(application, {
+                'type': 'http', 'method': 'GET', 'headers': [],
+                'path': '/api/v1/titles/', 'query_string': b'',
+            })
+            other = await start(communicator)
+            return missing['status'], other['status']
+
+        assert asyncio.run(scenario()) == (404, 418)